@@ -0,0 +1,656 @@
+"""
+Append-only analysis log for the Fake News Detector API.
+
+This module stores analyses as JSON lines in append-only segment files, with a
+compact binary sidecar index mapping analysis IDs and user IDs to record
+offsets. Inserts are a single append, lookups are direct seeks, and sealed
+segments are compacted in the background.
+
+The index also carries each analysis' trust score and creation time, so
+per-user aggregates (analysis count, trust score sum and most recent analyses)
+are maintained incrementally as entries are added, without reading records.
+
+The log can be shared by several processes: appends and compaction swaps hold
+an exclusive file lock, and each process picks up entries appended by the
+others from the index before serving a read.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from file_lock import FileLock, atomic_write
+
+# Size at which the active segment is sealed and a new one started
+SEGMENT_MAX_BYTES = int(os.environ.get("ANALYSIS_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Whether to fsync after every append (slower, survives power loss)
+LOG_FSYNC = os.environ.get("ANALYSIS_LOG_FSYNC", "false").lower() == "true"
+
+# How often (in seconds) to check whether sealed segments should be compacted
+COMPACTION_INTERVAL = float(os.environ.get("ANALYSIS_COMPACTION_INTERVAL", "3600"))
+
+# Number of most recent analyses kept per user
+RECENT_SIZE = 5
+
+# Index entry: analysis key, user key, segment number, offset, length,
+# trust score, creation time (POSIX timestamp)
+INDEX_ENTRY = struct.Struct("<16s16sIQIdd")
+INDEX_NAME = "index-v2.bin"
+
+# Index of the first version of the log (without scores), rebuilt on open
+LEGACY_INDEX_NAME = "index.bin"
+
+# Record, in the log directory, of the import of the analyses.json file the
+# JSON backend used before the log
+LEGACY_IMPORT_NAME = "legacy-import.json"
+
+# List, in the log directory, of the segments written by compaction
+COMPACTED_NAME = "compacted.json"
+
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{6,})\.jsonl$")
+
+# (segment, offset, length)
+Location = Tuple[int, int, int]
+
+# (analysis key, user key, location, trust score, creation time)
+Entry = Tuple[bytes, bytes, Location, float, float]
+
+
+def _key(value: str) -> bytes:
+    """Turn an ID into a 16-byte index key (UUID bytes, or an MD5 digest for other IDs)."""
+    try:
+        return uuid.UUID(value).bytes
+    except (ValueError, AttributeError, TypeError):
+        return hashlib.md5(str(value).encode()).digest()
+
+
+def _timestamp(created_at: Optional[str]) -> float:
+    """Turn an ISO creation time into a timestamp (0 if missing or invalid)."""
+    try:
+        return datetime.fromisoformat(created_at).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _entry(record: Dict[str, Any], location: Location) -> Entry:
+    """Build the index entry of a record stored at a location."""
+    return (
+        _key(record["id"]), _key(record["user_id"]), location,
+        float(record.get("trust_score") or 0), _timestamp(record.get("created_at"))
+    )
+
+
+class UserAggregate:
+    """Running analysis count, trust score sum and most recent analyses of a user."""
+
+    __slots__ = ("count", "trust_score_sum", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.trust_score_sum = 0.0
+        # (-creation time, analysis key), newest first, at most RECENT_SIZE items
+        self.recent: List[Tuple[float, bytes]] = []
+
+    def add(self, analysis_key: bytes, trust_score: float, created: float) -> None:
+        """Account for a new analysis."""
+        self.count += 1
+        self.trust_score_sum += trust_score
+        item = (-created, analysis_key)
+        if len(self.recent) < RECENT_SIZE or item < self.recent[-1]:
+            bisect.insort(self.recent, item)
+            del self.recent[RECENT_SIZE:]
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, UserAggregate)
+            and self.count == other.count
+            and abs(self.trust_score_sum - other.trust_score_sum) < 1e-6
+            and self.recent == other.recent
+        )
+
+
+class AnalysisLog:
+    """
+    Append-only log of analyses with an in-memory offset index.
+
+    Records are appended to the active segment as one JSON line each. Every
+    append also adds a fixed-size entry to the sidecar index, so the index can
+    be reloaded at startup without scanning the segments. If a process dies
+    between the two writes, or mid-write, the tail of the active segment is
+    re-scanned (and a torn last line truncated) before the next append, so at
+    most the last record is lost.
+
+    The active segment is always the highest-numbered one, which lets
+    processes agree on it without coordination beyond the file lock.
+    """
+
+    def __init__(self, log_dir: str):
+        """
+        Open the log, creating it if needed.
+
+        Args:
+            log_dir: The directory holding the segments and the index
+        """
+        self.log_dir = log_dir
+        self.index_path = os.path.join(log_dir, INDEX_NAME)
+        os.makedirs(log_dir, exist_ok=True)
+
+        self._lock = FileLock(os.path.join(log_dir, ".lock"))
+        self._compaction_lock = FileLock(os.path.join(log_dir, ".compact.lock"))
+        self._by_id: Dict[bytes, Location] = {}
+        self._by_user: Dict[bytes, List[Location]] = {}
+        self._stats: Dict[bytes, UserAggregate] = {}
+        self._readers: Dict[int, Any] = {}
+        self._indexed_end: Dict[int, int] = {}
+        self._index_file = None
+        self._index_size = 0
+        self._compactor: Optional[threading.Thread] = None
+        self._active = 1
+
+        with self._lock.acquire():
+            if not os.path.exists(self.index_path):
+                if self._segments():
+                    # Index lost, or written by an older version
+                    self._rebuild_index()
+                else:
+                    open(self.index_path, "ab").close()
+            legacy_index = os.path.join(log_dir, LEGACY_INDEX_NAME)
+            if os.path.exists(legacy_index):
+                os.remove(legacy_index)
+            self._sync()
+            self._repair()
+
+    # Files
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.log_dir, f"segment-{segment:06d}.jsonl")
+
+    def _segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.log_dir):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def _read_at(self, segment: int, offset: int, length: int) -> bytes:
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = open(self._segment_path(segment), "rb")
+            self._readers[segment] = reader
+        if hasattr(os, "pread"):
+            return os.pread(reader.fileno(), length, offset)
+        with self._lock.acquire(exclusive=False):
+            reader.seek(offset)
+            return reader.read(length)
+
+    def _close_reader(self, segment: int) -> None:
+        reader = self._readers.pop(segment, None)
+        if reader is not None:
+            reader.close()
+
+    def _scan_segment(self, segment: int, start: int = 0) -> Tuple[List[Entry], int]:
+        """
+        Parse the records of a segment from an offset.
+
+        Returns:
+            Tuple: The entries of the complete records, and the offset after
+                the last one (a torn last line is not included)
+        """
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(start)
+            data = f.read()
+        offset = start
+        entries = []
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entries.append(_entry(json.loads(line), (segment, offset, len(line))))
+            except (ValueError, KeyError, TypeError):
+                # Torn record left by a crashed writer
+                if offset + len(line) == start + len(data):
+                    break
+            offset += len(line)
+        return entries, offset
+
+    # Index (callers hold self._lock)
+
+    def _reset_index(self) -> None:
+        self._by_id, self._by_user, self._stats, self._indexed_end = {}, {}, {}, {}
+
+    def _add_to_index(self, analysis_key: bytes, user_key: bytes, location: Location,
+                      trust_score: float, created: float) -> None:
+        previous = self._by_id.get(analysis_key)
+        if previous is not None:
+            # A re-inserted record replaces the earlier copy; analyses are
+            # immutable, so the aggregates do not change
+            user_locations = self._by_user.get(user_key, [])
+            if previous in user_locations:
+                user_locations.remove(previous)
+        else:
+            self._stats.setdefault(user_key, UserAggregate()).add(analysis_key, trust_score, created)
+        self._by_id[analysis_key] = location
+        self._by_user.setdefault(user_key, []).append(location)
+        segment, offset, length = location
+        self._indexed_end[segment] = max(self._indexed_end.get(segment, 0), offset + length)
+
+    @staticmethod
+    def _pack(entries: List[Entry]) -> bytes:
+        return b"".join(
+            INDEX_ENTRY.pack(analysis_key, user_key, *location, trust_score, created)
+            for analysis_key, user_key, location, trust_score, created in entries
+        )
+
+    @staticmethod
+    def _unpack(data: bytes) -> Iterator[Entry]:
+        for analysis_key, user_key, segment, offset, length, trust_score, created in INDEX_ENTRY.iter_unpack(data):
+            yield analysis_key, user_key, (segment, offset, length), trust_score, created
+
+    def _read_index(self) -> List[Entry]:
+        """Read all complete entries of the index file."""
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        return list(self._unpack(data[:len(data) - len(data) % INDEX_ENTRY.size]))
+
+    def _write_index_entries(self, entries: List[Entry]) -> None:
+        """Append entries to the index file and to the in-memory index."""
+        with open(self.index_path, "ab") as f:
+            f.write(self._pack(entries))
+        for entry in entries:
+            self._add_to_index(*entry)
+        self._index_size += INDEX_ENTRY.size * len(entries)
+
+    def _replace_index(self, entries: List[Entry]) -> None:
+        """Atomically replace the index file and reload the in-memory index from entries."""
+        if self._index_file is not None:
+            self._index_file.close()
+        atomic_write(self.index_path, self._pack(entries))
+        self._index_file = open(self.index_path, "rb")
+        self._reset_index()
+        for entry in entries:
+            self._add_to_index(*entry)
+        self._index_size = INDEX_ENTRY.size * len(entries)
+
+    def _sync(self) -> int:
+        """
+        Load index entries written since the last call, by any process.
+
+        Returns:
+            int: The size of the index file
+        """
+        stat = os.stat(self.index_path)
+        # The open index file pins its inode, so a different inode means a new file
+        if self._index_file is None or stat.st_ino != os.fstat(self._index_file.fileno()).st_ino:
+            # First load, or another process compacted the log
+            for segment in list(self._readers):
+                self._close_reader(segment)
+            if self._index_file is not None:
+                self._index_file.close()
+            self._index_file = open(self.index_path, "rb")
+            self._reset_index()
+            self._index_size = 0
+        if stat.st_size - self._index_size >= INDEX_ENTRY.size:
+            self._index_file.seek(self._index_size)
+            data = self._index_file.read(stat.st_size - self._index_size)
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            for entry in self._unpack(data[:usable]):
+                self._add_to_index(*entry)
+            self._index_size += usable
+        return stat.st_size
+
+    def _repair(self) -> None:
+        """
+        Undo the effects of a crashed writer (requires the exclusive lock).
+
+        A torn trailing index entry is dropped, records appended to the active
+        segment but missing from the index are indexed, and a torn last line is
+        truncated.
+        """
+        if os.path.getsize(self.index_path) != self._index_size:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(self._index_size)
+
+        segments = self._segments()
+        self._active = max(segments + [self._active])
+        path = self._segment_path(self._active)
+        if not os.path.exists(path):
+            return
+        start = self._indexed_end.get(self._active, 0)
+        size = os.path.getsize(path)
+        if size == start:
+            return
+
+        entries, end = self._scan_segment(self._active, start)
+        if end != size:
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        if entries:
+            self._write_index_entries(entries)
+
+    def _rebuild_index(self) -> int:
+        """Rebuild the index from the segments (requires the exclusive lock)."""
+        entries: Dict[bytes, Entry] = {}
+        for segment in self._segments():
+            for entry in self._scan_segment(segment)[0]:
+                # Later copies of a record replace earlier ones
+                entries.pop(entry[0], None)
+                entries[entry[0]] = entry
+        self._replace_index(list(entries.values()))
+        return len(entries)
+
+    # Public API
+
+    def __len__(self) -> int:
+        with self._lock.acquire(exclusive=False):
+            self._sync()
+            return len(self._by_id)
+
+    def append(self, analysis_id: str, analysis: Dict[str, Any]) -> None:
+        """
+        Append an analysis to the log.
+
+        Args:
+            analysis_id: The ID of the analysis
+            analysis: The analysis record
+        """
+        self.append_many([(analysis_id, analysis)])
+
+    def append_many(self, analyses: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Append several analyses to the log under one lock acquisition.
+
+        The records are written with one write (and at most one fsync) per
+        segment they land in, followed by their index entries.
+
+        Args:
+            analyses: (ID, record) pairs of the analyses
+
+        Returns:
+            int: The number of analyses appended
+        """
+        records = [{"id": analysis_id, **analysis} for analysis_id, analysis in analyses]
+        if not records:
+            return 0
+        lines = [(json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8") for record in records]
+        with self._lock.acquire():
+            index_size = self._sync()
+
+            # Another process may have started a new segment or compacted ours away
+            if not os.path.exists(self._segment_path(self._active)):
+                self._active = max(self._segments() + [self._active])
+            while os.path.exists(self._segment_path(self._active + 1)):
+                self._active += 1
+            path = self._segment_path(self._active)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size != self._indexed_end.get(self._active, 0) or index_size != self._index_size:
+                self._repair()
+                size = os.path.getsize(path)
+
+            i = 0
+            while i < len(lines):
+                if size and size + len(lines[i]) > SEGMENT_MAX_BYTES:
+                    self._active += 1
+                    path = self._segment_path(self._active)
+                    size = 0
+                # Take as many records as fit in this segment (at least one)
+                first = i
+                chunk_size = len(lines[i])
+                i += 1
+                while i < len(lines) and size + chunk_size + len(lines[i]) <= SEGMENT_MAX_BYTES:
+                    chunk_size += len(lines[i])
+                    i += 1
+
+                with open(path, "ab") as f:
+                    offset = f.tell()
+                    f.write(b"".join(lines[first:i]))
+                    f.flush()
+                    if LOG_FSYNC:
+                        os.fsync(f.fileno())
+                entries = []
+                for record, line in zip(records[first:i], lines[first:i]):
+                    entries.append(_entry(record, (self._active, offset, len(line))))
+                    offset += len(line)
+                self._write_index_entries(entries)
+                size = offset
+
+        self._start_compactor()
+        return len(records)
+
+    def _read(self, location: Location) -> Dict[str, Any]:
+        return json.loads(self._read_at(*location))
+
+    def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get an analysis by ID.
+
+        Args:
+            analysis_id: The ID of the analysis
+
+        Returns:
+            Dict: The analysis with its ID, or None if not found
+        """
+        with self._lock.acquire(exclusive=False):
+            self._sync()
+            location = self._by_id.get(_key(analysis_id))
+            if location is None:
+                return None
+            record = self._read(location)
+        return record if record.get("id") == analysis_id else None
+
+    def get_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Get all analyses of a user.
+
+        Args:
+            user_id: The ID of the user
+
+        Returns:
+            List: The analyses with their IDs, in storage order
+        """
+        with self._lock.acquire(exclusive=False):
+            self._sync()
+            records = [self._read(location) for location in sorted(self._by_user.get(_key(user_id), []))]
+        return [record for record in records if record.get("user_id") == user_id]
+
+    def user_stats(self, user_id: str) -> Dict[str, Any]:
+        """
+        Get the aggregates of a user's analyses, in constant time.
+
+        Args:
+            user_id: The ID of the user
+
+        Returns:
+            Dict: analysis_count, trust_score_sum and recent_analyses (the
+                RECENT_SIZE most recent analyses with their IDs, newest first)
+        """
+        with self._lock.acquire(exclusive=False):
+            self._sync()
+            aggregate = self._stats.get(_key(user_id)) or UserAggregate()
+            recent = [self._read(self._by_id[analysis_key]) for _, analysis_key in aggregate.recent]
+            return {
+                "analysis_count": aggregate.count,
+                "trust_score_sum": aggregate.trust_score_sum,
+                "recent_analyses": [record for record in recent if record.get("user_id") == user_id]
+            }
+
+    def check_stats(self, repair: bool = False) -> List[str]:
+        """
+        Compare the maintained aggregates with aggregates computed from the records.
+
+        Args:
+            repair: Whether to rebuild the index (and the aggregates) from the
+                segments if they differ
+
+        Returns:
+            List: The IDs of the users whose aggregates differ
+        """
+        with self._lock.acquire():
+            self._sync()
+            expected: Dict[bytes, UserAggregate] = {}
+            user_ids: Dict[bytes, str] = {}
+            for analysis_key, location in self._by_id.items():
+                record = self._read(location)
+                _, user_key, _, trust_score, created = _entry(record, location)
+                user_ids[user_key] = record["user_id"]
+                expected.setdefault(user_key, UserAggregate()).add(analysis_key, trust_score, created)
+
+            mismatched = [
+                user_ids.get(user_key, user_key.hex())
+                for user_key in expected.keys() | self._stats.keys()
+                if expected.get(user_key) != self._stats.get(user_key)
+            ]
+            if mismatched and repair:
+                self._rebuild_index()
+            return mismatched
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all live analyses, in storage order."""
+        with self._lock.acquire(exclusive=False):
+            self._sync()
+            keys = [key for _, key in sorted((location, key) for key, location in self._by_id.items())]
+        for key in keys:
+            # Look the location up again: the log may have been compacted meanwhile
+            with self._lock.acquire(exclusive=False):
+                self._sync()
+                location = self._by_id.get(key)
+                record = self._read(location) if location is not None else None
+            if record is not None:
+                yield record
+
+    def import_records(self, analyses: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Import analyses that are not in the log yet.
+
+        Args:
+            analyses: The analyses, keyed by ID
+
+        Returns:
+            int: The number of imported analyses
+        """
+        imported = 0
+        with self._lock.acquire():
+            self._sync()
+            for analysis_id, analysis in analyses.items():
+                if _key(analysis_id) not in self._by_id:
+                    analysis = {k: v for k, v in analysis.items() if k != "id"}
+                    self.append(analysis_id, analysis)
+                    imported += 1
+        return imported
+
+    # Compaction
+
+    def _start_compactor(self) -> None:
+        if self._compactor is None and COMPACTION_INTERVAL > 0:
+            self._compactor = threading.Thread(target=self._compaction_loop, daemon=True)
+            self._compactor.start()
+
+    def _compaction_loop(self) -> None:
+        event = threading.Event()
+        while not event.wait(COMPACTION_INTERVAL):
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Error compacting analysis log: {e}")
+
+    def _compacted_segments(self) -> Set[int]:
+        """Get the numbers of the segments written by compaction."""
+        try:
+            with open(os.path.join(self.log_dir, COMPACTED_NAME), "r", encoding="utf-8") as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            return set()
+
+    def compact(self, min_segments: int = 2) -> bool:
+        """
+        Merge sealed segments into one, grouped by user.
+
+        Each record is copied by compaction once: only segments sealed since
+        the last compaction are merged, together with compacted segments that
+        hold superseded copies of re-inserted records (which are dropped). The
+        merged segment stays sealed: a new empty segment after it becomes the
+        active one. Appends continue while live records are copied; the new
+        segment and the new index are swapped in under the exclusive lock. If
+        the process dies before the index is replaced, the new segment is
+        picked up as the active segment on recovery, so no record is lost.
+
+        Args:
+            min_segments: Minimum number of newly sealed segments worth compacting
+
+        Returns:
+            bool: True if segments were compacted
+        """
+        with self._compaction_lock.acquire():
+            # Leftovers of a compaction interrupted by a crash
+            for name in os.listdir(self.log_dir):
+                if name.startswith((INDEX_NAME + ".", COMPACTED_NAME + ".")) and name.endswith(".tmp"):
+                    os.remove(os.path.join(self.log_dir, name))
+            tmp_path = os.path.join(self.log_dir, "compact.tmp")
+            compacted = self._compacted_segments()
+            with self._lock.acquire(exclusive=False):
+                self._sync()
+                segments = self._segments()
+                live_bytes: Dict[int, int] = {}
+                for segment, _, length in self._by_id.values():
+                    live_bytes[segment] = live_bytes.get(segment, 0) + length
+                fresh = {segment for segment in segments[:-1] if segment not in compacted}
+                superseded = {
+                    segment for segment in segments[:-1]
+                    if segment in compacted
+                    and os.path.getsize(self._segment_path(segment)) > live_bytes.get(segment, 0)
+                }
+                if len(fresh) < min_segments and not superseded:
+                    return False
+                sealed = fresh | superseded
+                live = sorted(
+                    (user_key, location, analysis_key)
+                    for analysis_key, user_key, location, _, _ in self._read_index()
+                    if location[0] in sealed and self._by_id.get(analysis_key) == location
+                )
+
+            # Sealed segments never change, so copy them without holding the lock
+            copied: Dict[Location, Tuple[int, int]] = {}
+            with open(tmp_path, "wb") as out:
+                for _, location, _ in live:
+                    data = self._read_at(*location)
+                    copied[location] = (out.tell(), len(data))
+                    out.write(data)
+                out.flush()
+                os.fsync(out.fileno())
+
+            with self._lock.acquire():
+                self._sync()
+                target = max(self._segments()) + 1
+                os.replace(tmp_path, self._segment_path(target))
+
+                # Rebuild the index: compacted records take their new place, the others keep theirs
+                current = [entry for entry in self._read_index() if self._by_id.get(entry[0]) == entry[2]]
+                moved = {entry[2]: entry for entry in current if entry[2][0] in sealed}
+                entries = [entry for entry in current if entry[2][0] not in sealed]
+                for _, location, _ in live:
+                    if location in moved:
+                        analysis_key, user_key, _, trust_score, created = moved[location]
+                        entries.append((analysis_key, user_key, (target,) + copied[location], trust_score, created))
+                self._replace_index(entries)
+
+                # Seal the compacted segment: appends go to a new segment after it
+                self._active = target + 1
+                open(self._segment_path(self._active), "ab").close()
+                compacted = (compacted - sealed) | {target}
+                atomic_write(
+                    os.path.join(self.log_dir, COMPACTED_NAME),
+                    json.dumps(sorted(compacted & set(self._segments()))).encode("utf-8")
+                )
+
+                for segment in sealed:
+                    self._close_reader(segment)
+                    os.remove(self._segment_path(segment))
+        return True
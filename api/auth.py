@@ -4,14 +4,20 @@ Authentication module for the Fake News Detector API.
 This module provides functions for authenticating users.
 """
 
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 
-from database import get_user_by_email, verify_password, update_user_last_login
+from database import get_user_by_email, get_user_by_id, get_user_revision, update_user_last_login
+from passwords import verify_password, verify_password_async
 from models import TokenData, User
 
 # JWT configuration
@@ -19,8 +25,111 @@ SECRET_KEY = "YOUR_SECRET_KEY_HERE"  # In production, use a secure secret key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Maximum number of verified tokens kept in memory
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "1024"))
+
 # OAuth2 configuration
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified access tokens.
+
+    Entries are keyed by a SHA-256 digest of the token (the token itself is not
+    kept) and hold the resolved User until the token expires or the user's
+    record changes.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        """
+        Initialize the token cache.
+
+        Args:
+            max_size: The maximum number of cached tokens
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[User, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[User]:
+        """
+        Get the cached user for a token.
+
+        Args:
+            token: The access token
+
+        Returns:
+            User: The cached user, or None if missing, expired or stale
+        """
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires_at, revision = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+        # Check outside the cache lock; the user store has its own lock
+        if get_user_revision(user.id) != revision:
+            with self._lock:
+                self._entries.pop(key, None)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return user
+
+    def put(self, token: str, user: User, expires_at: float, revision: int) -> None:
+        """
+        Cache the user resolved from a token.
+
+        Args:
+            token: The access token
+            user: The resolved user
+            expires_at: The token expiry as a UNIX timestamp
+            revision: The user's record revision when it was resolved
+        """
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (user, expires_at, revision)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all cached tokens."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: The cache size, hits and misses
+        """
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
 
 
 def authenticate_user(email: str, password: str) -> Optional[dict]:
@@ -42,6 +151,27 @@ def authenticate_user(email: str, password: str) -> Optional[dict]:
     return user
 
 
+async def authenticate_user_async(email: str, password: str) -> Optional[dict]:
+    """
+    Authenticate a user without blocking the event loop.
+
+    The bcrypt check runs on the dedicated hashing pool.
+    
+    Args:
+        email: The email of the user
+        password: The password of the user
+        
+    Returns:
+        dict: The authenticated user, or None if authentication failed
+    """
+    user = get_user_by_email(email)
+    if not user:
+        return None
+    if not await verify_password_async(password, user["hashed_password"]):
+        return None
+    return user
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create an access token.
@@ -84,7 +214,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+    # Reuse the user resolved for this token if it is still valid
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        update_user_last_login(cached_user.id)
+        return cached_user
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -98,16 +234,70 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     user = get_user_by_email(email=token_data.email)
     if user is None:
         raise credentials_exception
+
+    # Read the revision before the record used to build the cached User, so a
+    # concurrent change can only make the cache entry look stale, never fresh
+    revision = get_user_revision(user["id"])
+    user = get_user_by_id(user["id"])
+    if user is None:
+        raise credentials_exception
     
     # Update last login time
     update_user_last_login(user["id"])
     
-    return User(
+    current_user = User(
         id=user["id"],
         email=user["email"],
         full_name=user.get("full_name", user.get("username", "")),  # Fallback to username if full_name is not available
         is_google_user=user.get("is_google_user", False),
         created_at=datetime.fromisoformat(user["created_at"]),
         last_login=datetime.fromisoformat(user["last_login"]) if user["last_login"] else None,
-        is_active=user["is_active"]
+        is_active=user["is_active"],
+        is_admin=user.get("is_admin", False)
     )
+
+    # Cache the user until the token expires or the user record changes
+    if payload.get("exp") is not None and revision is not None:
+        token_cache.put(token, current_user, float(payload["exp"]), revision)
+
+    return current_user
+
+
+async def get_current_user_optional(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[User]:
+    """
+    Get the current user for endpoints where authentication is optional.
+
+    A request whose token is invalid, expired or stale is served as
+    anonymous, as it was before the endpoint read the token; only the
+    endpoints that require authentication reject it.
+
+    Args:
+        token: The access token, if one was sent
+
+    Returns:
+        User: The current user, or None for anonymous requests and invalid tokens
+    """
+    if token is None:
+        return None
+    try:
+        return await get_current_user(token)
+    except HTTPException:
+        return None
+
+
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """
+    Get the current user for admin-only endpoints.
+
+    Args:
+        current_user: The current user
+
+    Returns:
+        User: The current user
+
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
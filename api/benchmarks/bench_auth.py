@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Benchmark for the authentication path.
+
+Measures the overhead of get_current_user (the dependency behind every
+authenticated endpoint) with the verified-token cache disabled and enabled.
+Runs against a temporary database so the real users file is not touched.
+
+Usage:
+    python benchmarks/bench_auth.py [--users N] [--requests N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DB_DIR"] = tempfile.mkdtemp(prefix="bench-auth-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_users(count: int) -> str:
+    """Write count users to the users file and return the last email."""
+    users = {}
+    for i in range(count):
+        users[f"user-{i}"] = {
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "hashed_password": "x",
+            "full_name": f"User {i}",
+            "is_google_user": False,
+            "created_at": "2025-01-01T00:00:00",
+            "last_login": None,
+            "is_active": True,
+            "is_admin": False
+        }
+    with open(os.path.join(os.environ["DB_DIR"], "users.json"), "w") as f:
+        json.dump(users, f)
+    return f"user{count - 1}@example.com"
+
+
+async def run(token: str, requests: int, cached: bool) -> float:
+    """Resolve the token repeatedly and return the mean time per call in microseconds."""
+    from auth import get_current_user, token_cache
+
+    token_cache.clear()
+    start = time.perf_counter()
+    for _ in range(requests):
+        if not cached:
+            token_cache.clear()
+        await get_current_user(token)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark authenticated-endpoint overhead")
+    parser.add_argument("--users", type=int, default=10000, help="Number of users in the database")
+    parser.add_argument("--requests", type=int, default=20000, help="Number of authenticated calls")
+    args = parser.parse_args()
+
+    email = seed_users(args.users)
+
+    import database
+    from auth import create_access_token
+
+    if database.DB_BACKEND == "sqlite":
+        database._store.migrate_from_json(database.DB_DIR)
+
+    token = create_access_token({"sub": email})
+
+    uncached = asyncio.run(run(token, args.requests, cached=False))
+    cached = asyncio.run(run(token, args.requests, cached=True))
+
+    print(f"Users:            {args.users}")
+    print(f"Without cache:    {uncached:.1f} us/request")
+    print(f"With cache:       {cached:.1f} us/request")
+    print(f"Speedup:          {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Benchmark for the fact-check index.
+
+Writes a synthetic fact-check corpus (Zipf-distributed words, like real text
+without its stopwords), loads it into the BM25 index and times the
+fact-checking of whole articles
+(claim extraction plus one lookup per claim sentence), for articles that
+repeat a fact-checked claim and for articles that do not.
+
+Usage:
+    python benchmarks/bench_fact_check.py [--claims N] [--ops N]
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fact_check import VERDICT_RATINGS, FactCheckIndex  # noqa: E402
+
+VOCABULARY_SIZE = 30000
+SENTENCES_PER_ARTICLE = 30
+
+
+def make_vocabulary(rng: random.Random) -> list:
+    """Build random pronounceable words in random order (the first ones are used most)."""
+    consonants, vowels = "bcdfghjklmnprtvwz", "aeiou"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        length = rng.randint(2, 4)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def timed(fn, ops: int) -> tuple:
+    """Run fn ops times and return the median and 95th percentile time per call in milliseconds."""
+    times = []
+    for _ in range(ops):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fact-check index")
+    parser.add_argument("--claims", type=int, default=100000, help="Number of fact-checked claims")
+    parser.add_argument("--ops", type=int, default=200, help="Articles checked per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # The 100 most frequent words stand for stopwords, which the index ignores
+    vocabulary = make_vocabulary(rng)[100:]
+    cum_weights = list(itertools.accumulate(1 / (rank + 101) for rank in range(len(vocabulary))))
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=words)).capitalize() + "."
+
+    db_dir = tempfile.mkdtemp(prefix="bench-fact-check-")
+    path = os.path.join(db_dir, "fact_checks.csv")
+    claims = [sentence(rng.randint(6, 14)) for _ in range(args.claims)]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["claim", "verdict", "source", "url"])
+        for claim in claims:
+            writer.writerow([claim, rng.choice(list(VERDICT_RATINGS)), "", ""])
+
+    start = time.perf_counter()
+    index = FactCheckIndex(path)
+    print(f"Indexed {len(index)} fact-checks in {time.perf_counter() - start:.1f} s\n")
+
+    def article(with_claim: bool) -> str:
+        sentences = [sentence(rng.randint(10, 25)) for _ in range(SENTENCES_PER_ARTICLE)]
+        if with_claim:
+            sentences[rng.randrange(len(sentences))] = "Officials said that " + rng.choice(claims).lower()
+        return " ".join(sentences)
+
+    print(f"{'article':<28}{'matched':>10}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for name, with_claim in (("repeats a fact-check", True), ("no fact-checked claim", False)):
+        articles = iter([article(with_claim) for _ in range(args.ops)])
+        matched = []
+        p50, p95 = timed(lambda: matched.append(bool(index.check(next(articles)))), args.ops)
+        print(f"{name:<28}{sum(matched) / len(matched):>10.0%}{p50:>12.2f}{p95:>12.2f}")
+
+    shutil.rmtree(db_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Benchmark for the trust scoring engine.
+
+Compares scoring documents one request at a time (a batch of one, as the
+/trust-score endpoint does) against scoring them as a single batch.
+
+Usage:
+    python benchmarks/bench_scoring.py [--docs N] [--batch-size N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import ScoringConfig, TrustScoringEngine  # noqa: E402
+
+WORDS = (
+    "the government announced a new policy according to officials reported by reuters "
+    "scientists say shocking secret conspiracy miracle study shows economy growth "
+    "election results market prices climate report source reference cited"
+).split()
+
+
+def make_texts(count: int, length: int = 300) -> list:
+    """Generate random article-like texts."""
+    rng = random.Random(42)
+    return [" ".join(rng.choice(WORDS) for _ in range(length)) + "." for _ in range(count)]
+
+
+def build_engine() -> TrustScoringEngine:
+    """Fit a small model so the benchmark does not depend on the trained artifacts."""
+    texts = make_texts(200, 50)
+    labels = [i % 2 for i in range(len(texts))]
+    vectorizer = TfidfVectorizer(max_features=1000).fit(texts)
+    classifier = LogisticRegression().fit(vectorizer.transform(texts), labels)
+    return TrustScoringEngine(vectorizer, classifier, ScoringConfig(seed=0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trust scoring engine")
+    parser.add_argument("--docs", type=int, default=500, help="Number of documents to score")
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents per batch")
+    args = parser.parse_args()
+
+    engine = build_engine()
+    texts = make_texts(args.docs)
+
+    start = time.perf_counter()
+    for text in texts:
+        engine.score([text])
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), args.batch_size):
+        engine.score(texts[i:i + args.batch_size])
+    batched = time.perf_counter() - start
+
+    print(f"Documents:        {args.docs}")
+    print(f"One at a time:    {single / args.docs * 1000:.3f} ms/doc")
+    print(f"Batches of {args.batch_size:<5} {batched / args.docs * 1000:.3f} ms/doc")
+    print(f"Speedup:          {single / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
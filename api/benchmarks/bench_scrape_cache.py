@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Benchmark for the scrape cache.
+
+Fills a temporary cache with extracted articles and times lookups served by
+the memory tier, by the disk tier (a fresh process-level cache in front of
+the same file) and by the previous cache (one pretty-printed JSON file per
+URL hash), then fills the disk tier past its budget and times the cleanup.
+
+Usage:
+    python benchmarks/bench_scrape_cache.py [--articles N] [--ops N] [--disk-mb N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrape_cache import ScrapeCache  # noqa: E402
+
+WORDS = (
+    "the government announced a new policy according to officials reported by reuters "
+    "scientists say study shows economy growth election results market prices climate report"
+).split()
+
+
+def make_article(rng: random.Random, number: int) -> dict:
+    """Build extracted article data of about 5 KB of text."""
+    return {
+        "title": f"Article {number}",
+        "content": " ".join(rng.choice(WORDS) for _ in range(800)),
+        "authors": ["Jane Doe"],
+        "publish_date": "2024-05-01T00:00:00",
+        "source": "example.com",
+        "url": f"https://example.com/news/{number}",
+        "extraction_method": "newspaper",
+    }
+
+
+def timed(fn, ops: int) -> tuple:
+    """Run fn ops times and return the median and 95th percentile time per call in milliseconds."""
+    times = []
+    for _ in range(ops):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrape cache")
+    parser.add_argument("--articles", type=int, default=5000, help="Number of cached articles")
+    parser.add_argument("--ops", type=int, default=2000, help="Lookups per measurement")
+    parser.add_argument("--disk-mb", type=float, default=4, help="Disk budget for the eviction test, in MB")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cache_dir = tempfile.mkdtemp(prefix="bench-scrape-cache-")
+    path = os.path.join(cache_dir, "articles.db")
+    articles = [make_article(rng, number) for number in range(args.articles)]
+
+    cache = ScrapeCache(path)
+    legacy_dir = os.path.join(cache_dir, "legacy")
+    os.makedirs(legacy_dir)
+    start = time.perf_counter()
+    for article in articles:
+        cache.put(article["url"], article)
+    print(f"Cached {args.articles} articles in {time.perf_counter() - start:.1f} s "
+          f"({cache.disk_usage()[1] / 1e6:.1f} MB on disk)\n")
+    for article in articles:
+        with open(os.path.join(legacy_dir, hashlib.md5(article["url"].encode()).hexdigest() + ".json"), "w") as f:
+            json.dump(article, f, ensure_ascii=False, indent=2)
+
+    def legacy_get(url: str) -> dict:
+        with open(os.path.join(legacy_dir, hashlib.md5(url.encode()).hexdigest() + ".json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    urls = [article["url"] for article in articles]
+    cold = ScrapeCache(path, memory_bytes=0)
+    print(f"{'lookup':<32}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for name, get in (
+        ("memory tier", lambda: cache.get(rng.choice(urls))),
+        ("disk tier", lambda: cold.get(rng.choice(urls))),
+        ("miss", lambda: cache.get("https://example.com/missing")),
+        ("previous cache (JSON files)", lambda: legacy_get(rng.choice(urls))),
+    ):
+        p50, p95 = timed(get, args.ops)
+        print(f"{name:<32}{p50:>12.3f}{p95:>12.3f}")
+
+    budget = int(args.disk_mb * 1024 * 1024)
+    bounded = ScrapeCache(os.path.join(cache_dir, "bounded.db"), disk_bytes=budget)
+    for article in articles:
+        bounded.put(article["url"], article)
+    before = bounded.disk_usage()
+    start = time.perf_counter()
+    _, evicted = bounded.cleanup()
+    elapsed = time.perf_counter() - start
+    after = bounded.disk_usage()
+    print(f"\nCleanup with a {args.disk_mb:g} MB budget: {before[1] / 1e6:.1f} MB -> {after[1] / 1e6:.1f} MB, "
+          f"{evicted} entries evicted in {elapsed * 1000:.0f} ms")
+
+    shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    main()
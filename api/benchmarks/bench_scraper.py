@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+"""
+Benchmark for URL extraction.
+
+Serves article pages from a local stand-in for slow news sites (every
+response is delayed) and downloads, then extracts, a batch of distinct URLs
+two ways: with blocking downloads on a pool of threads, as the API did with
+one thread per request, and with the asyncio scraping engine, which keeps
+all downloads in flight and parses on a few threads. Runs offline.
+
+Usage:
+    python benchmarks/bench_scraper.py [--pages N] [--delay SECONDS] [--threads N] [--parse-workers N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Extracted articles are cached; keep them out of the API's cache
+CACHE_DIR = tempfile.mkdtemp(prefix="bench-scraper-")
+os.environ["SCRAPE_CACHE_PATH"] = os.path.join(CACHE_DIR, "articles.db")
+
+from scrape_engine import SCRAPER_PARSE_WORKERS, ScrapeEngine  # noqa: E402
+from url_scraper import FETCH_USER_AGENT, decode_html, extract_article_from_html  # noqa: E402
+
+PARAGRAPH = (
+    "<p>The city council approved the new transport budget on Tuesday after a long debate, "
+    "according to officials, who said the plan would add bus routes and repair roads across "
+    "the region over the next three years.</p>"
+)
+
+
+def page(number: int) -> bytes:
+    """Build an article page of about 10 KB."""
+    return (
+        f"<html><head><title>Article {number}</title><meta charset='utf-8'></head><body>"
+        f"<nav>Home | World | Politics</nav><article><h1>Article {number}</h1>{PARAGRAPH * 40}</article>"
+        f"<footer>Copyright</footer></body></html>"
+    ).encode()
+
+
+# Blocking HTTP client of the thread pool baseline (keep-alive pools sized for --threads in main())
+session = requests.Session()
+
+
+def download(url: str) -> Optional[str]:
+    """Download a page with the blocking HTTP client."""
+    try:
+        response = session.get(url, headers={"User-Agent": FETCH_USER_AGENT}, timeout=30)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    return decode_html(response.content, response.headers.get("Content-Type", ""))
+
+
+def download_and_extract(url: str) -> Optional[Dict[str, Any]]:
+    """Download a page with the blocking HTTP client and extract its article on the calling thread."""
+    html = download(url)
+    return extract_article_from_html(url, html)[0] if html is not None else None
+
+
+class SlowServer:
+    """
+    HTTP/1.1 keep-alive server that delays every response.
+
+    Runs in its own process, like a remote site, so it does not compete with
+    the scrapers for the interpreter lock.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._in_flight = multiprocessing.Value("i", 0)
+        self._peak = multiprocessing.Value("i", 0)
+        ports = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=self._run, args=(ports,), daemon=True)
+        self.process.start()
+        self.port = ports.get()
+
+    @property
+    def peak(self) -> int:
+        """The peak number of requests in flight since the last reset."""
+        return self._peak.value
+
+    def reset_peak(self) -> None:
+        self._peak.value = 0
+
+    def _run(self, ports: multiprocessing.Queue) -> None:
+        async def serve():
+            server = await asyncio.start_server(self._handle, "127.0.0.1", 0, backlog=4096)
+            ports.put(server.sockets[0].getsockname()[1])
+            await server.serve_forever()
+
+        asyncio.run(serve())
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                path = request.split(b" ", 2)[1].decode()
+                self._in_flight.value += 1
+                self._peak.value = max(self._peak.value, self._in_flight.value)
+                await asyncio.sleep(self.delay)
+                self._in_flight.value -= 1
+                body = page(int(path.rsplit("/", 1)[-1]))
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def stop(self) -> None:
+        self.process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark URL extraction against a slow local server")
+    parser.add_argument("--pages", type=int, default=500, help="Number of distinct pages extracted")
+    parser.add_argument("--delay", type=float, default=1.0, help="Server delay per response, in seconds")
+    parser.add_argument("--threads", type=int, default=40, help="Threads of the blocking scraper "
+                        "(40 is the size of the FastAPI thread pool)")
+    parser.add_argument("--parse-workers", type=int, default=SCRAPER_PARSE_WORKERS,
+                        help="Parse threads of the asyncio engine")
+    args = parser.parse_args()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.threads))
+
+    logging.getLogger("url-scraper").setLevel(logging.CRITICAL)
+    logging.getLogger("scrape-engine").setLevel(logging.CRITICAL)
+    server = SlowServer(args.delay)
+    base = f"http://127.0.0.1:{server.port}/article"
+    print(f"{args.pages} pages, {args.delay:.2f} s server delay\n")
+    print(f"{'scraper':<40}{'time (s)':>10}{'pages/s':>10}{'ok':>6}{'peak in flight':>16}")
+
+    def report(name: str, elapsed: float, results: list) -> None:
+        succeeded = sum(result is not None for result in results)
+        print(f"{name:<40}{elapsed:>10.2f}{args.pages / elapsed:>10.1f}{succeeded:>6}{server.peak:>16}")
+        server.reset_peak()
+
+    async def run_engine(urls: list, extract: bool) -> list:
+        engine = ScrapeEngine(max_fetches=args.pages, parse_workers=args.parse_workers)
+        try:
+            if extract:
+                return await engine.get_articles(urls)
+            return list(await asyncio.gather(*(engine.fetch(url) for url in urls)))
+        finally:
+            await engine.close()
+
+    runs = (
+        (f"download, sync {args.threads} threads", False, False),
+        ("download, asyncio", True, False),
+        (f"extract, sync {args.threads} threads", False, True),
+        (f"extract, asyncio + {args.parse_workers} parse threads", True, True),
+    )
+    for run, (name, asynchronous, extract) in enumerate(runs):
+        # Distinct URLs in every run, so none is served from the article cache
+        urls = [f"{base}/{run * args.pages + number}" for number in range(args.pages)]
+        # is_valid_url prints every URL
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if asynchronous:
+                results = asyncio.run(run_engine(urls, extract))
+            else:
+                fetch = download_and_extract if extract else download
+                with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                    results = list(pool.map(fetch, urls))
+            elapsed = time.perf_counter() - start
+        report(name, elapsed, results)
+
+    server.stop()
+    shutil.rmtree(CACHE_DIR)
+
+
+if __name__ == "__main__":
+    main()
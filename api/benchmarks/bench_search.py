@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark for the full-text search index.
+
+Indexes many synthetic analyses (Zipf-distributed words, like real text)
+spread over many users and times searches of one user's analyses for
+common, rare, multi-term and prefix queries. Both storage backends use the
+same index, so this measures either.
+
+Usage:
+    python benchmarks/bench_search.py [--analyses N] [--users N] [--ops N]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex  # noqa: E402
+
+VOCABULARY_SIZE = 50000
+WORDS_PER_ANALYSIS = 120
+
+
+def make_vocabulary(rng: random.Random) -> list:
+    """Build random pronounceable words in random order (the first ones are used most)."""
+    consonants, vowels = "bcdfghjklmnprstvwz", "aeiou"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        length = rng.randint(2, 5)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def seed(index: SearchIndex, analyses: int, users: int, rng: random.Random) -> tuple:
+    """Index the synthetic analyses and return the user IDs and the vocabulary."""
+    vocabulary = make_vocabulary(rng)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    batch = []
+    for i in range(analyses):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=WORDS_PER_ANALYSIS)
+        batch.append((str(uuid.uuid4()), rng.choice(user_ids), " ".join(words[:8]), " ".join(words)))
+        if len(batch) == 10000:
+            index.add(batch)
+            batch = []
+    index.add(batch)
+    return user_ids, vocabulary
+
+
+def timed(fn, ops: int) -> tuple:
+    """Run fn ops times and return the median and 95th percentile time per call in milliseconds."""
+    times = []
+    for _ in range(ops):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the full-text search index")
+    parser.add_argument("--analyses", type=int, default=1000000, help="Number of indexed analyses")
+    parser.add_argument("--users", type=int, default=10000, help="Number of users owning them")
+    parser.add_argument("--ops", type=int, default=200, help="Searches per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    db_dir = tempfile.mkdtemp(prefix="bench-search-")
+    index = SearchIndex(os.path.join(db_dir, "search.db"))
+
+    start = time.perf_counter()
+    user_ids, vocabulary = seed(index, args.analyses, args.users, rng)
+    size = os.path.getsize(index.path) + os.path.getsize(index.path + "-wal")
+    print(f"Indexed {args.analyses} analyses of {args.users} users in {time.perf_counter() - start:.1f} s "
+          f"({size / 1e6:.0f} MB)\n")
+
+    queries = (
+        ("most common term", lambda: vocabulary[0]),
+        ("common term", lambda: rng.choice(vocabulary[:100])),
+        ("rare term", lambda: rng.choice(vocabulary[10000:])),
+        ("two terms", lambda: " ".join(rng.sample(vocabulary[:1000], 2))),
+        ("prefix", lambda: rng.choice(vocabulary[:1000])[:3] + "*"),
+    )
+    print(f"{'query':<20}{'matches':>10}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for name, make_query in queries:
+        matches = []
+
+        def search():
+            total, _ = index.search(rng.choice(user_ids), make_query(), limit=20)
+            matches.append(total)
+
+        p50, p95 = timed(search, args.ops)
+        print(f"{name:<20}{sum(matches) / len(matches):>10.1f}{p50:>12.2f}{p95:>12.2f}")
+
+    shutil.rmtree(db_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Benchmark for the similar-article index.
+
+Indexes many synthetic articles built from the vocabulary of the production
+vectorizer (model/tfidf_vectorizer.pkl), then times nearest-neighbor lookups
+for near-copies of indexed articles and for unrelated texts, and compares
+them with a brute-force scan over the full (unpruned) vectors.
+
+Usage:
+    python benchmarks/bench_similarity.py [--analyses N] [--ops N]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import joblib
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from similarity_index import SimilarityIndex  # noqa: E402
+
+WORDS_PER_ARTICLE = 300
+
+
+def timed(fn, ops: int) -> tuple:
+    """Run fn ops times and return the median and 95th percentile time per call in milliseconds."""
+    times = []
+    for _ in range(ops):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the similar-article index")
+    parser.add_argument("--analyses", type=int, default=100000, help="Number of indexed articles")
+    parser.add_argument("--ops", type=int, default=200, help="Lookups per measurement")
+    args = parser.parse_args()
+
+    vectorizer = joblib.load(os.path.join(os.path.dirname(API_DIR), "model", "tfidf_vectorizer.pkl"))
+    vocabulary = sorted(vectorizer.vocabulary_)
+    rng = random.Random(0)
+
+    def article():
+        return " ".join(rng.choices(vocabulary, k=WORDS_PER_ARTICLE))
+
+    db_dir = tempfile.mkdtemp(prefix="bench-similarity-")
+    index = SimilarityIndex(os.path.join(db_dir, "similarity.db"), vectorizer)
+    texts = [article() for _ in range(args.analyses)]
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), 1000):
+        index.add_many([(str(uuid.uuid4()), "bench-user", text) for text in texts[i:i + 1000]])
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    len(index)
+    print(f"Indexed {args.analyses} articles in {added:.1f} s, loaded in {time.perf_counter() - start:.1f} s\n")
+
+    def near_copy():
+        words = rng.choice(texts).split()
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        return " ".join(words)
+
+    full = vectorizer.transform(texts[:min(len(texts), 20000)])
+
+    print(f"{'lookup':<28}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for name, make_text in (("near-copy, top 5", near_copy), ("unrelated text, top 5", article)):
+        p50, p95 = timed(lambda: index.nearest(vectorizer.transform([make_text()]), k=5), args.ops)
+        print(f"{name:<28}{p50:>12.2f}{p95:>12.2f}")
+    p50, p95 = timed(lambda: (full @ vectorizer.transform([article()]).T).toarray(), args.ops)
+    print(f"{f'brute force ({full.shape[0]} rows)':<28}{p50:>12.2f}{p95:>12.2f}")
+
+    hits = 0
+    for _ in range(args.ops):
+        text = rng.choice(texts)
+        words = text.split()
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+        best = index.nearest(vectorizer.transform([" ".join(words)]), k=1)
+        hits += bool(best) and best[0][2] >= 0.95
+    print(f"\nNear-copies found above 0.95 similarity: {hits}/{args.ops}")
+
+    shutil.rmtree(db_dir)
+
+
+if __name__ == "__main__":
+    main()
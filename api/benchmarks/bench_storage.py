@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Benchmark for the storage backends.
+
+Seeds a temporary database with many analyses, migrates it to SQLite and
+times the operations used on the request path against both backends.
+
+Usage:
+    python benchmarks/bench_storage.py [--analyses N] [--users N] [--ops N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_store import JsonStore  # noqa: E402
+from sqlite_store import SqliteStore  # noqa: E402
+
+
+def make_analysis(user_id: str, created_at: datetime) -> dict:
+    """Build an analysis record like the ones created by /trust-score."""
+    return {
+        "user_id": user_id,
+        "content_type": "text",
+        "content": "Lorem ipsum dolor sit amet " * 20,
+        "title": "Lorem ipsum dolor sit amet...",
+        "url": None,
+        "prediction": "REAL",
+        "confidence": 0.87,
+        "trust_score": 72,
+        "trust_level": "High Trust",
+        "factors": {"source_credibility": 70, "content_analysis": 85,
+                    "language_analysis": 60, "fact_verification": 75},
+        "details": {"word_count": 120, "has_citations": 1},
+        "created_at": created_at.isoformat()
+    }
+
+
+def seed(db_dir: str, analyses: int, users: int) -> list:
+    """Write the JSON files and return the user IDs."""
+    rng = random.Random(0)
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    start = datetime(2025, 1, 1)
+    records = {
+        str(uuid.uuid4()): make_analysis(rng.choice(user_ids), start + timedelta(seconds=i))
+        for i in range(analyses)
+    }
+    user_records = {
+        user_id: {"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x",
+                  "full_name": f"User {i}", "created_at": start.isoformat(), "last_login": None,
+                  "is_active": True}
+        for i, user_id in enumerate(user_ids)
+    }
+    for name, data in (("users.json", user_records), ("analyses.json", records), ("reset_tokens.json", {})):
+        with open(os.path.join(db_dir, name), "w") as f:
+            json.dump(data, f, indent=2)
+    return user_ids
+
+
+def timed(fn, ops: int) -> float:
+    """Run fn ops times and return the mean time per call in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - start) / ops * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the storage backends")
+    parser.add_argument("--analyses", type=int, default=100000, help="Number of seeded analyses")
+    parser.add_argument("--users", type=int, default=1000, help="Number of seeded users")
+    parser.add_argument("--ops", type=int, default=5, help="Operations per measurement")
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp(prefix="bench-storage-")
+    user_ids = seed(db_dir, args.analyses, args.users)
+
+    start = time.perf_counter()
+    sqlite_store = SqliteStore(os.path.join(db_dir, "trustverify.db"))
+    sqlite_store.migrate_from_json(db_dir)
+    print(f"Migrated {args.analyses} analyses to SQLite in {time.perf_counter() - start:.1f} s\n")
+
+    json_store = JsonStore(db_dir)
+    analysis_id = next(iter(sqlite_store.get_analyses_by_user(user_ids[0])))["id"]
+
+    print(f"{'operation':<24}{'json (ms)':>12}{'sqlite (ms)':>14}")
+    for name, op in (
+        ("create_analysis", lambda s: s.insert_analysis(str(uuid.uuid4()), make_analysis(user_ids[0], datetime.now()))),
+        ("get_analysis_by_id", lambda s: s.get_analysis(analysis_id)),
+        ("get_analyses_by_user", lambda s: s.get_analyses_by_user(user_ids[1])),
+        ("get_user_by_email", lambda s: s.get_user_by_email("user7@example.com")),
+    ):
+        json_ms = timed(lambda: op(json_store), args.ops)
+        sqlite_ms = timed(lambda: op(sqlite_store), args.ops * 20)
+        print(f"{name:<24}{json_ms:>12.2f}{sqlite_ms:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Multi-process stress test for the storage backends.
+
+Starts several worker processes that share one database directory, the way
+uvicorn --workers N does, and has them register users, race for the same
+email, create analyses and reset tokens and record logins concurrently. The
+parent then reopens the database and checks that no update was lost and that
+the profile aggregates and the search index match the stored analyses.
+
+Usage:
+    python benchmarks/stress_workers.py [--backend json|sqlite] [--workers N] [--users N] [--analyses N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+SHARED_EMAIL = "shared@example.com"
+
+
+def configure(db_dir: str, backend: str) -> None:
+    """Point the database module at the test directory (before importing it)."""
+    os.environ["DB_DIR"] = db_dir
+    os.environ["DB_BACKEND"] = backend
+    # Small segments and frequent compactions so compaction races with appends
+    os.environ["ANALYSIS_SEGMENT_MAX_BYTES"] = str(64 * 1024)
+    os.environ["ANALYSIS_COMPACTION_INTERVAL"] = "0.2"
+    os.environ["LAST_LOGIN_FLUSH_INTERVAL"] = "0.1"
+    os.environ["ANALYSIS_FLUSH_INTERVAL"] = "0.05"
+    os.environ["ANALYSIS_FLUSH_BATCH"] = "50"
+
+
+def worker(worker_id: int, db_dir: str, backend: str, users: int, analyses: int, results) -> None:
+    """Run one worker process and report what it wrote."""
+    configure(db_dir, backend)
+    import database
+
+    user_ids, analysis_ids, tokens = [], [], []
+    won_shared_email = False
+
+    for i in range(users):
+        user = database.create_user(
+            f"user{worker_id}-{i}@example.com", f"user{worker_id}-{i}", None,
+            f"User {worker_id}-{i}", hashed_password="not-a-real-hash"
+        )
+        user_ids.append(user["id"])
+        tokens.append(database.create_password_reset_token(user["email"]))
+        database.update_user_last_login(user["id"])
+
+        if i == users // 2:
+            try:
+                database.create_user(SHARED_EMAIL, "shared", None, "Shared", hashed_password="not-a-real-hash")
+                won_shared_email = True
+            except ValueError:
+                pass
+
+    for i in range(analyses):
+        analysis = database.create_analysis(
+            user_ids[i % len(user_ids)], "text", f"Article {worker_id}-{i} " * 20, None, None,
+            "REAL", 0.9, 75, "High Trust", {"source_credibility": 80}, {"processing_time": 0.01}
+        )
+        analysis_ids.append(analysis["id"])
+
+    database.flush_last_logins()
+    database.flush_analyses()
+    results.put((user_ids, analysis_ids, tokens, won_shared_email))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--users", type=int, default=25, help="users registered per worker")
+    parser.add_argument("--analyses", type=int, default=500, help="analyses created per worker")
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp(prefix="trustverify-stress-")
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(i, db_dir, args.backend, args.users, args.analyses, results))
+        for i in range(args.workers)
+    ]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    if any(process.exitcode != 0 for process in processes):
+        print(f"FAIL: a worker crashed (database left in {db_dir})")
+        sys.exit(1)
+
+    configure(db_dir, args.backend)
+    import database
+
+    stored_users = database.get_users()
+    stored_analyses = database.get_analyses()
+    errors = []
+
+    expected_users = [user_id for report in reports for user_id in report[0]]
+    missing_users = [user_id for user_id in expected_users if user_id not in stored_users]
+    if missing_users:
+        errors.append(f"{len(missing_users)} of {len(expected_users)} users lost")
+    if sum(1 for user in stored_users.values() if user["email"] == SHARED_EMAIL) != 1:
+        errors.append(f"{SHARED_EMAIL} registered more than once")
+    if sum(report[3] for report in reports) != 1:
+        errors.append(f"{sum(report[3] for report in reports)} workers registered {SHARED_EMAIL}")
+    never_logged_in = [user_id for user_id in expected_users if not stored_users.get(user_id, {}).get("last_login")]
+    if never_logged_in:
+        errors.append(f"{len(never_logged_in)} last_login updates lost")
+
+    expected_analyses = [analysis_id for report in reports for analysis_id in report[1]]
+    missing_analyses = [analysis_id for analysis_id in expected_analyses if analysis_id not in stored_analyses]
+    if missing_analyses:
+        errors.append(f"{len(missing_analyses)} of {len(expected_analyses)} analyses lost")
+    by_user = sum(len(database.get_analyses_by_user(user_id)) for user_id in expected_users)
+    if by_user != len(expected_analyses):
+        errors.append(f"per-user lookups returned {by_user} analyses, expected {len(expected_analyses)}")
+
+    searchable = sum(database.search_analyses(user_id, "article", limit=1)["total"] for user_id in expected_users)
+    if searchable != len(expected_analyses):
+        errors.append(f"search index holds {searchable} analyses, expected {len(expected_analyses)}")
+
+    stale_profiles = database.check_profile_stats()
+    if stale_profiles:
+        errors.append(f"profile aggregates of {len(stale_profiles)} users differ from their analyses")
+
+    invalid_tokens = [token for report in reports for token in report[2] if not database.verify_reset_token(token)]
+    if invalid_tokens:
+        errors.append(f"{len(invalid_tokens)} reset tokens lost")
+
+    print(f"Backend: {args.backend}, {args.workers} workers, {elapsed:.1f} s")
+    print(f"Users: {len(stored_users)} stored, {len(expected_users) + 1} expected")
+    print(f"Analyses: {len(stored_analyses)} stored, {len(expected_analyses)} expected")
+    if errors:
+        for error in errors:
+            print(f"FAIL: {error}")
+        print(f"Database left in {db_dir} for inspection")
+        sys.exit(1)
+    print("OK: no lost updates")
+    shutil.rmtree(db_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+Check the per-user profile aggregates.
+
+Profile aggregates (analysis count, trust score sum and recent analyses) are
+maintained incrementally as analyses are created. This command recomputes them
+from the stored analyses and reports users whose aggregates differ; with
+--repair it rebuilds them from scratch.
+
+Usage:
+    python check_profiles.py [--repair]
+"""
+
+import argparse
+import sys
+
+from database import DB_BACKEND, check_profile_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the per-user profile aggregates")
+    parser.add_argument("--repair", action="store_true", help="Rebuild the aggregates if they differ")
+    args = parser.parse_args()
+
+    mismatched = check_profile_stats(repair=args.repair)
+
+    if not mismatched:
+        print(f"Profile aggregates are consistent ({DB_BACKEND} backend).")
+        return
+    print(f"Profile aggregates differ for {len(mismatched)} user(s):")
+    for user_id in mismatched:
+        print(f"  {user_id}")
+    if args.repair:
+        print("Rebuilt the aggregates from the stored analyses.")
+    else:
+        print("Run with --repair to rebuild them.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Content-addressed storage of analysis content for the Fake News Detector API.
+
+Article text is stored once per distinct content, zlib-compressed, under the
+SHA-256 hash of the text. Analyses reference the content by hash, so an
+article analyzed by many users is stored only once.
+"""
+
+import hashlib
+import os
+import zlib
+from typing import Optional
+
+from file_lock import atomic_write
+
+# zlib compression level (1 = fastest, 9 = smallest)
+CONTENT_COMPRESSION_LEVEL = int(os.environ.get("CONTENT_COMPRESSION_LEVEL", "6"))
+
+
+def content_hash(content: str) -> str:
+    """
+    Get the hash under which content is stored.
+
+    Args:
+        content: The content
+
+    Returns:
+        str: The hex SHA-256 digest of the UTF-8 encoded content
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def compress_content(content: str) -> bytes:
+    """Compress content for storage."""
+    return zlib.compress(content.encode("utf-8"), CONTENT_COMPRESSION_LEVEL)
+
+
+def decompress_content(data: bytes) -> str:
+    """Decompress stored content."""
+    return zlib.decompress(data).decode("utf-8")
+
+
+class BlobStore:
+    """
+    Directory of compressed content blobs, one file per hash.
+
+    Blobs are spread over 256 subdirectories by the first two hex digits of
+    their hash. A blob is written once (atomically) and never modified, so it
+    can be read without locking and shared by several processes.
+    """
+
+    def __init__(self, blob_dir: str):
+        """
+        Initialize the blob store.
+
+        Args:
+            blob_dir: The directory holding the blobs
+        """
+        self.blob_dir = blob_dir
+        os.makedirs(blob_dir, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest + ".z")
+
+    def put(self, content: str) -> str:
+        """
+        Store content unless it is already stored.
+
+        Args:
+            content: The content
+
+        Returns:
+            str: The hash of the content
+        """
+        digest = content_hash(content)
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, compress_content(content))
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """
+        Load content by hash.
+
+        Args:
+            digest: The hash of the content
+
+        Returns:
+            str: The content, or None if not found
+        """
+        try:
+            with open(self._path(digest), "rb") as f:
+                return decompress_content(f.read())
+        except FileNotFoundError:
+            return None
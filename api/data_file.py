@@ -0,0 +1,108 @@
+"""
+Data file reloading for the Fake News Detector API.
+
+Indexes built from a data file (domain reputations, fact-checks) derive
+from ReloadableIndex, which loads the file at startup and rebuilds the index
+in a background thread when the file's modification time changes, so edits
+are picked up without a restart and without holding up lookups.
+"""
+
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+
+class ReloadableIndex(ABC):
+    """
+    Base of the indexes built from a data file and rebuilt when it changes.
+
+    Subclasses implement _load(), which builds new index data from the file,
+    and _swap(), which installs it. The new data is built aside (in a
+    background thread when the file changes) and swapped in, so concurrent
+    lookups are served by the old index until the new one is ready.
+    """
+
+    # Logger and wording of the load messages, set by subclasses
+    logger = logging.getLogger("data-file")
+    file_description = "data file"
+    entry_name = "entries"
+
+    def __init__(self, path: str, check_interval: float):
+        """
+        Initialize the index and load the data file.
+
+        Args:
+            path: The data file
+            check_interval: How often (in seconds) maybe_reload() checks the file for changes
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        # Held while a background reload is in progress
+        self._reloading = threading.Lock()
+        self.reload()
+
+    @abstractmethod
+    def _load(self) -> Any:
+        """
+        Build new index data from the data file.
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+
+    @abstractmethod
+    def _swap(self, data: Any) -> int:
+        """
+        Install index data built by _load().
+
+        Returns:
+            int: The number of entries loaded
+        """
+
+    def reload(self) -> bool:
+        """
+        Reload the index from the data file.
+
+        Returns:
+            bool: True if the index was reloaded, False if the file could not be read
+        """
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+                data = self._load()
+            except OSError as e:
+                self.logger.error(f"Could not load {self.file_description} {self.path}: {e}")
+                return False
+            size = self._swap(data)
+            self._mtime = mtime
+            self._last_check = time.monotonic()
+        self.logger.info(f"Loaded {size} {self.entry_name} from {self.path}")
+        return True
+
+    def maybe_reload(self) -> None:
+        """
+        Start reloading the index in a background thread if the data file
+        changed since the last check (and no reload is in progress).
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime and self._reloading.acquire(blocking=False):
+            threading.Thread(target=self._reload_in_background, daemon=True).start()
+
+    def _reload_in_background(self) -> None:
+        try:
+            self.reload()
+        finally:
+            self._reloading.release()
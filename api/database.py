@@ -1,69 +1,347 @@
 """
 Database module for the Fake News Detector API.
 
-This module provides functions for interacting with the database.
+This module provides functions for interacting with the database. Records are
+persisted by a storage backend selected with the DB_BACKEND environment
+variable: "json" (default, JSON files in DB_DIR) or "sqlite" (a single SQLite
+database at SQLITE_PATH).
 """
 
+import atexit
 import json
 import os
+import threading
+import time
 import uuid
 import secrets
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple
 
-from passlib.context import CryptContext
+from passwords import get_password_hash
+from db_paths import DB_DIR, SQLITE_PATH
 
-# Configure password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Storage backend ("json" or "sqlite")
+DB_BACKEND = os.environ.get("DB_BACKEND", "json").lower()
 
-# Database paths
-DB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db")
-USERS_FILE = os.path.join(DB_DIR, "users.json")
-ANALYSES_FILE = os.path.join(DB_DIR, "analyses.json")
-RESET_TOKENS_FILE = os.path.join(DB_DIR, "reset_tokens.json")
+# How often (in seconds) buffered last_login updates are written to disk
+LAST_LOGIN_FLUSH_INTERVAL = float(os.environ.get("LAST_LOGIN_FLUSH_INTERVAL", "60"))
 
-# Create database directory if it doesn't exist
-os.makedirs(DB_DIR, exist_ok=True)
+# How new analyses are persisted: "async" (queued and written in batches by a
+# background thread) or "sync" (written before create_analysis returns)
+ANALYSIS_DURABILITY = os.environ.get("ANALYSIS_DURABILITY", "async").lower()
 
-# Initialize database files if they don't exist
-if not os.path.exists(USERS_FILE):
-    with open(USERS_FILE, "w") as f:
-        json.dump({}, f)
+# How often (in seconds) queued analyses are written to disk
+ANALYSIS_FLUSH_INTERVAL = float(os.environ.get("ANALYSIS_FLUSH_INTERVAL", "0.5"))
 
-if not os.path.exists(ANALYSES_FILE):
-    with open(ANALYSES_FILE, "w") as f:
-        json.dump({}, f)
+# Maximum number of analyses written in one batch; a full batch is written
+# without waiting for the flush interval
+ANALYSIS_FLUSH_BATCH = int(os.environ.get("ANALYSIS_FLUSH_BATCH", "500"))
 
-if not os.path.exists(RESET_TOKENS_FILE):
-    with open(RESET_TOKENS_FILE, "w") as f:
-        json.dump({}, f)
+# Maximum number of queued analyses; when the queue is full, analyses are
+# written synchronously
+ANALYSIS_QUEUE_SIZE = int(os.environ.get("ANALYSIS_QUEUE_SIZE", "10000"))
 
+# Number of failed attempts at writing a batch after which its analyses are
+# written one by one, and those that still fail moved to the dead-letter file
+ANALYSIS_WRITE_RETRIES = int(os.environ.get("ANALYSIS_WRITE_RETRIES", "5"))
+ANALYSIS_DEAD_LETTER_FILE = os.environ.get(
+    "ANALYSIS_DEAD_LETTER_FILE", os.path.join(DB_DIR, "analyses-dead-letter.jsonl")
+)
 
-def get_password_hash(password: str) -> str:
+
+def create_store(backend: str = DB_BACKEND):
     """
-    Hash a password.
+    Create the storage backend.
 
     Args:
-        password: The password to hash
+        backend: The backend name ("json" or "sqlite")
 
     Returns:
-        str: The hashed password
+        The storage backend
     """
-    return pwd_context.hash(password)
+    if backend == "sqlite":
+        from sqlite_store import SqliteStore
+        return SqliteStore(SQLITE_PATH)
+    if backend == "json":
+        from json_store import JsonStore
+        return JsonStore(DB_DIR)
+    raise ValueError(f"Unknown database backend: {backend}")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+class LastLoginBuffer:
     """
-    Verify a password against a hash.
+    Buffers last_login updates in memory.
 
-    Args:
-        plain_password: The plain text password
-        hashed_password: The hashed password
+    Repeated logins are coalesced and written to the store in one batch by a
+    background thread every LAST_LOGIN_FLUSH_INTERVAL seconds, so the
+    authentication path does no disk writes.
+    """
 
-    Returns:
-        bool: True if the password matches, False otherwise
+    def __init__(self, store):
+        """
+        Initialize the buffer.
+
+        Args:
+            store: The storage backend to flush to
+        """
+        self.store = store
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+        self._flusher: Optional[threading.Thread] = None
+
+    def record(self, user_id: str) -> None:
+        """
+        Buffer a last_login update for a user.
+
+        Args:
+            user_id: The ID of the user
+        """
+        with self._lock:
+            self._pending[user_id] = datetime.now().isoformat()
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+
+    def apply(self, user: Optional[Dict[str, Any]], user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Apply a buffered last_login to a user record.
+
+        Args:
+            user: The user record (modified in place)
+            user_id: The ID of the user (default: user["id"])
+
+        Returns:
+            Dict: The user record
+        """
+        if user is not None:
+            last_login = self._pending.get(user_id or user["id"])
+            if last_login:
+                user["last_login"] = last_login
+        return user
+
+    def flush(self) -> None:
+        """Write buffered last_login updates to the store."""
+        # Wait for a flush in progress, so updates are on disk when this returns
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if pending:
+                try:
+                    self.store.set_last_logins(pending)
+                except Exception:
+                    # Put the updates back unless newer ones arrived meanwhile
+                    with self._lock:
+                        for user_id, last_login in pending.items():
+                            self._pending.setdefault(user_id, last_login)
+                    raise
+
+    def _flush_loop(self) -> None:
+        event = threading.Event()
+        while not event.wait(LAST_LOGIN_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing last_login updates: {e}")
+
+
+class AnalysisWriteBuffer:
+    """
+    Write-behind queue for new analyses.
+
+    Analyses are queued in memory and written to the store in batches by a
+    background thread every ANALYSIS_FLUSH_INTERVAL seconds (or as soon as a
+    batch of ANALYSIS_FLUSH_BATCH is queued), so the scoring path does no disk
+    writes. Queued analyses are visible to readers until they are written.
+    An analysis is dequeued only after its batch was written, so a failed
+    batch is retried on the next flush. After ANALYSIS_WRITE_RETRIES failed
+    attempts, the batch is written one analysis at a time and the analyses
+    that still fail are appended to ANALYSIS_DEAD_LETTER_FILE and dequeued,
+    so one bad record cannot hold up the queue.
+    """
+
+    def __init__(self, store):
+        """
+        Initialize the buffer.
+
+        Args:
+            store: The storage backend to flush to
+        """
+        self.store = store
+        self._lock = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._flusher: Optional[threading.Thread] = None
+        self._stats = {"queued": 0, "written": 0, "batches": 0, "overflows": 0, "failures": 0, "dead_lettered": 0}
+        # Failed attempts at writing the batch at the head of the queue
+        self._attempts = 0
+        self._last_flush: Optional[str] = None
+
+    def submit(self, analysis_id: str, analysis: Dict[str, Any]) -> bool:
+        """
+        Queue an analysis for writing.
+
+        Args:
+            analysis_id: The ID of the analysis
+            analysis: The analysis, with its content
+
+        Returns:
+            bool: True if queued, False if the queue is full
+        """
+        with self._lock:
+            if len(self._pending) >= ANALYSIS_QUEUE_SIZE:
+                self._stats["overflows"] += 1
+                return False
+            self._pending[analysis_id] = analysis
+            self._stats["queued"] += 1
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+            elif len(self._pending) >= ANALYSIS_FLUSH_BATCH:
+                self._lock.notify()
+        return True
+
+    def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a queued analysis (with its ID), or None."""
+        with self._lock:
+            analysis = self._pending.get(analysis_id)
+            return {**analysis, "id": analysis_id} if analysis is not None else None
+
+    def pending(self, user_id: Optional[str] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Get copies of the queued analyses (with their IDs).
+
+        Args:
+            user_id: Only return the analyses of this user (default: all)
+
+        Returns:
+            List: (analysis_id, analysis) pairs, oldest first
+        """
+        with self._lock:
+            return [
+                (analysis_id, {**analysis, "id": analysis_id}) for analysis_id, analysis in self._pending.items()
+                if user_id is None or analysis["user_id"] == user_id
+            ]
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Keep queued analyses from being written for the duration of a with block."""
+        with self._flush_lock:
+            yield
+
+    def flush(self) -> None:
+        """Write all queued analyses to the store."""
+        # Wait for a flush in progress, so analyses are on disk when this returns
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = list(self._pending.items())[:ANALYSIS_FLUSH_BATCH]
+                if not batch:
+                    return
+                try:
+                    _write_analyses(self.store, batch)
+                    written = len(batch)
+                except Exception:
+                    with self._lock:
+                        self._stats["failures"] += 1
+                        self._attempts += 1
+                        if self._attempts < ANALYSIS_WRITE_RETRIES:
+                            raise
+                    written = self._write_one_by_one(batch)
+                with self._lock:
+                    for analysis_id, _ in batch:
+                        del self._pending[analysis_id]
+                    self._attempts = 0
+                    self._stats["written"] += written
+                    self._stats["dead_lettered"] += len(batch) - written
+                    self._stats["batches"] += 1
+                    self._last_flush = datetime.now().isoformat()
+
+    def _write_one_by_one(self, batch: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Write the analyses of a failing batch separately, moving those that
+        fail to the dead-letter file.
+
+        Returns:
+            int: The number of analyses written to the store
+
+        Raises:
+            OSError: If the dead-letter file cannot be written (the batch then stays queued)
+        """
+        failed = []
+        for analysis_id, analysis in batch:
+            try:
+                _write_analyses(self.store, [(analysis_id, analysis)])
+            except Exception as e:
+                failed.append(json.dumps({"id": analysis_id, **analysis, "error": str(e)}, ensure_ascii=False))
+        if failed:
+            with open(ANALYSIS_DEAD_LETTER_FILE, "a", encoding="utf-8") as f:
+                f.write("\n".join(failed) + "\n")
+            print(f"Moved {len(failed)} analyses that could not be written to {ANALYSIS_DEAD_LETTER_FILE}")
+        return len(batch) - len(failed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the queue length and write counters."""
+        with self._lock:
+            return {
+                "durability": ANALYSIS_DURABILITY,
+                "pending": len(self._pending),
+                **self._stats,
+                "last_flush": self._last_flush,
+            }
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._lock:
+                if len(self._pending) < ANALYSIS_FLUSH_BATCH:
+                    self._lock.wait(ANALYSIS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing queued analyses: {e}")
+                time.sleep(ANALYSIS_FLUSH_INTERVAL)
+
+
+# Callbacks run with every batch of written analyses (see on_analyses_written())
+_write_listeners: List[Callable[[List[Tuple[str, Dict[str, Any]]]], None]] = []
+
+
+def _write_analyses(store, analyses: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """
+    Write analyses to the store, storing their content separately, add them
+    to the search index and pass them to the write listeners.
+
+    Args:
+        store: The storage backend
+        analyses: (analysis_id, analysis) pairs, the analyses with their content
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    records = []
+    for analysis_id, analysis in analyses:
+        record = {
+            ("content_hash" if key == "content" else key): (store.put_content(value) if key == "content" else value)
+            for key, value in analysis.items()
+        }
+        records.append((analysis_id, record))
+    store.insert_analyses(records)
+    store.index_analyses(
+        (analysis_id, analysis["user_id"], analysis.get("title"), analysis["content"])
+        for analysis_id, analysis in analyses
+    )
+    for listener in _write_listeners:
+        try:
+            listener(analyses)
+        except Exception as e:
+            # The batch is written: failing it would write it again
+            print(f"Error in analysis write listener: {e}")
+
+
+_store = create_store()
+_last_logins = LastLoginBuffer(_store)
+_analysis_writes = AnalysisWriteBuffer(_store)
+atexit.register(_last_logins.flush)
+atexit.register(_analysis_writes.flush)
 
 
 def get_users() -> Dict[str, Dict[str, Any]]:
@@ -73,8 +351,10 @@ def get_users() -> Dict[str, Dict[str, Any]]:
     Returns:
         Dict: The users
     """
-    with open(USERS_FILE, "r") as f:
-        return json.load(f)
+    users = _store.get_users()
+    for user_id, user in users.items():
+        _last_logins.apply(user, user_id)
+    return users
 
 
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
@@ -87,12 +367,7 @@ def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dict: The user, or None if not found
     """
-    users = get_users()
-    for user_id, user in users.items():
-        if user["email"] == email:
-            user["id"] = user_id
-            return user
-    return None
+    return _last_logins.apply(_store.get_user_by_email(email))
 
 
 def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
@@ -105,41 +380,41 @@ def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dict: The user, or None if not found
     """
-    users = get_users()
-    if user_id in users:
-        user = users[user_id]
-        user["id"] = user_id
-        return user
-    return None
+    return _last_logins.apply(_store.get_user_by_id(user_id))
 
 
-def create_user(email: str, username: str, password: str, full_name: str, is_google_user: bool = False) -> Dict[str, Any]:
+def create_user(
+    email: str,
+    username: str,
+    password: Optional[str],
+    full_name: str,
+    is_google_user: bool = False,
+    hashed_password: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Create a new user.
 
     Args:
         email: The email of the user
         username: The username of the user
-        password: The password of the user
+        password: The password of the user (ignored if hashed_password is given)
         full_name: The full name of the user
         is_google_user: Whether the user is a Google user (default: False)
+        hashed_password: The already hashed password (default: hash password)
 
     Returns:
         Dict: The created user
     """
-    users = get_users()
-
     # Check if email already exists
-    for user in users.values():
-        if user["email"] == email:
-            raise ValueError("Email already registered")
+    if get_user_by_email(email):
+        raise ValueError("Email already registered")
 
     # Create user
     user_id = str(uuid.uuid4())
     user = {
         "email": email,
         "username": username,
-        "hashed_password": get_password_hash(password),
+        "hashed_password": hashed_password or get_password_hash(password),
         "full_name": full_name,
         "is_google_user": is_google_user,
         "created_at": datetime.now().isoformat(),
@@ -148,81 +423,170 @@ def create_user(email: str, username: str, password: str, full_name: str, is_goo
         "is_admin": False  # Default to non-admin
     }
 
-    # Save user
-    users[user_id] = user
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f, indent=2)
+    # Save user (the store re-checks the email atomically)
+    _store.insert_user(user_id, user)
 
     # Return user with ID
     user["id"] = user_id
     return user
 
 
+def get_user_revision(user_id: str) -> Optional[int]:
+    """
+    Get the revision number of a user record.
+
+    The revision changes whenever the user record changes, except for
+    last_login updates.
+
+    Args:
+        user_id: The ID of the user
+
+    Returns:
+        int: The revision, or None if the user does not exist
+    """
+    return _store.get_user_revision(user_id)
+
+
 def update_user_last_login(user_id: str) -> None:
     """
     Update a user's last login time.
 
+    The update is buffered in memory and written to disk periodically
+    (see LAST_LOGIN_FLUSH_INTERVAL), so the request path does no disk writes.
+
     Args:
         user_id: The ID of the user
     """
-    users = get_users()
-    if user_id in users:
-        users[user_id]["last_login"] = datetime.now().isoformat()
-        with open(USERS_FILE, "w") as f:
-            json.dump(users, f, indent=2)
+    _last_logins.record(user_id)
+
+
+def flush_last_logins() -> None:
+    """
+    Write buffered last_login updates to disk.
+    """
+    _last_logins.flush()
 
 
-def get_analyses() -> Dict[str, Dict[str, Any]]:
+def load_content(analysis: Optional[Dict[str, Any]], include_content: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Resolve the content of an analysis.
+
+    Analysis content is stored once per distinct text, compressed, and
+    referenced by hash; it is only loaded and decompressed when needed.
+
+    Args:
+        analysis: The analysis as stored (modified in place)
+        include_content: Whether to load the content (default: True);
+            if False, content is set to None
+
+    Returns:
+        Dict: The analysis, with content instead of content_hash
+    """
+    if analysis is not None:
+        digest = analysis.pop("content_hash", None)
+        if digest:
+            analysis["content"] = _store.get_content(digest) if include_content else None
+    return analysis
+
+
+def get_analyses(include_content: bool = False) -> Dict[str, Dict[str, Any]]:
     """
     Get all analyses.
 
+    Args:
+        include_content: Whether to load the content of each analysis (default: False)
+
     Returns:
         Dict: The analyses
     """
-    with open(ANALYSES_FILE, "r") as f:
-        return json.load(f)
+    pending = _analysis_writes.pending()
+    analyses = _store.get_analyses()
+    for analysis in analyses.values():
+        load_content(analysis, include_content)
+    for analysis_id, analysis in pending:
+        del analysis["id"]
+        if not include_content:
+            analysis["content"] = None
+        analyses.setdefault(analysis_id, analysis)
+    return analyses
+
+
+def iter_analyses(
+    include_content: bool = True,
+    user_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    prediction: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the stored analyses, one at a time.
+
+    Queued analyses are not included; call flush_analyses() first to include them.
+
+    Args:
+        include_content: Whether to load the content of each analysis (default: True)
+        user_id: Only the analyses of this user
+        start: Only analyses created at or after this time
+        end: Only analyses created before this time
+        prediction: Only analyses with this prediction ("REAL" or "FAKE")
+
+    Returns:
+        Iterator: The analyses (with their IDs)
+    """
+    def iso(value: Optional[datetime]) -> Optional[str]:
+        # Creation times are stored as naive local ISO strings
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value.isoformat() if value is not None else None
+
+    analyses = _store.iter_analyses(user_id=user_id, start=iso(start), end=iso(end), prediction=prediction)
+    for analysis in analyses:
+        yield load_content(analysis, include_content)
 
 
-def get_analysis_by_id(analysis_id: str) -> Optional[Dict[str, Any]]:
+def get_analysis_by_id(analysis_id: str, include_content: bool = True) -> Optional[Dict[str, Any]]:
     """
     Get an analysis by ID.
 
     Args:
         analysis_id: The ID of the analysis
+        include_content: Whether to load the content (default: True)
 
     Returns:
         Dict: The analysis, or None if not found
     """
-    analyses = get_analyses()
-    if analysis_id in analyses:
-        analysis = analyses[analysis_id]
-        analysis["id"] = analysis_id
+    analysis = _analysis_writes.get(analysis_id)
+    if analysis is not None:
+        if not include_content:
+            analysis["content"] = None
         return analysis
-    return None
+    return load_content(_store.get_analysis(analysis_id), include_content)
 
 
-def get_analyses_by_user(user_id: str) -> List[Dict[str, Any]]:
+def get_analyses_by_user(user_id: str, include_content: bool = True) -> List[Dict[str, Any]]:
     """
     Get all analyses for a user.
 
     Args:
         user_id: The ID of the user
+        include_content: Whether to load the content of each analysis (default: True)
 
     Returns:
-        List: The analyses
+        List: The analyses, newest first
     """
-    analyses = get_analyses()
-    user_analyses = []
-
-    for analysis_id, analysis in analyses.items():
-        if analysis["user_id"] == user_id:
-            analysis["id"] = analysis_id
-            user_analyses.append(analysis)
-
-    # Sort by created_at (newest first)
-    user_analyses.sort(key=lambda x: x["created_at"], reverse=True)
-
-    return user_analyses
+    pending = _analysis_writes.pending(user_id)
+    analyses = _store.get_analyses_by_user(user_id)
+    for analysis in analyses:
+        load_content(analysis, include_content)
+    if pending:
+        stored = {analysis["id"] for analysis in analyses}
+        for analysis_id, analysis in pending:
+            if analysis_id not in stored:
+                if not include_content:
+                    analysis["content"] = None
+                analyses.append(analysis)
+        analyses.sort(key=lambda a: a["created_at"], reverse=True)
+    return analyses
 
 
 def create_analysis(
@@ -241,6 +605,10 @@ def create_analysis(
     """
     Create a new analysis.
 
+    The ID is assigned immediately. With ANALYSIS_DURABILITY=async (default)
+    the analysis is queued and written to disk by a background thread; it is
+    readable right away either way.
+
     Args:
         user_id: The ID of the user
         content_type: The type of content ("text" or "url")
@@ -257,9 +625,7 @@ def create_analysis(
     Returns:
         Dict: The created analysis
     """
-    analyses = get_analyses()
-
-    # Create analysis
+    # Create analysis (the content is stored separately, deduplicated)
     analysis_id = str(uuid.uuid4())
     analysis = {
         "user_id": user_id,
@@ -276,14 +642,46 @@ def create_analysis(
         "created_at": datetime.now().isoformat()
     }
 
-    # Save analysis
-    analyses[analysis_id] = analysis
-    with open(ANALYSES_FILE, "w") as f:
-        json.dump(analyses, f, indent=2)
+    # Queue the analysis, or write it now if asked to or if the queue is full
+    if ANALYSIS_DURABILITY != "async" or not _analysis_writes.submit(analysis_id, analysis):
+        _write_analyses(_store, [(analysis_id, analysis)])
 
     # Return analysis with ID
-    analysis["id"] = analysis_id
-    return analysis
+    return {**analysis, "id": analysis_id}
+
+
+def search_analyses(
+    user_id: str,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    include_content: bool = False
+) -> Dict[str, Any]:
+    """
+    Search a user's analyses by title and content.
+
+    All terms of the query must match; results are ranked by relevance
+    (BM25). Queued analyses are found once they are written.
+
+    Args:
+        user_id: The ID of the user
+        query: The search text (a term ending in * matches as a prefix)
+        limit: The maximum number of results
+        offset: The number of results to skip
+        include_content: Whether to load the content of each analysis (default: False)
+
+    Returns:
+        Dict: The total number of matches and the requested page of analyses,
+            each with its relevance score
+    """
+    total, hits = _store.search_analyses(user_id, query, limit, offset)
+    results = []
+    for analysis_id, score in hits:
+        analysis = load_content(_store.get_analysis(analysis_id), include_content)
+        if analysis is not None:
+            analysis["score"] = score
+            results.append(analysis)
+    return {"query": query, "total": total, "limit": limit, "offset": offset, "results": results}
 
 
 def get_user_profile(user_id: str) -> Dict[str, Any]:
@@ -300,22 +698,84 @@ def get_user_profile(user_id: str) -> Dict[str, Any]:
     if not user:
         raise ValueError("User not found")
 
-    analyses = get_analyses_by_user(user_id)
+    # Aggregates are maintained on every insert, so this does not depend on
+    # the number of analyses
+    # Hold off flushes so every analysis is counted exactly once
+    with _analysis_writes.paused():
+        pending = _analysis_writes.pending(user_id)
+        stats = _store.get_profile_stats(user_id)
+    recent_analyses = [load_content(a) for a in stats["recent_analyses"]]
+    analysis_count = stats["analysis_count"]
+    trust_score_sum = stats["trust_score_sum"]
+
+    # Add queued analyses that were not written yet
+    if pending:
+        for analysis_id, analysis in pending:
+            analysis_count += 1
+            trust_score_sum += analysis.get("trust_score") or 0
+            recent_analyses.append(analysis)
+        recent_analyses.sort(key=lambda a: a["created_at"], reverse=True)
 
     # Calculate average trust score
-    if analyses:
-        average_trust_score = sum(a["trust_score"] for a in analyses) / len(analyses)
+    if analysis_count:
+        average_trust_score = trust_score_sum / analysis_count
     else:
         average_trust_score = 0
 
     return {
         "user": user,
-        "analysis_count": len(analyses),
-        "recent_analyses": analyses[:5],  # Get 5 most recent analyses
+        "analysis_count": analysis_count,
+        "recent_analyses": recent_analyses[:5],  # 5 most recent analyses
         "average_trust_score": average_trust_score
     }
 
 
+def on_analyses_written(listener: Callable[[List[Tuple[str, Dict[str, Any]]]], None]) -> None:
+    """
+    Register a callback run with every batch of analyses written to the store.
+
+    The callback runs on the thread that writes the batch (the background
+    writer, unless ANALYSIS_DURABILITY=sync or the queue was full), so work
+    done there stays off the scoring path. An error it raises is printed and
+    does not fail the write.
+
+    Args:
+        listener: Called with the (analysis_id, analysis) pairs of the batch,
+            the analyses with their content
+    """
+    _write_listeners.append(listener)
+
+
+def flush_analyses() -> None:
+    """
+    Write queued analyses to disk.
+    """
+    _analysis_writes.flush()
+
+
+def analysis_write_stats() -> Dict[str, Any]:
+    """
+    Get the state of the analysis write queue.
+
+    Returns:
+        Dict: The queue length and write counters
+    """
+    return _analysis_writes.stats()
+
+
+def check_profile_stats(repair: bool = False) -> List[str]:
+    """
+    Check the maintained profile aggregates against the stored analyses.
+
+    Args:
+        repair: Whether to rebuild the aggregates from scratch if they differ
+
+    Returns:
+        List: The IDs of the users whose aggregates were wrong
+    """
+    return _store.check_profile_stats(repair)
+
+
 def create_password_reset_token(email: str) -> Optional[str]:
     """
     Create a password reset token for a user.
@@ -333,20 +793,12 @@ def create_password_reset_token(email: str) -> Optional[str]:
     # Generate a secure token
     token = secrets.token_urlsafe(32)
 
-    # Load existing tokens
-    with open(RESET_TOKENS_FILE, "r") as f:
-        tokens = json.load(f)
-
-    # Add the new token with expiration (24 hours from now)
-    tokens[token] = {
+    # Save the token with expiration (24 hours from now)
+    _store.insert_reset_token(token, {
         "user_id": user["id"],
         "email": email,
         "expires_at": (datetime.now() + timedelta(hours=24)).isoformat()
-    }
-
-    # Save tokens
-    with open(RESET_TOKENS_FILE, "w") as f:
-        json.dump(tokens, f, indent=2)
+    })
 
     return token
 
@@ -361,23 +813,17 @@ def verify_reset_token(token: str) -> Optional[str]:
     Returns:
         str: The user ID if the token is valid, None otherwise
     """
-    # Load tokens
-    with open(RESET_TOKENS_FILE, "r") as f:
-        tokens = json.load(f)
+    token_data = _store.get_reset_token(token)
 
     # Check if token exists
-    if token not in tokens:
+    if token_data is None:
         return None
 
-    token_data = tokens[token]
-
     # Check if token has expired
     expires_at = datetime.fromisoformat(token_data["expires_at"])
     if datetime.now() > expires_at:
         # Remove expired token
-        del tokens[token]
-        with open(RESET_TOKENS_FILE, "w") as f:
-            json.dump(tokens, f, indent=2)
+        _store.delete_reset_token(token)
         return None
 
     return token_data["user_id"]
@@ -398,27 +844,10 @@ def reset_password(token: str, new_password: str) -> bool:
     if not user_id:
         return False
 
-    # Load users
-    users = get_users()
-
     # Update password
-    if user_id in users:
-        users[user_id]["hashed_password"] = get_password_hash(new_password)
-
-        # Save users
-        with open(USERS_FILE, "w") as f:
-            json.dump(users, f, indent=2)
-
+    if _store.update_user(user_id, {"hashed_password": get_password_hash(new_password)}):
         # Remove the used token
-        with open(RESET_TOKENS_FILE, "r") as f:
-            tokens = json.load(f)
-
-        if token in tokens:
-            del tokens[token]
-
-            with open(RESET_TOKENS_FILE, "w") as f:
-                json.dump(tokens, f, indent=2)
-
+        _store.delete_reset_token(token)
         return True
 
     return False
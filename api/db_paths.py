@@ -0,0 +1,17 @@
+"""
+Database file locations for the Fake News Detector API.
+
+Kept apart from the database module, which opens the storage backend when
+imported, so tools that only need the paths (such as the SQLite migration)
+do not touch the database.
+"""
+
+import os
+
+# Database paths
+DB_DIR = os.environ.get("DB_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "db"))
+USERS_FILE = os.path.join(DB_DIR, "users.json")
+ANALYSES_FILE = os.path.join(DB_DIR, "analyses.json")
+RESET_TOKENS_FILE = os.path.join(DB_DIR, "reset_tokens.json")
+SQLITE_PATH = os.environ.get("SQLITE_PATH", os.path.join(DB_DIR, "trustverify.db"))
+SIMILARITY_PATH = os.environ.get("SIMILARITY_PATH", os.path.join(DB_DIR, "similarity.db"))
@@ -0,0 +1,181 @@
+"""
+Domain reputation module for the Fake News Detector API.
+
+This module provides a subdomain-aware index of news domain credibility,
+loaded from a data file and reloaded automatically when the file changes.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from data_file import ReloadableIndex
+
+logger = logging.getLogger("domain-reputation")
+
+# Reputation data file (domain,score,category per line)
+DOMAIN_REPUTATION_FILE = os.environ.get(
+    "DOMAIN_REPUTATION_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "domain_reputation.csv")
+)
+
+# How often (in seconds) to check the data file for changes
+RELOAD_CHECK_INTERVAL = float(os.environ.get("DOMAIN_REPUTATION_RELOAD_INTERVAL", "30"))
+
+# Score for domains that are not in the index
+DEFAULT_CREDIBILITY = 50
+
+# Key under which a trie node stores its entry; labels are never empty strings
+_ENTRY = ""
+
+
+def normalize_host(host: str) -> str:
+    """
+    Normalize a host name for lookup.
+
+    Args:
+        host: The host name, optionally with a port or trailing dot
+
+    Returns:
+        str: The lower-cased host name without port and trailing dot
+    """
+    host = host.strip().lower()
+    if "@" in host:
+        host = host.rsplit("@", 1)[1]
+    if ":" in host and not host.endswith("]"):
+        host = host.split(":", 1)[0]
+    return host.rstrip(".")
+
+
+class DomainReputationIndex(ReloadableIndex):
+    """
+    Suffix trie of domain reputations keyed by reversed domain labels.
+
+    "edition.cnn.com" is stored and looked up as com -> cnn -> edition, so a
+    lookup costs one dictionary step per label and returns the entry of the
+    longest listed suffix. Subdomains inherit their parent's reputation unless
+    they are listed themselves.
+    """
+
+    logger = logger
+    file_description = "domain reputation file"
+    entry_name = "domains"
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the index.
+
+        Args:
+            path: The reputation data file (default: DOMAIN_REPUTATION_FILE)
+        """
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+        super().__init__(path or DOMAIN_REPUTATION_FILE, RELOAD_CHECK_INTERVAL)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _insert(root: Dict[str, Any], domain: str, entry: Tuple[int, str]) -> None:
+        node = root
+        for label in reversed(domain.split(".")):
+            node = node.setdefault(label, {})
+        node[_ENTRY] = entry
+
+    def _load(self) -> Tuple[Dict[str, Any], int]:
+        """
+        Build a new trie from the data file.
+
+        Returns:
+            Tuple[Dict, int]: The trie root and the number of domains loaded
+        """
+        root: Dict[str, Any] = {}
+        size = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = [part.strip() for part in line.split(",")]
+                try:
+                    domain = normalize_host(parts[0])
+                    score = int(parts[1])
+                    category = parts[2] if len(parts) > 2 and parts[2] else "news"
+                except (IndexError, ValueError):
+                    logger.warning(f"Skipping malformed line {line_number} in {self.path}: {line}")
+                    continue
+                if domain.startswith("www."):
+                    domain = domain[4:]
+                self._insert(root, domain, (max(0, min(100, score)), category))
+                size += 1
+        return root, size
+
+    def _swap(self, data: Tuple[Dict[str, Any], int]) -> int:
+        self._root, self._size = data
+        return self._size
+
+    def lookup(self, host: str) -> Optional[Tuple[int, str]]:
+        """
+        Find the reputation entry for a host.
+
+        Args:
+            host: The host name (subdomains are resolved to the longest listed suffix)
+
+        Returns:
+            Tuple[int, str]: The (score, category) entry, or None if no suffix is listed
+        """
+        self.maybe_reload()
+        node = self._root
+        entry = None
+        for label in reversed(normalize_host(host).split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            entry = node.get(_ENTRY, entry)
+        return entry
+
+    def credibility(self, host: str) -> int:
+        """
+        Get the credibility score for a host.
+
+        Args:
+            host: The host name
+
+        Returns:
+            int: The credibility score (0-100), DEFAULT_CREDIBILITY if unknown
+        """
+        entry = self.lookup(host)
+        return entry[0] if entry else DEFAULT_CREDIBILITY
+
+    def is_fake(self, host: str) -> bool:
+        """
+        Check whether a host belongs to a known fake news domain.
+
+        Args:
+            host: The host name
+
+        Returns:
+            bool: True if the host is listed as fake news
+        """
+        entry = self.lookup(host)
+        return entry is not None and entry[1] == "fake"
+
+
+_index: Optional[DomainReputationIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_reputation_index() -> DomainReputationIndex:
+    """
+    Get the shared domain reputation index, loading it on first use.
+
+    Returns:
+        DomainReputationIndex: The shared index
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = DomainReputationIndex()
+    return _index
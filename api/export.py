@@ -0,0 +1,209 @@
+"""
+Bulk export of analyses for the Fake News Detector API.
+
+Analyses are encoded as CSV, JSON Lines or Parquet one batch at a time, and
+optionally gzip-compressed on the fly, so the memory used by an export does
+not depend on how many analyses it contains. The analyses come from any
+iterator (normally database.iter_analyses()); the encoded output is produced
+as a stream of byte chunks for GET /admin/export and export_analyses.py.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+from scoring import FACTOR_NAMES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Number of analyses encoded per chunk (one Parquet row group each)
+EXPORT_BATCH_SIZE = 1000
+
+# Columns of the CSV and Parquet formats; factors get one column each and
+# details are kept as a JSON object
+COLUMNS = [
+    "id", "user_id", "created_at", "content_type", "title", "url", "prediction", "confidence",
+    "trust_score", "trust_level",
+] + [f"factor_{name}" for name in FACTOR_NAMES] + ["details"]
+
+
+def export_filename(format: str, gzip: bool = False) -> str:
+    """Get the file name of an export made now."""
+    return f"analyses-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}" + (".gz" if gzip else "")
+
+
+def _batches(analyses: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for analysis in analyses:
+        batch.append(analysis)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _row(analysis: Dict[str, Any], include_content: bool) -> Dict[str, Any]:
+    """Flatten an analysis into a row of the tabular formats."""
+    row = {column: analysis.get(column) for column in COLUMNS[:10]}
+    factors = analysis.get("factors") or {}
+    for name in FACTOR_NAMES:
+        row[f"factor_{name}"] = factors.get(name)
+    row["details"] = json.dumps(analysis.get("details") or {}, sort_keys=True)
+    if include_content:
+        row["content"] = analysis.get("content")
+    return row
+
+
+def _encode_csv(batches: Iterator[List[Dict[str, Any]]], include_content: bool) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS + (["content"] if include_content else []))
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(_row(analysis, include_content) for analysis in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: nothing was exported
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_jsonl(batches: Iterator[List[Dict[str, Any]]], include_content: bool) -> Iterator[bytes]:
+    for batch in batches:
+        lines = []
+        for analysis in batch:
+            if not include_content:
+                analysis = {key: value for key, value in analysis.items() if key != "content"}
+            lines.append(json.dumps(analysis, ensure_ascii=False) + "\n")
+        yield "".join(lines).encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what the Parquet writer writes, until it is drained."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema(include_content: bool) -> "pa.Schema":
+    fields = [
+        ("id", pa.string()), ("user_id", pa.string()), ("created_at", pa.timestamp("us")),
+        ("content_type", pa.string()), ("title", pa.string()), ("url", pa.string()),
+        ("prediction", pa.string()), ("confidence", pa.float64()), ("trust_score", pa.float64()),
+        ("trust_level", pa.string()),
+    ] + [(f"factor_{name}", pa.float64()) for name in FACTOR_NAMES] + [("details", pa.string())]
+    if include_content:
+        fields.append(("content", pa.string()))
+    return pa.schema(fields)
+
+
+def _encode_parquet(batches: Iterator[List[Dict[str, Any]]], include_content: bool) -> Iterator[bytes]:
+    schema = _parquet_schema(include_content)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in batches:
+            rows = [_row(analysis, include_content) for analysis in batch]
+            for row in rows:
+                created_at = row["created_at"]
+                row["created_at"] = datetime.fromisoformat(created_at) if created_at else None
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    finally:
+        # Writes the footer
+        writer.close()
+    yield sink.drain()
+
+
+def _gzip(chunks: Iterator[bytes], level: int) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def check_export(format: str, gzip: bool = False) -> None:
+    """
+    Check that an export can be made, before it is started.
+
+    Args:
+        format: The output format ("csv", "jsonl" or "parquet")
+        gzip: Whether the output is gzip-compressed
+
+    Raises:
+        ValueError: If the format is unknown or cannot be combined with gzip
+        RuntimeError: If the format needs a package that is not installed
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format} (expected one of {', '.join(EXPORT_FORMATS)})")
+    if format == "parquet":
+        if gzip:
+            raise ValueError("Parquet files are compressed internally; gzip is only available for csv and jsonl")
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+
+def encode_analyses(
+    analyses: Iterable[Dict[str, Any]],
+    format: str,
+    include_content: bool = False,
+    gzip: bool = False,
+    gzip_level: int = 6,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Encode analyses as a stream of byte chunks, one batch of analyses at a time.
+
+    Args:
+        analyses: The analyses (with their IDs), read lazily
+        format: The output format ("csv", "jsonl" or "parquet")
+        include_content: Whether to include the analyzed text
+        gzip: Whether to gzip-compress the output
+        gzip_level: The gzip compression level
+        batch_size: The number of analyses encoded per chunk
+
+    Returns:
+        Iterator: The chunks of the encoded output
+    """
+    check_export(format, gzip)
+    encoder = {"csv": _encode_csv, "jsonl": _encode_jsonl, "parquet": _encode_parquet}[format]
+    chunks = encoder(_batches(analyses, batch_size), include_content)
+    return _gzip(chunks, gzip_level) if gzip else chunks
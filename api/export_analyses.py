@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Export analyses as CSV, JSON Lines or Parquet.
+
+Streams the analyses of the configured backend (DB_BACKEND) one batch at a
+time, so memory use stays the same however many analyses are exported.
+Writes to standard output unless --output is given.
+
+Usage:
+    python export_analyses.py [--format csv|jsonl|parquet] [--output FILE] [--gzip]
+                              [--user USER_ID] [--start TIME] [--end TIME]
+                              [--prediction REAL|FAKE] [--include-content]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from database import DB_BACKEND, iter_analyses
+from export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, check_export, encode_analyses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export analyses as CSV, JSON Lines or Parquet")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl", help="Output format (default: jsonl)")
+    parser.add_argument("--output", default="-", help="Output file (default: standard output)")
+    parser.add_argument("--gzip", action="store_true", help="Gzip-compress the output (csv and jsonl only)")
+    parser.add_argument("--user", help="Only the analyses of this user ID")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Only analyses created at or after this ISO time")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Only analyses created before this ISO time")
+    parser.add_argument("--prediction", choices=("REAL", "FAKE"), help="Only analyses with this prediction")
+    parser.add_argument("--include-content", action="store_true", help="Include the article content")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Analyses encoded per batch")
+    args = parser.parse_args()
+
+    try:
+        check_export(args.format, args.gzip)
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+
+    exported = 0
+
+    def counted(analyses):
+        nonlocal exported
+        for analysis in analyses:
+            exported += 1
+            yield analysis
+
+    analyses = iter_analyses(
+        include_content=args.include_content, user_id=args.user, start=args.start, end=args.end,
+        prediction=args.prediction
+    )
+    chunks = encode_analyses(
+        counted(analyses), args.format, include_content=args.include_content, gzip=args.gzip,
+        batch_size=args.batch_size
+    )
+
+    start = time.perf_counter()
+    size = 0
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+            size += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    print(f"Exported {exported} analyses ({DB_BACKEND} backend) as {args.format}"
+          f"{' (gzip)' if args.gzip else ''}: {size / 1e6:.1f} MB in {time.perf_counter() - start:.1f} s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
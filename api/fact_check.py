@@ -0,0 +1,400 @@
+"""
+Fact-check module for the Fake News Detector API.
+
+This module provides a BM25 index over a local corpus of fact-checked claims,
+loaded from a data file and reloaded automatically when the file changes.
+Candidate claim sentences are extracted from an article and looked up in the
+index, so the fact verification factor can be based on the verdicts of
+matching fact-checks without calling any external service.
+"""
+
+import csv
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from data_file import ReloadableIndex
+
+logger = logging.getLogger("fact-check")
+
+# Fact-check data file (CSV with claim,verdict,source,url columns)
+FACT_CHECK_FILE = os.environ.get(
+    "FACT_CHECK_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "fact_checks.csv")
+)
+
+# How often (in seconds) to check the data file for changes
+RELOAD_CHECK_INTERVAL = float(os.environ.get("FACT_CHECK_RELOAD_INTERVAL", "30"))
+
+# Minimum match strength (share of a fact-check's own BM25 score) of a match
+FACT_CHECK_MIN_MATCH = float(os.environ.get("FACT_CHECK_MIN_MATCH", "0.6"))
+
+# Maximum number of claim sentences looked up per article
+MAX_CLAIMS = 20
+
+# Maximum number of matches returned per article
+MAX_MATCHES = 3
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Truth rating of each verdict (0 = false, 1 = true); other verdicts are skipped
+VERDICT_RATINGS = {
+    "true": 1.0,
+    "mostly-true": 0.75,
+    "half-true": 0.5,
+    "mixed": 0.5,
+    "misleading": 0.25,
+    "mostly-false": 0.25,
+    "false": 0.0,
+    "pants-on-fire": 0.0,
+}
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been before being but by can could did do does for from had has
+have he her his how i if in into is it its just may more most much must no not of on one or other our out over
+she so some such than that the their them then there these they this those through to too under up very was we
+were what when where which while who why will with would you your
+""".split())
+
+# Words that make a sentence likely to state a checkable fact
+CLAIM_CUES = frozenset("""
+according announced cause caused causes claim claimed claims confirmed contain contains cure cured cures
+decrease decreased found increase increased killed linked million billion percent prove proved proves
+report reported reports reveal revealed said says show showed shows study
+""".split())
+
+# Words that deny what a sentence states, and words that dispute it
+# wherever they are in the sentence
+NEGATIONS = frozenset("not no never nor neither none nobody nothing without cannot".split())
+DISPUTE_CUES = frozenset("""
+baseless bogus conspiracy debunk debunked debunking debunks deny denied denies disprove disproved disproven
+disputed fake false falsely hoax incorrect misinformation misleading myth refute refuted refutes rumor rumour
+unfounded untrue wrong
+""".split())
+
+# A negation this many words before the first word of a matched claim still applies to it
+NEGATION_WINDOW = 3
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+STANCE_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'t)?")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+CAPITALIZED_PATTERN = re.compile(r"\s[A-Z][a-z]")
+
+# Claim sentences are between these lengths (in words); longer ones are split
+MIN_CLAIM_WORDS = 5
+MAX_CLAIM_WORDS = 60
+
+
+def _stem(word: str) -> str:
+    """Reduce plurals to their singular form, so "vaccines" matches "vaccine"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms.
+
+    Args:
+        text: The text
+
+    Returns:
+        List[str]: The lower-cased, singularized words that are not stopwords
+    """
+    return [_stem(word) for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def disputes(text: str, terms: Optional[set] = None) -> bool:
+    """
+    Check if a sentence denies or disputes what it states.
+
+    It does if it has a dispute word ("false", "myth", "debunked") or an odd
+    number of negations ("not", "no", "never", "n't"). Given the terms of a
+    matched claim, only the negations from shortly before the first of them
+    to the last of them are counted, so that a negation elsewhere in the
+    sentence does not flip the claim.
+
+    Args:
+        text: The sentence
+        terms: The index terms of the claim the sentence matched
+
+    Returns:
+        bool: True if the sentence denies or disputes what it states
+    """
+    words = STANCE_WORD_PATTERN.findall(text.lower().replace("\u2019", "'"))
+    if any(_stem(word) in DISPUTE_CUES for word in words):
+        return True
+    if terms:
+        positions = [i for i, word in enumerate(words) if _stem(word) in terms]
+        if positions:
+            words = words[max(0, positions[0] - NEGATION_WINDOW):positions[-1] + 1]
+    return sum(word in NEGATIONS or word.endswith("'t") for word in words) % 2 == 1
+
+
+def extract_claims(text: str, limit: int = MAX_CLAIMS) -> List[str]:
+    """
+    Extract the sentences of an article most likely to state checkable facts.
+
+    Questions and very short sentences are skipped; sentences mentioning
+    numbers, names or reporting verbs ("says", "found", "causes") are preferred.
+
+    Args:
+        text: The article text
+        limit: The maximum number of sentences returned
+
+    Returns:
+        List[str]: The candidate claim sentences, most check-worthy first
+    """
+    candidates = []
+    for sentence in SENTENCE_BREAK.split(text):
+        sentence = sentence.strip()
+        if not sentence or sentence.endswith("?"):
+            continue
+        words = sentence.split()
+        # Unpunctuated text is looked up in windows of sentence length
+        for start in range(0, len(words), MAX_CLAIM_WORDS):
+            window = words[start:start + MAX_CLAIM_WORDS]
+            if len(window) < MIN_CLAIM_WORDS:
+                continue
+            claim = " ".join(window)
+            lowered = {word.strip(".,;:!\"'()").lower() for word in window}
+            worthiness = (
+                2 * any(char.isdigit() for char in claim)
+                + len(lowered & CLAIM_CUES)
+                + (CAPITALIZED_PATTERN.search(claim) is not None)
+            )
+            candidates.append((worthiness, len(candidates), claim))
+    candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+    return [claim for _, _, claim in candidates[:limit]]
+
+
+class _Corpus:
+    """An immutable snapshot of the fact-checks and their BM25 postings."""
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.entries = entries
+        documents = [Counter(tokenize(entry["claim"])) for entry in entries]
+        lengths = np.array([sum(terms.values()) for terms in documents], dtype=np.float64)
+        average_length = lengths.mean() if len(lengths) else 0.0
+
+        frequencies: Counter = Counter()
+        for terms in documents:
+            frequencies.update(terms.keys())
+
+        self.terms = {term: position for position, term in enumerate(frequencies)}
+        rows, columns, impacts = [], [], []
+        for doc, terms in enumerate(documents):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc] / average_length)
+            for term, count in terms.items():
+                df = frequencies[term]
+                idf = math.log(1 + (len(entries) - df + 0.5) / (df + 0.5))
+                rows.append(self.terms[term])
+                columns.append(doc)
+                impacts.append(idf * count * (BM25_K1 + 1) / (count + norm))
+
+        # The BM25 contribution of each (term, document) pair does not depend
+        # on the query, so a lookup only adds up precomputed impacts: the rows
+        # of this matrix are the posting lists of the terms
+        self.impacts = sparse.csr_matrix(
+            (np.array(impacts, dtype=np.float64), (np.array(rows, dtype=np.int32), np.array(columns, dtype=np.int32))),
+            shape=(len(self.terms), len(entries))
+        )
+        self.self_scores = np.asarray(self.impacts.sum(axis=0)).ravel()
+
+    def match(self, claims: List[str], k: int, min_match: float) -> List[List[Tuple[int, float]]]:
+        """
+        Find the fact-checks matching each of several claim sentences.
+
+        All sentences are scored in one sparse product of their terms with the
+        posting lists, which only reads the postings of their terms.
+
+        Args:
+            claims: The claim sentences
+            k: The maximum number of matches per sentence
+            min_match: The minimum match strength
+
+        Returns:
+            List: For each sentence, (fact-check position, strength) pairs, strongest first
+        """
+        rows, columns = [], []
+        for row, claim in enumerate(claims):
+            positions = {self.terms[term] for term in tokenize(claim) if term in self.terms}
+            rows.extend([row] * len(positions))
+            columns.extend(positions)
+        queries = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)), shape=(len(claims), len(self.terms))
+        )
+        scores = (queries @ self.impacts).tocsr()
+
+        matches = []
+        for row in range(len(claims)):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            docs = scores.indices[start:end]
+            strengths = scores.data[start:end] / np.maximum(self.self_scores[docs], 1e-9)
+            keep = np.flatnonzero(strengths >= min_match)
+            if len(keep) > k:
+                keep = keep[np.argpartition(-strengths[keep], k - 1)[:k]]
+            keep = keep[np.argsort(-strengths[keep])]
+            matches.append([(int(docs[i]), float(min(strengths[i], 1.0))) for i in keep])
+        return matches
+
+
+class FactCheckIndex(ReloadableIndex):
+    """
+    BM25 inverted index of fact-checked claims.
+
+    Each fact-check claim is a document; a claim sentence from an article is
+    the query. A match's strength is its BM25 score relative to the score
+    the fact-check would get for its own text, so it is comparable across
+    fact-checks of different lengths (1 means every term of the fact-check
+    is in the sentence).
+    """
+
+    logger = logger
+    file_description = "fact-check file"
+    entry_name = "fact-checks"
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the index.
+
+        Args:
+            path: The fact-check data file (default: FACT_CHECK_FILE)
+        """
+        self._corpus = _Corpus([])
+        super().__init__(path or FACT_CHECK_FILE, RELOAD_CHECK_INTERVAL)
+
+    def __len__(self) -> int:
+        return len(self._corpus.entries)
+
+    def _load(self) -> _Corpus:
+        """
+        Build a new corpus from the data file.
+
+        Returns:
+            _Corpus: The indexed fact-checks
+        """
+        entries = []
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            rows = csv.DictReader(line for line in f if not line.startswith("#"))
+            for row in rows:
+                claim = (row.get("claim") or "").strip()
+                verdict = re.sub(r"[\s_]+", "-", (row.get("verdict") or "").strip().lower())
+                if not claim or verdict not in VERDICT_RATINGS:
+                    logger.warning(f"Skipping fact-check with unknown verdict or no claim in {self.path}: {row}")
+                    continue
+                entries.append({
+                    "claim": claim,
+                    "verdict": verdict,
+                    "rating": VERDICT_RATINGS[verdict],
+                    "source": (row.get("source") or "").strip() or None,
+                    "url": (row.get("url") or "").strip() or None,
+                })
+        return _Corpus(entries)
+
+    def _swap(self, data: _Corpus) -> int:
+        self._corpus = data
+        return len(data.entries)
+
+    def search(self, claim: str, k: int = MAX_MATCHES, min_match: float = FACT_CHECK_MIN_MATCH) -> List[Tuple[int, float]]:
+        """
+        Find the fact-checks matching a claim sentence.
+
+        Args:
+            claim: The claim sentence
+            k: The maximum number of matches
+            min_match: The minimum match strength
+
+        Returns:
+            List: (fact-check position, strength) pairs, strongest first
+        """
+        return self._corpus.match([claim], k, min_match)[0]
+
+    def check(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Find the fact-checks of the claims made in an article.
+
+        Each match has a stance: "repeats" if the sentence states the claim as
+        the fact-check does, "disputes" if it denies what the fact-check
+        states or calls it false (an article debunking a false claim
+        matches it as closely as one repeating it). Only matches that repeat
+        a claim are evidence of the article's truth; see FactCheckIndex.evidence().
+
+        Args:
+            text: The article text
+
+        Returns:
+            List[Dict]: Up to MAX_MATCHES matched fact-checks (claim, verdict,
+                rating, source, url, the matching sentence, the match strength
+                and the stance), strongest first; each fact-check appears once
+        """
+        self.maybe_reload()
+        corpus = self._corpus
+        claims = extract_claims(text)
+        if not corpus.entries or not claims:
+            return []
+        best: Dict[int, Tuple[float, str]] = {}
+        for sentence, matches in zip(claims, corpus.match(claims, MAX_MATCHES, FACT_CHECK_MIN_MATCH)):
+            for doc, strength in matches:
+                if doc not in best or strength > best[doc][0]:
+                    best[doc] = (strength, sentence)
+        ranked = sorted(best.items(), key=lambda item: -item[1][0])[:MAX_MATCHES]
+        results = []
+        for doc, (strength, sentence) in ranked:
+            claim = corpus.entries[doc]["claim"]
+            opposed = disputes(sentence, set(tokenize(claim))) != disputes(claim)
+            results.append({
+                **corpus.entries[doc],
+                "sentence": sentence,
+                "match": round(strength, 3),
+                "stance": "disputes" if opposed else "repeats",
+            })
+        return results
+
+    @staticmethod
+    def evidence(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Select the matches that bear on an article's truth.
+
+        Only claims the article repeats do: the truth of one it disputes is
+        not the truth of the article, and whether the article is right to
+        dispute it cannot be told reliably from a negation.
+
+        Args:
+            matches: The matches returned by check()
+
+        Returns:
+            List[Dict]: The matches whose stance is "repeats"
+        """
+        return [match for match in matches if match["stance"] == "repeats"]
+
+
+_index: Optional[FactCheckIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_fact_check_index() -> FactCheckIndex:
+    """
+    Get the shared fact-check index, loading it on first use.
+
+    Returns:
+        FactCheckIndex: The shared index
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = FactCheckIndex()
+    return _index
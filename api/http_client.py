@@ -0,0 +1,549 @@
+"""
+HTTP client for the Fake News Detector API.
+
+All page downloads of the API (URL extraction by the scraping engine) go
+through AsyncHttpClient, an asyncio client on httpx: connections are kept
+alive in a pool per host and reused across requests, new connections
+resolve their host through a DNS cache, connection errors and transient
+statuses are retried with exponential backoff, and requests have default
+timeouts. The client counts requests and new connections, so connection
+reuse can be monitored.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+logger = logging.getLogger("http-client")
+
+# httpx logs every request at INFO level
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Number of hosts whose connection pools are kept
+HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "100"))
+
+# Number of idle connections kept per host
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+
+# Maximum number of connections the async client has open at once, in total
+# and per host, and how long (in seconds) its idle connections are kept
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "500"))
+HTTP_HOST_CONNECTIONS = int(os.environ.get("HTTP_HOST_CONNECTIONS", "100"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# Default connect and read timeouts, in seconds
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+
+# Retries of failed connections and transient statuses, and the backoff
+# factor between them (0.5 s, 1 s, 2 s, ...)
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Longest wait (in seconds) before a retry; a longer Retry-After is cut to it
+HTTP_RETRY_AFTER_MAX = float(os.environ.get("HTTP_RETRY_AFTER_MAX", "10"))
+
+# How long (in seconds) resolved addresses are reused
+HTTP_DNS_TTL = float(os.environ.get("HTTP_DNS_TTL", "300"))
+
+# Maximum number of hosts in the DNS cache and in the per-host statistics
+MAX_HOSTS = 10000
+
+# A resolved address, as returned by socket.getaddrinfo
+Address = Tuple[Any, ...]
+
+
+class DnsCache:
+    """
+    Cache of resolved host addresses, expiring after a TTL.
+
+    Entries of hosts that cannot be connected to are dropped, so a host
+    that moved is resolved again on the next attempt.
+    """
+
+    def __init__(self, ttl: float = HTTP_DNS_TTL, max_size: int = MAX_HOSTS):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: How long (in seconds) an entry is used
+            max_size: The maximum number of cached hosts
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[Address]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, host: str, port: int) -> List[Address]:
+        """
+        Resolve a host, from the cache if possible.
+
+        Args:
+            host: The host name
+            port: The port
+
+        Returns:
+            List: The addresses of the host, in the resolver's order
+
+        Raises:
+            socket.gaierror: If the host cannot be resolved
+        """
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with self._lock:
+            if len(self._entries) >= self.max_size and key not in self._entries:
+                # Drop the expired entries, or the oldest one if none expired
+                expired = [k for k, (expires, _) in self._entries.items() if expires <= now]
+                for k in expired or [next(iter(self._entries))]:
+                    del self._entries[k]
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def forget(self, host: str, port: int) -> None:
+        """Drop the cached addresses of a host."""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _RequestStats:
+    """Request and connection counters, in total and per host."""
+
+    def _init_stats(self) -> None:
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections = 0
+        self._hosts: Dict[str, List[int]] = {}
+
+    def _host_counts(self, host: str) -> List[int]:
+        """Get the [requests, connections] counters of a host. Call with the lock held."""
+        counts = self._hosts.get(host)
+        if counts is None:
+            counts = [0, 0]
+            if len(self._hosts) < MAX_HOSTS:
+                self._hosts[host] = counts
+        return counts
+
+    def _count_request(self, url: str) -> None:
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            self._requests += 1
+            self._host_counts(host)[0] += 1
+
+    def _count_connection(self, host: str) -> None:
+        with self._lock:
+            self._connections += 1
+            self._host_counts(host)[1] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the connection reuse statistics.
+
+        Returns:
+            Dict: requests sent, connections opened, the share of requests
+                served on a reused connection, DNS cache hits and misses, and
+                the busiest hosts
+        """
+        with self._lock:
+            requests_sent, connections = self._requests, self._connections
+            hosts = sorted(self._hosts.items(), key=lambda item: -item[1][0])[:10]
+        return {
+            "requests": requests_sent,
+            "connections": connections,
+            "reuse_ratio": round(max(0.0, 1 - connections / requests_sent), 3) if requests_sent else 0.0,
+            "dns_cache": {"entries": len(self.dns), "hits": self.dns.hits, "misses": self.dns.misses},
+            "hosts": {host: {"requests": counts[0], "connections": counts[1]} for host, counts in hosts},
+        }
+
+
+class _CachedDnsBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that resolves hosts through the client's DNS cache and counts new connections."""
+
+    def __init__(self, client: "AsyncHttpClient"):
+        self.client = client
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None, socket_options=None) -> httpcore.AsyncNetworkStream:
+        options = {"timeout": timeout, "local_address": local_address, "socket_options": socket_options}
+        try:
+            # A cache miss resolves the host with the blocking resolver, so off the event loop
+            addresses = await asyncio.get_running_loop().run_in_executor(None, self.client.dns.resolve, host, port)
+        except (socket.gaierror, UnicodeError):
+            # Let httpcore resolve it and report the error
+            return await self._backend.connect_tcp(host, port, **options)
+
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                stream = await self._backend.connect_tcp(address[4][0], port, **options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+                continue
+            self.client._count_connection(host)
+            return stream
+        if error is None:
+            return await self._backend.connect_tcp(host, port, **options)
+        logger.debug(f"Could not connect to any address of {host}, resolving it again next time")
+        self.client.dns.forget(host, port)
+        raise error
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options=None) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+# httpcore's exceptions and the httpx exceptions they are raised as, the
+# more specific first
+HTTPCORE_EXCEPTIONS = (
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+)
+
+
+@contextmanager
+def _httpx_exceptions() -> Iterator[None]:
+    """Raise httpcore's exceptions as the corresponding httpx exceptions."""
+    try:
+        yield
+    except Exception as e:
+        for core_exception, httpx_exception in HTTPCORE_EXCEPTIONS:
+            if isinstance(e, core_exception):
+                raise httpx_exception(str(e)) from e
+        raise
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    """Response body read from an httpcore connection pool, calling back once closed."""
+
+    def __init__(self, stream: AsyncIterable[bytes], release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with _httpx_exceptions():
+            async for part in self._stream:
+                yield part
+
+    async def aclose(self) -> None:
+        try:
+            with _httpx_exceptions():
+                await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class _HostPool:
+    """The connection pool of one origin, with its requests in flight (or waiting for a slot)."""
+
+    def __init__(self, pool: httpcore.AsyncConnectionPool, connections: int):
+        self.pool = pool
+        self.slots = asyncio.Semaphore(connections)
+        self.in_flight = 0
+        self.used_at = time.monotonic()
+
+
+class _PoolTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over one httpcore connection pool per origin.
+
+    httpcore's pool scans all of its connections and waiting requests on
+    every request and response, which takes most of the CPU once hundreds of
+    connections share one pool or wait in it; a pool per origin keeps each
+    scan short, and requests beyond the per-origin and total connection
+    limits wait for a slot before reaching the pool. The pools of the least recently used origins, and those
+    left idle for longer than the keep-alive expiry, are closed with their
+    connections. Only httpcore's and httpx's public APIs are used.
+    """
+
+    def __init__(self, network_backend: httpcore.AsyncNetworkBackend, limits: httpx.Limits,
+                 pool_hosts: int, host_connections: int):
+        """
+        Initialize the transport.
+
+        Args:
+            network_backend: The network backend of the connections
+            limits: The total connection limit, and the idle connections kept
+                per origin and their expiry
+            pool_hosts: The number of origins whose pools are kept
+            host_connections: The maximum number of connections per origin
+        """
+        self._network_backend = network_backend
+        self._limits = limits
+        self._pool_hosts = pool_hosts
+        self._host_connections = host_connections
+        self._ssl_context = httpx.create_ssl_context()
+        # Created on first use, on the event loop of the requests
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Pools per (scheme, host, port), least recently used first
+        self._pools: "OrderedDict[Tuple[bytes, bytes, int], _HostPool]" = OrderedDict()
+        self._swept_at = time.monotonic()
+
+    def _checkout(self, origin: Tuple[bytes, bytes, int]) -> _HostPool:
+        """Get the pool of an origin, creating it if needed, and count a request on it."""
+        host_pool = self._pools.get(origin)
+        if host_pool is None:
+            host_pool = self._pools[origin] = _HostPool(httpcore.AsyncConnectionPool(
+                ssl_context=self._ssl_context,
+                max_connections=self._host_connections,
+                max_keepalive_connections=self._limits.max_keepalive_connections,
+                keepalive_expiry=self._limits.keepalive_expiry,
+                network_backend=self._network_backend
+            ), self._host_connections)
+        self._pools.move_to_end(origin)
+        host_pool.in_flight += 1
+        host_pool.used_at = time.monotonic()
+        return host_pool
+
+    async def _acquire(self, host_pool: _HostPool) -> None:
+        """Wait for a connection slot of the origin, then for one of the total."""
+        await host_pool.slots.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            host_pool.slots.release()
+            raise
+
+    @staticmethod
+    def _uncount(host_pool: _HostPool) -> None:
+        """Uncount a request that finished or gave up waiting for a slot."""
+        host_pool.in_flight -= 1
+        host_pool.used_at = time.monotonic()
+
+    def _release(self, host_pool: _HostPool) -> None:
+        """Release the slots of a finished request."""
+        self._uncount(host_pool)
+        host_pool.slots.release()
+        self._slots.release()
+
+    async def _close_unused_pools(self) -> None:
+        """Close the pools of the least recently used origins beyond the limit, and the expired ones."""
+        now = time.monotonic()
+        expiry = self._limits.keepalive_expiry
+        sweep = expiry is not None and now - self._swept_at >= expiry
+        if sweep:
+            self._swept_at = now
+        elif len(self._pools) <= self._pool_hosts:
+            return
+        excess = len(self._pools) - self._pool_hosts
+        closing = []
+        for origin, host_pool in self._pools.items():
+            if host_pool.in_flight:
+                continue
+            if excess > 0 or (sweep and now - host_pool.used_at >= expiry):
+                closing.append(origin)
+                excess -= 1
+            elif not sweep:
+                break
+        for origin in closing:
+            await self._pools.pop(origin).pool.aclose()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._limits.max_connections)
+        host_pool = self._checkout((request.url.raw_scheme, request.url.raw_host, request.url.port or (
+            443 if request.url.scheme == "https" else 80)))
+        try:
+            await self._acquire(host_pool)
+        except BaseException:
+            self._uncount(host_pool)
+            raise
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        try:
+            await self._close_unused_pools()
+            with _httpx_exceptions():
+                response = await host_pool.pool.handle_async_request(core_request)
+        except BaseException:
+            self._release(host_pool)
+            raise
+
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream, lambda: self._release(host_pool)),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        pools, self._pools = self._pools, OrderedDict()
+        for host_pool in pools.values():
+            await host_pool.pool.aclose()
+
+
+class AsyncHttpClient(_RequestStats):
+    """
+    Asyncio HTTP client with keep-alive connection pools, a DNS cache and retries.
+
+    A download only holds a coroutine, not a thread, while it waits for the
+    network. An instance belongs to the event loop it is first used on.
+    """
+
+    def __init__(
+        self,
+        pool_hosts: int = HTTP_POOL_HOSTS,
+        pool_size: int = HTTP_POOL_SIZE,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        host_connections: int = HTTP_HOST_CONNECTIONS,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        timeout: Tuple[float, float] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF,
+        dns: Optional[DnsCache] = None
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            pool_hosts: The number of hosts whose connections are kept alive
+            pool_size: The number of idle connections kept per host
+            max_connections: The maximum number of connections open at once
+            host_connections: The maximum number of connections open at once to one host
+            keepalive_expiry: How long (in seconds) idle connections are kept
+            timeout: The default (connect, read) timeouts, in seconds
+            retries: The number of retries of failed connections and transient statuses
+            backoff: The backoff factor between retries, in seconds
+            dns: The DNS cache (default: a new one)
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.dns = dns or DnsCache()
+        self._init_stats()
+
+        self.client = httpx.AsyncClient(
+            transport=_PoolTransport(
+                _CachedDnsBackend(self),
+                httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=pool_size,
+                    keepalive_expiry=keepalive_expiry
+                ),
+                pool_hosts,
+                host_connections
+            ),
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0], pool=None),
+            follow_redirects=True
+        )
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """
+        Get the delay before a retry: the response's Retry-After if given in
+        seconds, else the backoff, and at most HTTP_RETRY_AFTER_MAX.
+        """
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.strip().isdigit():
+            return min(float(retry_after), HTTP_RETRY_AFTER_MAX)
+        return min(self.backoff * 2 ** attempt, HTTP_RETRY_AFTER_MAX)
+
+    def _attempt_timeout(self, deadline: Optional[float]) -> Optional[httpx.Timeout]:
+        """Get the timeouts of an attempt that must end by the deadline (None: the client's defaults)."""
+        if deadline is None:
+            return None
+        remaining = max(0.0, deadline - time.monotonic())
+        return httpx.Timeout(min(self.timeout[1], remaining), connect=min(self.timeout[0], remaining), pool=remaining)
+
+    async def request(self, method: str, url: str, stream: bool = False, deadline: Optional[float] = None,
+                      **kwargs) -> httpx.Response:
+        """
+        Send a request, with the default timeouts unless others are given.
+
+        GET and HEAD requests are retried after connection errors, timeouts and
+        transient statuses.
+
+        Args:
+            method: The HTTP method
+            url: The URL
+            stream: Return once the headers are received; the caller reads the
+                body (aiter_bytes()) and must close the response (aclose())
+            deadline: When (time.monotonic()) the request must be answered:
+                each attempt's timeouts are cut to the time left, and a retry
+                that could not start before it is not made (the last
+                response is returned, or the last error raised)
+            **kwargs: Arguments of httpx.AsyncClient.build_request
+
+        Returns:
+            httpx.Response: The response (after retries)
+
+        Raises:
+            httpx.HTTPError: If the request failed after retries
+        """
+        self._count_request(url)
+        retries = self.retries if method in ("GET", "HEAD") else 0
+        for attempt in range(retries + 1):
+            timeout = self._attempt_timeout(deadline)
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+            try:
+                response = await self.client.send(self.client.build_request(method, url, **kwargs), stream=stream)
+            except httpx.TransportError as e:
+                delay = self._retry_delay(attempt)
+                if attempt == retries or (deadline is not None and time.monotonic() + delay >= deadline):
+                    raise
+                logger.debug(f"Retrying {url} after {e!r}")
+                await asyncio.sleep(delay)
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            delay = self._retry_delay(attempt, response)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                return response
+            logger.debug(f"Retrying {url} after status {response.status_code}")
+            await response.aclose()
+            await asyncio.sleep(delay)
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """Send a GET request (see request())."""
+        return await self.request("GET", url, **kwargs)
+
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        await self.client.aclose()
@@ -0,0 +1,354 @@
+"""
+JSON file storage backend for the Fake News Detector API.
+
+This module stores users and password reset tokens in JSON files, analyses
+in an append-only log and analysis content in a content-addressed blob store. It is the default backend used by the database module.
+
+Several processes may share the same directory: writes hold a cross-process
+lock (see file_lock.FileLock) and files are replaced atomically.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from analysis_log import LEGACY_IMPORT_NAME, AnalysisLog
+from content_store import BlobStore
+from file_lock import FileLock, atomic_write
+from search_index import SearchIndex
+
+
+def _same_user_record(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> bool:
+    """Check whether two versions of a user record differ only in last_login."""
+    if old is None or old.keys() != new.keys():
+        return False
+    return all(old[key] == new[key] for key in new if key != "last_login")
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    atomic_write(path, json.dumps(data, indent=2).encode("utf-8"))
+
+
+class UserStore:
+    """
+    In-memory index of the users file.
+
+    Users are indexed by ID and by email so lookups are O(1). The index is
+    rebuilt when the file changes on disk (detected with a stat call, so writes
+    by other processes are picked up) and after every write made through save().
+
+    Each user has a revision number that changes whenever their record changes
+    (other than last_login), so callers can cache data derived from a user.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the user store.
+
+        Args:
+            path: The path of the users file
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._ids_by_email: Dict[str, str] = {}
+        self._revisions: Dict[str, int] = {}
+        self._signature = None
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _index(self, users: Dict[str, Dict[str, Any]]) -> None:
+        previous = self._users
+        for user_id, user in users.items():
+            if not _same_user_record(previous.get(user_id), user):
+                self._revisions[user_id] = self._revisions.get(user_id, 0) + 1
+        for user_id in previous.keys() - users.keys():
+            self._revisions.pop(user_id, None)
+
+        self._users = users
+        self._ids_by_email = {user["email"]: user_id for user_id, user in users.items()}
+
+    def _refresh(self) -> None:
+        """Reload the index if the users file changed on disk."""
+        signature = self._file_signature()
+        if signature != self._signature:
+            self._index(_read_json(self.path))
+            self._signature = signature
+
+    def _view(self, user_id: str) -> Dict[str, Any]:
+        """Return a copy of a user with its ID."""
+        user = dict(self._users[user_id])
+        user["id"] = user_id
+        return user
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get a copy of all users, keyed by ID.
+
+        Returns:
+            Dict: The users
+        """
+        with self._lock:
+            self._refresh()
+            return {user_id: dict(user) for user_id, user in self._users.items()}
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user by email.
+
+        Args:
+            email: The email of the user
+
+        Returns:
+            Dict: A copy of the user, or None if not found
+        """
+        with self._lock:
+            self._refresh()
+            user_id = self._ids_by_email.get(email)
+            return self._view(user_id) if user_id else None
+
+    def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user by ID.
+
+        Args:
+            user_id: The ID of the user
+
+        Returns:
+            Dict: A copy of the user, or None if not found
+        """
+        with self._lock:
+            self._refresh()
+            return self._view(user_id) if user_id in self._users else None
+
+    def get_revision(self, user_id: str) -> Optional[int]:
+        """
+        Get the revision number of a user record.
+
+        Args:
+            user_id: The ID of the user
+
+        Returns:
+            int: The revision, or None if the user does not exist
+        """
+        with self._lock:
+            self._refresh()
+            return self._revisions.get(user_id) if user_id in self._users else None
+
+    def save(self, users: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Write all users to disk and re-index them.
+
+        Args:
+            users: The users, keyed by ID
+        """
+        with self._lock:
+            _write_json(self.path, users)
+            self._index({user_id: dict(user) for user_id, user in users.items()})
+            self._signature = self._file_signature()
+
+
+class JsonStore:
+    """
+    Storage backend that keeps users and reset tokens in JSON files.
+
+    Users are served from an in-memory index and reset tokens are read from
+    and written to their file on every call. Analyses live in an append-only
+    log (see analysis_log.AnalysisLog), so inserts do not rewrite old records.
+    The full-text search index is an SQLite file next to them.
+    """
+
+    def __init__(self, db_dir: str):
+        """
+        Initialize the JSON store, creating missing files.
+
+        Args:
+            db_dir: The directory containing the JSON files
+        """
+        self.db_dir = db_dir
+        self.users_file = os.path.join(db_dir, "users.json")
+        self.analyses_file = os.path.join(db_dir, "analyses.json")
+        self.reset_tokens_file = os.path.join(db_dir, "reset_tokens.json")
+
+        # Create database directory and files if they don't exist
+        os.makedirs(db_dir, exist_ok=True)
+        self._lock = FileLock(os.path.join(db_dir, ".lock"))
+        with self._lock.acquire():
+            for path in (self.users_file, self.reset_tokens_file):
+                if not os.path.exists(path):
+                    _write_json(path, {})
+
+        self.users = UserStore(self.users_file)
+        self.analyses = AnalysisLog(os.path.join(db_dir, "analyses"))
+        self.contents = BlobStore(os.path.join(db_dir, "contents"))
+        self.search = SearchIndex(os.path.join(db_dir, "search.db"))
+        self._import_legacy_analyses()
+        if len(self.search) < len(self.analyses):
+            self.search.add_missing(self.analyses, self.contents.get)
+
+    def _import_legacy_analyses(self) -> None:
+        """
+        Copy analyses from the old analyses.json file into the log (runs once).
+
+        The file is left in place; the import is recorded in the log directory.
+        """
+        marker = os.path.join(self.analyses.log_dir, LEGACY_IMPORT_NAME)
+        with self._lock.acquire():
+            if os.path.exists(marker) or not os.path.exists(self.analyses_file):
+                return
+            legacy = _read_json(self.analyses_file)
+            imported = self.analyses.import_records(legacy) if legacy else 0
+            record = {"source": self.analyses_file, "imported": imported, "at": datetime.now().isoformat()}
+            atomic_write(marker, json.dumps(record).encode("utf-8"))
+        if imported:
+            print(f"Imported {imported} analyses from {self.analyses_file} into the analysis log")
+
+    # Users
+
+    def get_users(self) -> Dict[str, Dict[str, Any]]:
+        """Get all users, keyed by ID."""
+        return self.users.all()
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Get a user (with its ID) by email, or None."""
+        return self.users.get_by_email(email)
+
+    def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user (with its ID) by ID, or None."""
+        return self.users.get_by_id(user_id)
+
+    def get_user_revision(self, user_id: str) -> Optional[int]:
+        """Get the revision of a user record, or None if the user does not exist."""
+        return self.users.get_revision(user_id)
+
+    def insert_user(self, user_id: str, user: Dict[str, Any]) -> None:
+        """Insert a user, raising ValueError if the email is already registered."""
+        with self._lock.acquire():
+            if self.users.get_by_email(user["email"]):
+                raise ValueError("Email already registered")
+            users = self.users.all()
+            users[user_id] = user
+            self.users.save(users)
+
+    def update_user(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        """Update fields of a user, returning False if the user does not exist."""
+        with self._lock.acquire():
+            users = self.users.all()
+            if user_id not in users:
+                return False
+            users[user_id].update(fields)
+            self.users.save(users)
+            return True
+
+    def set_last_logins(self, last_logins: Dict[str, str]) -> None:
+        """Set last_login for several users at once."""
+        with self._lock.acquire():
+            users = self.users.all()
+            for user_id, last_login in last_logins.items():
+                if user_id in users:
+                    users[user_id]["last_login"] = last_login
+            self.users.save(users)
+
+    # Analyses
+
+    def get_analyses(self) -> Dict[str, Dict[str, Any]]:
+        """Get all analyses, keyed by ID."""
+        return {analysis.pop("id"): analysis for analysis in self.analyses}
+
+    def iter_analyses(self, user_id: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                      prediction: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over analyses (with their IDs) without loading them all at once.
+
+        Args:
+            user_id: Only the analyses of this user (read through the user index)
+            start: Only analyses created at or after this ISO time
+            end: Only analyses created before this ISO time
+            prediction: Only analyses with this prediction
+        """
+        analyses = self.analyses.get_by_user(user_id) if user_id is not None else self.analyses
+        for analysis in analyses:
+            created_at = analysis.get("created_at") or ""
+            if start is not None and created_at < start:
+                continue
+            if end is not None and created_at >= end:
+                continue
+            if prediction is not None and analysis.get("prediction") != prediction:
+                continue
+            yield analysis
+
+    def get_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Get an analysis (with its ID) by ID, or None."""
+        return self.analyses.get(analysis_id)
+
+    def get_analyses_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get a user's analyses (with their IDs), newest first."""
+        user_analyses = self.analyses.get_by_user(user_id)
+
+        # Sort by created_at (newest first)
+        user_analyses.sort(key=lambda x: x["created_at"], reverse=True)
+        return user_analyses
+
+    def insert_analysis(self, analysis_id: str, analysis: Dict[str, Any]) -> None:
+        """Insert an analysis."""
+        self.analyses.append(analysis_id, analysis)
+
+    def insert_analyses(self, analyses: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Insert many analyses with one append to the log."""
+        self.analyses.append_many(analyses)
+
+    def index_analyses(self, documents: Iterable[Tuple[str, str, Optional[str], Optional[str]]]) -> None:
+        """Add (analysis_id, user_id, title, content) tuples to the search index."""
+        self.search.add(documents)
+
+    def search_analyses(self, user_id: str, text: str, limit: int, offset: int) -> Tuple[int, List[Tuple[str, float]]]:
+        """Search a user's analyses, returning the total matches and a page of (analysis_id, score) pairs."""
+        return self.search.search(user_id, text, limit, offset)
+
+    def get_profile_stats(self, user_id: str) -> Dict[str, Any]:
+        """Get a user's analysis_count, trust_score_sum and recent_analyses (newest first)."""
+        return self.analyses.user_stats(user_id)
+
+    def check_profile_stats(self, repair: bool = False) -> List[str]:
+        """Get the IDs of users whose maintained profile stats are wrong, optionally rebuilding them."""
+        return self.analyses.check_stats(repair)
+
+    # Analysis content
+
+    def put_content(self, content: str) -> str:
+        """Store analysis content once, returning its hash."""
+        return self.contents.put(content)
+
+    def get_content(self, content_hash: str) -> Optional[str]:
+        """Get analysis content by hash, or None."""
+        return self.contents.get(content_hash)
+
+    # Password reset tokens
+
+    def insert_reset_token(self, token: str, data: Dict[str, Any]) -> None:
+        """Insert a password reset token."""
+        with self._lock.acquire():
+            tokens = _read_json(self.reset_tokens_file)
+            tokens[token] = data
+            _write_json(self.reset_tokens_file, tokens)
+
+    def get_reset_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Get the data of a password reset token, or None."""
+        return _read_json(self.reset_tokens_file).get(token)
+
+    def delete_reset_token(self, token: str) -> None:
+        """Delete a password reset token."""
+        with self._lock.acquire():
+            tokens = _read_json(self.reset_tokens_file)
+            if token in tokens:
+                del tokens[token]
+                _write_json(self.reset_tokens_file, tokens)
@@ -1,39 +1,71 @@
-from fastapi import FastAPI, HTTPException, Request, Depends, status, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, Depends, Query, status, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from pydantic import BaseModel, HttpUrl, EmailStr, validator
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, HttpUrl, EmailStr, validator
 import joblib
 import os
 import re
 import json
+import threading
 from urllib.parse import urlparse
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 
 # Import the URL scraper module
-from url_scraper import get_article_from_url, is_valid_url
+from url_scraper import extractor_stats, is_valid_url
+from scrape_engine import get_scrape_engine
+from scrape_cache import get_scrape_cache
 
 # Import authentication and database modules
-from auth import authenticate_user, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES
+from auth import (
+    authenticate_user_async, create_access_token, get_current_user, get_current_user_optional, get_current_admin,
+    ACCESS_TOKEN_EXPIRE_MINUTES
+)
+from passwords import get_password_hash_async, hashing_pool, HashingPoolBusy
 from database import (
     create_user, get_user_profile, create_analysis, get_analyses_by_user, get_analysis_by_id,
-    create_password_reset_token, verify_reset_token, reset_password, get_user_by_email
+    create_password_reset_token, verify_reset_token, reset_password, get_user_by_email,
+    flush_last_logins, flush_analyses, analysis_write_stats, search_analyses, iter_analyses, on_analyses_written
 )
+from db_paths import SIMILARITY_PATH
 from models import (
-    UserCreate, UserLogin, User, Token, Analysis, UserProfile, AnalysisCreate,
+    UserCreate, UserLogin, User, Token, Analysis, UserProfile, AnalysisCreate, AnalysisSearchResults,
+    SimilarAnalyses,
     PasswordResetRequest, PasswordReset
 )
 
 # Import MLOps integration
 from mlops_integration import load_models, submit_feedback, check_drift, get_model_info, MLOPS_AVAILABLE
 
+# Import the trust scoring engine
+from scoring import TrustScoringEngine
+from fact_check import get_fact_check_index
+from similarity_index import SimilarityIndex
+from export import MEDIA_TYPES, check_export, encode_analyses, export_filename
+
+# Maximum number of texts accepted by the batch scoring endpoint
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "100"))
+
+# Reuse the verdict of a prior analysis whose text has at least this cosine
+# similarity instead of scoring again (0 disables reuse)
+SIMILARITY_REUSE_THRESHOLD = float(os.environ.get("SIMILARITY_REUSE_THRESHOLD", "0.98"))
+
 # Define input models
 class NewsInput(BaseModel):
     text: str
 
+class BatchNewsInput(BaseModel):
+    texts: List[str]
+
+class SimilarInput(BaseModel):
+    text: str
+    k: int = Field(5, ge=1, le=50)
+    min_similarity: float = Field(0.0, ge=0.0, le=1.0)
+
 class UrlInput(BaseModel):
     url: str
 
@@ -113,6 +145,13 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Load models using MLOps integration
 vectorizer, classifier, models_loaded = load_models()
 
+# Create the trust scoring engine (weights and clamping come from the environment,
+# fact verification uses the local fact-check corpus)
+scoring_engine = TrustScoringEngine(vectorizer, classifier, fact_checker=get_fact_check_index()) if models_loaded else None
+
+# Index of analyzed texts, for similar-article lookup and verdict reuse
+similarity_index = SimilarityIndex(SIMILARITY_PATH, vectorizer) if models_loaded else None
+
 # Get model information
 model_info = get_model_info()
 print(f"Model info: {model_info}")
@@ -123,6 +162,46 @@ if MLOPS_AVAILABLE:
 else:
     print("MLOps integration is not available, using fallback methods")
 
+def index_analyzed_texts(analyses):
+    """
+    Add written analyses to the similarity index (run by the analysis writer, off the scoring path).
+    """
+    similarity_index.add_many([
+        (analysis_id, analysis["user_id"], analysis["content"])
+        for analysis_id, analysis in analyses if analysis.get("content")
+    ])
+
+if similarity_index is not None:
+    on_analyses_written(index_analyzed_texts)
+
+def prepare_similarity_index():
+    """
+    Add analyses stored before the similarity index existed, then load it into memory.
+    """
+    try:
+        added = similarity_index.add_missing(iter_analyses())
+        if added:
+            print(f"Added {added} analyzed texts to the similarity index")
+        print(f"Similarity index loaded with {len(similarity_index)} texts")
+    except Exception as e:
+        print(f"Warning: Could not prepare the similarity index: {e}")
+
+@app.on_event("startup")
+def startup_event():
+    """
+    Prepare the similarity index in the background, so startup is not delayed.
+    """
+    if similarity_index is not None:
+        threading.Thread(target=prepare_similarity_index, daemon=True).start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """
+    Write buffered database updates before the server stops.
+    """
+    flush_last_logins()
+    flush_analyses()
+
 # Root route
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
@@ -175,6 +254,17 @@ async def api_info():
                     "details": "Detailed analysis"
                 }
             },
+            {
+                "path": "/trust-score/batch",
+                "method": "POST",
+                "description": "Calculate trust scores for several news articles at once",
+                "parameters": {
+                    "texts": "A list of news article contents"
+                },
+                "response": {
+                    "results": "One trust score result per text, in input order"
+                }
+            },
             {
                 "path": "/analyze-url",
                 "method": "POST",
@@ -250,6 +340,36 @@ async def api_info():
                     "success": "Whether the password was reset successfully",
                     "message": "A message describing the result"
                 }
+            },
+            {
+                "path": "/users/me/analyses/search",
+                "method": "GET",
+                "description": "Search the current user's analyses by title and content (requires authentication)",
+                "parameters": {
+                    "q": "The search terms (all must match; a term ending in * matches as a prefix)",
+                    "limit": "The maximum number of results (1-100, default 20)",
+                    "offset": "The number of results to skip (default 0)",
+                    "include_content": "Whether to return the article content (default false)"
+                },
+                "response": {
+                    "total": "The total number of matching analyses",
+                    "results": "The requested page of analyses, best match first, each with its relevance score"
+                }
+            },
+            {
+                "path": "/admin/export",
+                "method": "GET",
+                "description": "Stream all analyses matching the filters as a file (requires admin privileges)",
+                "parameters": {
+                    "format": "csv, jsonl or parquet (default jsonl)",
+                    "user_id": "Only the analyses of this user",
+                    "start": "Only analyses created at or after this ISO time",
+                    "end": "Only analyses created before this ISO time",
+                    "prediction": "Only analyses with this prediction (REAL or FAKE)",
+                    "include_content": "Whether to include the article content (default false)",
+                    "gzip": "Whether to gzip-compress the file (csv and jsonl only, default false)"
+                },
+                "response": "The analyses, one per row or line"
             }
         ],
         "models_loaded": models_loaded,
@@ -293,15 +413,11 @@ def submit_model_feedback(feedback: FeedbackInput, current_user: User = Depends(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/check-drift", status_code=202)
-def trigger_drift_check(background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
+def trigger_drift_check(background_tasks: BackgroundTasks, current_user: User = Depends(get_current_admin)):
     """
     Trigger a concept drift check.
     This is an admin-only endpoint.
     """
-    # Check if the user has admin privileges (you would need to add this field to your User model)
-    if not hasattr(current_user, "is_admin") or not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin privileges required")
-
     if not MLOPS_AVAILABLE:
         raise HTTPException(status_code=503, detail="MLOps integration not available")
 
@@ -310,6 +426,42 @@ def trigger_drift_check(background_tasks: BackgroundTasks, current_user: User =
 
     return {"message": "Drift check triggered. Results will be saved to the drift directory."}
 
+@app.get("/admin/export")
+def export_all_analyses(
+    format: str = Query("jsonl", pattern="^(csv|jsonl|parquet)$"),
+    user_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    prediction: Optional[str] = Query(None, pattern="^(REAL|FAKE)$"),
+    include_content: bool = False,
+    gzip: bool = False,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Export analyses as CSV, JSON Lines or Parquet.
+    This is an admin-only endpoint.
+
+    The file is streamed as it is encoded, one batch of analyses at a time,
+    so exports of any size use the same memory.
+    """
+    try:
+        check_export(format, gzip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    # Include the analyses still queued by this worker
+    flush_analyses()
+    analyses = iter_analyses(
+        include_content=include_content, user_id=user_id, start=start, end=end, prediction=prediction
+    )
+    return StreamingResponse(
+        encode_analyses(analyses, format, include_content=include_content, gzip=gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(format, gzip)}"'}
+    )
+
 
 # Authentication endpoints
 
@@ -323,11 +475,20 @@ async def register_user(user_data: UserCreate):
         # Use full_name if provided, otherwise use username
         full_name = user_data.full_name if hasattr(user_data, 'full_name') else username
         
-        user = create_user(
+        # Reject duplicates before spending a bcrypt hash on them
+        if get_user_by_email(user_data.email):
+            raise ValueError("Email already registered")
+
+        # Hash on the dedicated pool and write the user off the event loop
+        hashed_password = await get_password_hash_async(user_data.password)
+        user = await run_in_threadpool(
+            create_user,
             email=user_data.email,
-            password=user_data.password,
+            username=username,
+            password=None,
             full_name=full_name,
-            is_google_user=user_data.is_google_user if hasattr(user_data, 'is_google_user') else False
+            is_google_user=user_data.is_google_user if hasattr(user_data, 'is_google_user') else False,
+            hashed_password=hashed_password
         )
         
         return User(
@@ -344,6 +505,12 @@ async def register_user(user_data: UserCreate):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HashingPoolBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -352,11 +519,18 @@ async def register_user(user_data: UserCreate):
 
 
 @app.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Get an access token.
     """
-    user = authenticate_user(form_data.username, form_data.password)
+    try:
+        user = await authenticate_user_async(form_data.username, form_data.password)
+    except HashingPoolBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -437,17 +611,20 @@ def reset_password_endpoint(reset: PasswordReset):
 
 
 @app.get("/users/me/analyses", response_model=List[Analysis])
-def read_user_analyses(current_user: User = Depends(get_current_user)):
+def read_user_analyses(include_content: bool = True, current_user: User = Depends(get_current_user)):
     """
     Get the current user's analyses.
+
+    Pass include_content=false to skip loading the article content
+    (content is then null), which makes listing long histories much cheaper.
     """
-    analyses = get_analyses_by_user(current_user.id)
+    analyses = get_analyses_by_user(current_user.id, include_content=include_content)
     return [
         Analysis(
             id=a["id"],
             user_id=a["user_id"],
             content_type=a["content_type"],
-            content=a["content"],
+            content=a.get("content"),
             title=a["title"],
             url=a["url"],
             prediction=a["prediction"],
@@ -462,6 +639,23 @@ def read_user_analyses(current_user: User = Depends(get_current_user)):
     ]
 
 
+@app.get("/users/me/analyses/search", response_model=AnalysisSearchResults)
+def search_user_analyses(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    include_content: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search the current user's analyses by title and content.
+
+    All terms of q must match (a term ending in * matches as a prefix).
+    Results are ranked by relevance and paginated with limit and offset.
+    """
+    return search_analyses(current_user.id, q, limit=limit, offset=offset, include_content=include_content)
+
+
 @app.get("/analyses/{analysis_id}", response_model=Analysis)
 def read_analysis(analysis_id: str, current_user: User = Depends(get_current_user)):
     """
@@ -518,17 +712,44 @@ def predict(news: NewsInput):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-import textstat
-from textblob import TextBlob
-from urllib.parse import urlparse
-import numpy as np
-import re
+def reuse_verdict(vectors, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Get the verdict of a prior analysis of a near-identical text by the same user.
+
+    Only the user's own analyses are reused: their factors and details are
+    those of another text (matched sentences, fact-checks), which other
+    users must not see.
+
+    Analyses are indexed when the write-behind queue writes them, so reuse
+    is eventually consistent: a text resubmitted within
+    ANALYSIS_FLUSH_INTERVAL of its first analysis is scored again.
+
+    Args:
+        vectors: The TF-IDF vector of the text
+        user_id: The ID of the current user (None for anonymous callers, who never reuse)
 
-KNOWN_TRUSTED_DOMAINS = ["bbc.com", "reuters.com", "nytimes.com", "theguardian.com"]
-KNOWN_UNTRUSTED_DOMAINS = ["theonion.com", "infowars.com", "breitbart.com"]
+    Returns:
+        Dict: A trust score result copied from the user's most similar prior
+            analysis, or None if none reaches SIMILARITY_REUSE_THRESHOLD
+    """
+    if SIMILARITY_REUSE_THRESHOLD <= 0 or user_id is None:
+        return None
+    matches = similarity_index.nearest(vectors, k=1, min_similarity=SIMILARITY_REUSE_THRESHOLD, user_id=user_id)
+    prior = get_analysis_by_id(matches[0][0], include_content=False) if matches else None
+    if prior is None or prior["user_id"] != user_id:
+        return None
+    return {
+        "score": int(prior["trust_score"]),
+        "trust_level": prior["trust_level"],
+        "prediction": prior["prediction"],
+        "confidence": prior["confidence"],
+        "factors": dict(prior["factors"]),
+        "details": dict(prior["details"]),
+        "reused_verdict": {"similarity": round(matches[0][2], 4)}
+    }
 
 @app.post("/trust-score")
-def get_trust_score(news: NewsInput, current_user: Optional[User] = None):
+def get_trust_score(news: NewsInput, current_user: Optional[User] = Depends(get_current_user_optional)):
     """
     Calculate a trust score for a news article.
     Authentication is optional for this endpoint.
@@ -541,80 +762,11 @@ def get_trust_score(news: NewsInput, current_user: Optional[User] = None):
         )
 
     try:
-        # Get the prediction first
-        vect_text = vectorizer.transform([news.text])
-        pred = classifier.predict(vect_text)[0]
-        proba = classifier.predict_proba(vect_text)[0]
-        confidence = proba[pred]
-
-        # Calculate trust factors
-        text = news.text.lower()
-
-        # 1. Source credibility (based on citations and references)
-        has_citations = bool(re.search(r'according to|reported by|cited|source|reference', text))
-        source_credibility = 65 + (15 if has_citations else 0) + np.random.randint(-10, 10)
-
-        # 2. Content analysis (based on text length, structure)
-        word_count = len(text.split())
-        readability = textstat.flesch_reading_ease(text)
-        readability_normalized = min(100, max(0, readability))
-        content_analysis = (40 + word_count / 20 + readability_normalized / 5) / 3 * 100
-        content_analysis = min(85, content_analysis) + np.random.randint(-5, 5)
-
-        # 3. Language analysis (check for sensationalist language)
-        sensationalist_words = ['shocking', 'amazing', 'unbelievable', 'secret', 'conspiracy',
-                               'miracle', 'incredible', 'never seen before', 'won\'t believe']
-        sensationalism_count = sum(1 for word in sensationalist_words if word in text)
-
-        # Sentiment neutrality (more neutral is better)
-        polarity = abs(TextBlob(text).sentiment.polarity)
-        language_analysis = max(30, 80 - (sensationalism_count * 10) - (polarity * 20)) + np.random.randint(-5, 5)
-
-        # 4. Fact verification (based on prediction confidence)
-        fact_verification = 50 + (confidence * 40) + np.random.randint(-10, 10)
-
-        # Calculate overall trust score (weighted average)
-        trust_score = int(round(
-            source_credibility * 0.25 +
-            content_analysis * 0.25 +
-            language_analysis * 0.25 +
-            fact_verification * 0.25
-        ))
-
-        # Ensure values are within bounds
-        trust_score = max(0, min(100, trust_score))
-        source_credibility = max(0, min(100, source_credibility))
-        content_analysis = max(0, min(100, content_analysis))
-        language_analysis = max(0, min(100, language_analysis))
-        fact_verification = max(0, min(100, fact_verification))
-
-        # Determine trust level
-        trust_level = "Low Trust"
-        if trust_score >= 70:
-            trust_level = "High Trust"
-        elif trust_score >= 50:
-            trust_level = "Medium Trust"
-
-        # Create the result
-        result = {
-            "score": trust_score,
-            "trust_level": trust_level,
-            "prediction": "REAL" if pred == 1 else "FAKE",
-            "factors": {
-                "source_credibility": int(source_credibility),
-                "content_analysis": int(content_analysis),
-                "language_analysis": int(language_analysis),
-                "fact_verification": int(fact_verification)
-            },
-            "details": {
-                "word_count": word_count,
-                "has_citations": 1 if has_citations else 0,
-                "sensationalism_level": sensationalism_count,
-                "readability_score": round(readability, 1),
-                "sentiment_polarity": round(polarity, 2),
-                "prediction_confidence": round(confidence, 2)
-            }
-        }
+        # Reuse the verdict of a near-identical article, or score the text as a batch of one
+        vectors = similarity_index.vectorize([news.text])
+        user_id = current_user.id if current_user else None
+        result = reuse_verdict(vectors, user_id) or scoring_engine.score([news.text], vectors)[0]
+        confidence = result.pop("confidence")
 
         # Save the analysis if the user is authenticated
         if current_user:
@@ -627,21 +779,82 @@ def get_trust_score(news: NewsInput, current_user: Optional[User] = None):
                 content=news.text,
                 title=text_preview,
                 url=None,
-                prediction="REAL" if pred == 1 else "FAKE",
-                confidence=float(confidence),
-                trust_score=trust_score,
-                trust_level=trust_level,
+                prediction=result["prediction"],
+                confidence=confidence,
+                trust_score=result["score"],
+                trust_level=result["trust_level"],
                 factors=result["factors"],
                 details=result["details"]
             )
+            # The analysis writer adds the text to the similarity index
             result["analysis_id"] = analysis["id"]
 
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/similar", response_model=SimilarAnalyses)
+def find_similar_analyses(query: SimilarInput, current_user: User = Depends(get_current_user)):
+    """
+    Find prior analyses of articles similar to a text, by cosine similarity
+    of their TF-IDF vectors.
+
+    Matches include the verdict of every similar analysis; the analysis ID
+    and title are only returned for the current user's own analyses.
+    """
+    if not models_loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Models are not loaded. The API is in limited functionality mode."
+        )
+
+    vectors = similarity_index.vectorize([query.text])
+    results = []
+    for analysis_id, user_id, similarity in similarity_index.nearest(vectors, query.k, query.min_similarity):
+        analysis = get_analysis_by_id(analysis_id, include_content=False)
+        if analysis is None:
+            continue
+        own = user_id == current_user.id
+        results.append({
+            "analysis_id": analysis_id if own else None,
+            "title": analysis["title"] if own else None,
+            "similarity": similarity,
+            "prediction": analysis["prediction"],
+            "trust_score": analysis["trust_score"],
+            "trust_level": analysis["trust_level"],
+            "created_at": analysis["created_at"]
+        })
+    return {"results": results}
+
+@app.post("/trust-score/batch")
+def get_trust_scores(batch: BatchNewsInput):
+    """
+    Calculate trust scores for several news articles in one request.
+    Results are returned in the same order as the input texts.
+    """
+    # Check if models are loaded
+    if not models_loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Models are not loaded. The API is in limited functionality mode."
+        )
+
+    if len(batch.texts) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size exceeds the maximum of {MAX_BATCH_SIZE} texts"
+        )
+
+    try:
+        results = scoring_engine.score(batch.texts)
+        for result in results:
+            result.pop("confidence")
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/extract-url")
-def extract_url(url_input: UrlInput):
+async def extract_url(url_input: UrlInput):
     """
     Extract content from a URL.
     This endpoint is public and does not require authentication.
@@ -653,7 +866,7 @@ def extract_url(url_input: UrlInput):
         raise HTTPException(status_code=400, detail="Invalid URL format")
 
     # Extract the article content
-    article = get_article_from_url(url)
+    article = await get_scrape_engine().get_article(url)
 
     if not article:
         raise HTTPException(status_code=404, detail="Failed to extract content from the URL")
@@ -763,7 +976,7 @@ async def analyze_url(request: Request):
 
     # Extract the article content
     print(f"Fetching article from URL: {url}")
-    article = get_article_from_url(url)
+    article = await get_scrape_engine().get_article(url)
 
     if not article:
         raise HTTPException(status_code=404, detail="Failed to extract content from the URL")
@@ -772,11 +985,12 @@ async def analyze_url(request: Request):
     news_input = NewsInput(text=article["content"])
 
     try:
-        # Get the prediction
-        prediction_result = predict(news_input)
+        # Get the prediction and trust score off the event loop, so other
+        # downloads keep going while the text is scored
+        prediction_result = await run_in_threadpool(predict, news_input)
 
         # Get the trust score
-        trust_score_result = get_trust_score(news_input)
+        trust_score_result = await run_in_threadpool(get_trust_score, news_input, current_user=None)
 
         # Adjust trust score based on source credibility
         adjusted_trust_score = trust_score_result["score"]
@@ -853,29 +1067,6 @@ async def analyze_url(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def calculate_trust_score(text: str, model_confidence: float, url: str = None) -> float:
-    trust = model_confidence * 100
-
-    # 1. Domain-based score
-    domain_score = 0
-    if url:
-        domain = urlparse(url).netloc.replace("www.", "")
-        if domain in KNOWN_TRUSTED_DOMAINS:
-            domain_score = +10
-        elif domain in KNOWN_UNTRUSTED_DOMAINS:
-            domain_score = -15
-
-    # 2. Readability: the easier, the more trustworthy?
-    readability = textstat.flesch_reading_ease(text)
-    readability_score = (readability - 30) / 70 * 10  # Normalize to ~10 pts range
-
-    # 3. Sentiment neutrality
-    polarity = abs(TextBlob(text).sentiment.polarity)
-    sentiment_score = (1 - polarity) * 10  # Closer to 0 → more neutral → better
-
-    final_score = trust + domain_score + readability_score + sentiment_score
-    return max(0, min(100, round(final_score, 2)))
-
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -889,7 +1080,13 @@ async def health_check():
             "api_info": {
                 "title": app.title,
                 "description": app.description
-            }
+            },
+            "hashing_pool": hashing_pool.stats(),
+            "analysis_writes": analysis_write_stats(),
+            "scrape_engine": get_scrape_engine().stats(),
+            "http_client": get_scrape_engine().client.stats(),
+            "extractors": extractor_stats.stats(),
+            "scrape_cache": get_scrape_cache().stats()
         }
     except Exception as e:
         return JSONResponse(
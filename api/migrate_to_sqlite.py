@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""
+Migrate the JSON database files to SQLite.
+
+Reads users.json, analyses.json and reset_tokens.json from the database
+directory and imports them into the SQLite database used by DB_BACKEND=sqlite.
+Existing records are kept, so the migration can be re-run safely.
+
+Usage:
+    python migrate_to_sqlite.py [--db-dir DIR] [--sqlite-path PATH]
+"""
+
+import argparse
+
+from db_paths import DB_DIR, SQLITE_PATH
+from sqlite_store import SqliteStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the JSON database files to SQLite")
+    parser.add_argument("--db-dir", default=DB_DIR, help="Directory containing the JSON files")
+    parser.add_argument("--sqlite-path", default=SQLITE_PATH, help="Path of the SQLite database")
+    args = parser.parse_args()
+
+    store = SqliteStore(args.sqlite_path)
+    counts = store.migrate_from_json(args.db_dir)
+
+    print(f"Migrated {args.db_dir} to {args.sqlite_path}:")
+    for name, count in counts.items():
+        print(f"  {name}: {count}")
+    print("Set DB_BACKEND=sqlite to use the SQLite database.")
+
+
+if __name__ == "__main__":
+    main()
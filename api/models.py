@@ -37,6 +37,7 @@ class User(BaseModel):
     created_at: datetime
     last_login: Optional[datetime] = None
     is_active: bool = True
+    is_admin: bool = False
 
     class Config:
         orm_mode = True
@@ -80,6 +81,7 @@ class AnalysisCreate(AnalysisBase):
 
 class Analysis(AnalysisBase):
     """Analysis model."""
+    content: Optional[str] = None  # None when the content was not requested
     id: str
     user_id: str
     prediction: str
@@ -94,6 +96,36 @@ class Analysis(AnalysisBase):
         orm_mode = True
 
 
+class AnalysisSearchResult(Analysis):
+    """Analysis found by a search, with its relevance score."""
+    score: float
+
+
+class AnalysisSearchResults(BaseModel):
+    """A page of search results."""
+    query: str
+    total: int
+    limit: int
+    offset: int
+    results: List[AnalysisSearchResult]
+
+
+class SimilarAnalysis(BaseModel):
+    """Prior analysis of a similar article."""
+    analysis_id: Optional[str] = None  # Only for the user's own analyses
+    title: Optional[str] = None  # Only for the user's own analyses
+    similarity: float
+    prediction: str
+    trust_score: float
+    trust_level: str
+    created_at: datetime
+
+
+class SimilarAnalyses(BaseModel):
+    """Prior analyses of similar articles, most similar first."""
+    results: List[SimilarAnalysis]
+
+
 class UserProfile(BaseModel):
     """User profile model."""
     user: User
@@ -0,0 +1,210 @@
+"""
+Password hashing module for the Fake News Detector API.
+
+This module runs bcrypt on a dedicated, bounded thread pool so that slow
+hashes never block the event loop or the request thread pool.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from passlib.context import CryptContext
+
+# bcrypt cost factor (each increment doubles the hashing time)
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+
+# Number of threads dedicated to password hashing
+HASH_POOL_WORKERS = int(os.environ.get("HASH_POOL_WORKERS", "2"))
+
+# Maximum number of hashing jobs waiting or running before new ones are rejected
+HASH_POOL_MAX_PENDING = int(os.environ.get("HASH_POOL_MAX_PENDING", "64"))
+
+# Configure password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class HashingPoolBusy(RuntimeError):
+    """Raised when the hashing pool queue is full."""
+
+
+class HashingPool:
+    """
+    Bounded executor for password hashing.
+
+    At most max_workers hashes run at once and at most max_pending jobs are
+    accepted; further jobs are rejected with HashingPoolBusy instead of
+    piling up. Queue and timing metrics are available from stats().
+    """
+
+    def __init__(self, max_workers: int = HASH_POOL_WORKERS, max_pending: int = HASH_POOL_MAX_PENDING):
+        """
+        Initialize the hashing pool.
+
+        Args:
+            max_workers: The number of hashing threads
+            max_pending: The maximum number of queued or running jobs
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_time = 0.0
+        self._run_time = 0.0
+        self._max_wait_time = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Submit a hashing job.
+
+        Args:
+            fn: The function to run
+            *args: The function arguments
+
+        Returns:
+            Future: The future of the job
+
+        Raises:
+            HashingPoolBusy: If the pool already has max_pending jobs
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HashingPoolBusy("Password hashing queue is full")
+            self._pending += 1
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                wait = started_at - submitted_at
+                self._wait_time += wait
+                self._max_wait_time = max(self._max_wait_time, wait)
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self._completed += 1
+                    self._run_time += time.perf_counter() - started_at
+
+        try:
+            return self._executor.submit(job)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a hashing job and wait for its result (for synchronous callers).
+
+        Args:
+            fn: The function to run
+            *args: The function arguments
+
+        Returns:
+            Any: The result of the function
+        """
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a hashing job without blocking the event loop.
+
+        Args:
+            fn: The function to run
+            *args: The function arguments
+
+        Returns:
+            Any: The result of the function
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dict: Queue depth, throughput and timing metrics
+        """
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+                "queued": self._pending - self._running,
+                "running": self._running,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_time / completed * 1000, 2) if completed else 0.0,
+                "max_wait_ms": round(self._max_wait_time * 1000, 2),
+                "avg_hash_ms": round(self._run_time / completed * 1000, 2) if completed else 0.0
+            }
+
+
+hashing_pool = HashingPool()
+
+
+def get_password_hash(password: str) -> str:
+    """
+    Hash a password.
+
+    Args:
+        password: The password to hash
+
+    Returns:
+        str: The hashed password
+    """
+    return hashing_pool.run(pwd_context.hash, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against a hash.
+
+    Args:
+        plain_password: The plain text password
+        hashed_password: The hashed password
+
+    Returns:
+        bool: True if the password matches, False otherwise
+    """
+    return hashing_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password without blocking the event loop.
+
+    Args:
+        password: The password to hash
+
+    Returns:
+        str: The hashed password
+    """
+    return await hashing_pool.run_async(pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against a hash without blocking the event loop.
+
+    Args:
+        plain_password: The plain text password
+        hashed_password: The hashed password
+
+    Returns:
+        bool: True if the password matches, False otherwise
+    """
+    return await hashing_pool.run_async(pwd_context.verify, plain_password, hashed_password)
@@ -0,0 +1,326 @@
+"""
+Trust scoring module for the Fake News Detector API.
+
+This module provides a batch scoring engine that computes the four trust
+factors (source credibility, content analysis, language analysis and fact
+verification) as NumPy arrays over many documents at once.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import textstat
+from textblob import TextBlob
+
+# Order of the columns in the factor matrix
+FACTOR_NAMES = (
+    "source_credibility",
+    "content_analysis",
+    "language_analysis",
+    "fact_verification",
+)
+
+# Phrases that indicate the article cites its sources
+CITATION_PATTERN = re.compile(r'according to|reported by|cited|source|reference')
+
+# Sensationalist vocabulary, matched as a single alternation instead of one scan per word
+SENSATIONALIST_WORDS = [
+    'shocking', 'amazing', 'unbelievable', 'secret', 'conspiracy',
+    'miracle', 'incredible', 'never seen before', 'won\'t believe'
+]
+SENSATIONALIST_PATTERN = re.compile("|".join(re.escape(word) for word in SENSATIONALIST_WORDS))
+
+
+def _parse_float_list(value: Optional[str], expected: int) -> Optional[List[float]]:
+    """
+    Parse a comma-separated list of floats from an environment variable.
+
+    Args:
+        value: The raw value, or None if unset
+        expected: The number of values expected
+
+    Returns:
+        List[float]: The parsed values, or None if unset or malformed
+    """
+    if not value:
+        return None
+    try:
+        values = [float(v) for v in value.split(",")]
+    except ValueError:
+        print(f"Warning: Could not parse '{value}' as a list of numbers, using defaults")
+        return None
+    if len(values) != expected:
+        print(f"Warning: Expected {expected} values in '{value}', using defaults")
+        return None
+    return values
+
+
+class ScoringConfig:
+    """
+    Configuration for the trust scoring engine.
+
+    Weights are normalised so the trust score stays a weighted average of the
+    factors. Factor and overall scores are clamped to their configured ranges.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        factor_range: Tuple[float, float] = (0, 100),
+        score_range: Tuple[float, float] = (0, 100),
+        noise: bool = True,
+        seed: Optional[int] = None,
+        high_trust_threshold: float = 70,
+        medium_trust_threshold: float = 50
+    ):
+        """
+        Initialize the scoring configuration.
+
+        Args:
+            weights: Weight of each factor, keyed by factor name
+            factor_range: (min, max) bounds for each factor
+            score_range: (min, max) bounds for the overall trust score
+            noise: Whether to add random jitter to the factors
+            seed: Seed for the jitter random generator
+            high_trust_threshold: Minimum score for "High Trust"
+            medium_trust_threshold: Minimum score for "Medium Trust"
+        """
+        weights = weights or {name: 0.25 for name in FACTOR_NAMES}
+        missing = [name for name in FACTOR_NAMES if name not in weights]
+        if missing:
+            raise ValueError(f"Missing weights for factors: {', '.join(missing)}")
+
+        weight_vector = np.array([weights[name] for name in FACTOR_NAMES], dtype=np.float64)
+        if np.any(weight_vector < 0) or weight_vector.sum() <= 0:
+            raise ValueError("Factor weights must be non-negative and sum to a positive value")
+
+        self.weights = weight_vector / weight_vector.sum()
+        self.factor_range = factor_range
+        self.score_range = score_range
+        self.noise = noise
+        self.seed = seed
+        self.high_trust_threshold = high_trust_threshold
+        self.medium_trust_threshold = medium_trust_threshold
+
+    @classmethod
+    def from_env(cls) -> "ScoringConfig":
+        """
+        Build a configuration from environment variables.
+
+        TRUST_WEIGHTS takes four comma-separated weights in FACTOR_NAMES order,
+        TRUST_FACTOR_RANGE and TRUST_SCORE_RANGE take "min,max".
+
+        Returns:
+            ScoringConfig: The configuration
+        """
+        weights = _parse_float_list(os.environ.get("TRUST_WEIGHTS"), len(FACTOR_NAMES))
+        factor_range = _parse_float_list(os.environ.get("TRUST_FACTOR_RANGE"), 2) or (0, 100)
+        score_range = _parse_float_list(os.environ.get("TRUST_SCORE_RANGE"), 2) or (0, 100)
+        seed = os.environ.get("TRUST_NOISE_SEED")
+
+        return cls(
+            weights=dict(zip(FACTOR_NAMES, weights)) if weights else None,
+            factor_range=tuple(factor_range),
+            score_range=tuple(score_range),
+            noise=os.environ.get("TRUST_NOISE", "true").lower() == "true",
+            seed=int(seed) if seed else None
+        )
+
+
+class TrustScoringEngine:
+    """
+    Computes trust scores for batches of documents.
+
+    The classifier runs once per batch, per-document text features are
+    extracted in a single pass, and all factor arithmetic, jitter and
+    clamping is done on NumPy arrays.
+    """
+
+    def __init__(self, vectorizer: Any, classifier: Any, config: Optional[ScoringConfig] = None,
+                 fact_checker: Any = None):
+        """
+        Initialize the scoring engine.
+
+        Args:
+            vectorizer: The fitted TF-IDF vectorizer
+            classifier: The fitted classifier
+            config: The scoring configuration (default: from environment)
+            fact_checker: The fact-check index used by the fact verification
+                factor (default: none, the factor follows the prediction confidence)
+        """
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+        self.config = config or ScoringConfig.from_env()
+        self.fact_checker = fact_checker
+        self.rng = np.random.default_rng(self.config.seed)
+
+    def predict(self, texts: Sequence[str], vectors: Any = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predict labels and confidences for a batch of texts.
+
+        Args:
+            texts: The article texts
+            vectors: Their TF-IDF vectors, if already computed
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The predicted labels (1 = REAL) and their confidences
+        """
+        vect_texts = self.vectorizer.transform(texts) if vectors is None else vectors
+        proba = self.classifier.predict_proba(vect_texts)
+        best = proba.argmax(axis=1)
+        labels = np.asarray(self.classifier.classes_)[best]
+        confidences = proba[np.arange(len(best)), best]
+        return labels, confidences
+
+    def extract_features(self, texts: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Extract the per-document text features used by the factors.
+
+        Args:
+            texts: The article texts
+
+        Returns:
+            Dict[str, np.ndarray]: One array per feature, aligned with texts
+        """
+        n = len(texts)
+        word_count = np.empty(n, dtype=np.int64)
+        has_citations = np.empty(n, dtype=bool)
+        sensationalism = np.empty(n, dtype=np.int64)
+        readability = np.empty(n, dtype=np.float64)
+        polarity = np.empty(n, dtype=np.float64)
+        fact_rating = np.zeros(n, dtype=np.float64)
+        fact_weight = np.zeros(n, dtype=np.float64)
+        fact_checks: List[List[Dict[str, Any]]] = [[] for _ in range(n)]
+
+        for i, raw_text in enumerate(texts):
+            text = raw_text.lower()
+            word_count[i] = len(text.split())
+            has_citations[i] = CITATION_PATTERN.search(text) is not None
+            sensationalism[i] = len(set(SENSATIONALIST_PATTERN.findall(text)))
+            readability[i] = textstat.flesch_reading_ease(text)
+            polarity[i] = abs(TextBlob(text).sentiment.polarity)
+            if self.fact_checker is not None:
+                matches = self.fact_checker.check(raw_text)
+                fact_checks[i] = matches
+                # Claims the article disputes are reported, not scored
+                evidence = self.fact_checker.evidence(matches)
+                if evidence:
+                    strengths = np.array([match["match"] for match in evidence])
+                    ratings = np.array([match["rating"] for match in evidence])
+                    fact_rating[i] = strengths @ ratings / strengths.sum()
+                    fact_weight[i] = strengths.max()
+
+        return {
+            "word_count": word_count,
+            "has_citations": has_citations,
+            "sensationalism": sensationalism,
+            "readability": readability,
+            "polarity": polarity,
+            "fact_rating": fact_rating,
+            "fact_weight": fact_weight,
+            "fact_checks": fact_checks,
+        }
+
+    def _jitter(self, low: int, high: int, n: int) -> np.ndarray:
+        """Random integer jitter in [low, high), or zeros when noise is disabled."""
+        if not self.config.noise:
+            return np.zeros(n, dtype=np.float64)
+        return self.rng.integers(low, high, size=n).astype(np.float64)
+
+    def compute_factors(self, features: Dict[str, np.ndarray], confidences: np.ndarray) -> np.ndarray:
+        """
+        Compute the unclamped factor matrix.
+
+        Args:
+            features: The features returned by extract_features
+            confidences: The prediction confidences
+
+        Returns:
+            np.ndarray: A (documents, factors) matrix in FACTOR_NAMES order
+        """
+        n = len(confidences)
+        factors = np.empty((n, len(FACTOR_NAMES)), dtype=np.float64)
+
+        # 1. Source credibility (based on citations and references)
+        factors[:, 0] = 65 + 15 * features["has_citations"] + self._jitter(-10, 10, n)
+
+        # 2. Content analysis (based on text length, structure)
+        readability_normalized = np.clip(features["readability"], 0, 100)
+        content = (40 + features["word_count"] / 20 + readability_normalized / 5) / 3 * 100
+        factors[:, 1] = np.minimum(85, content) + self._jitter(-5, 5, n)
+
+        # 3. Language analysis (sensationalist language and sentiment neutrality)
+        language = 80 - features["sensationalism"] * 10 - features["polarity"] * 20
+        factors[:, 2] = np.maximum(30, language) + self._jitter(-5, 5, n)
+
+        # 4. Fact verification (verdicts of matching fact-checks, weighted by
+        # how closely they match; the prediction confidence without evidence)
+        confidence_based = 50 + confidences * 40 + self._jitter(-10, 10, n)
+        weight = features["fact_weight"]
+        factors[:, 3] = weight * 100 * features["fact_rating"] + (1 - weight) * confidence_based
+
+        return factors
+
+    def trust_levels(self, scores: np.ndarray) -> List[str]:
+        """
+        Map trust scores to trust levels.
+
+        Args:
+            scores: The trust scores
+
+        Returns:
+            List[str]: The trust level of each score
+        """
+        levels = np.where(
+            scores >= self.config.high_trust_threshold, "High Trust",
+            np.where(scores >= self.config.medium_trust_threshold, "Medium Trust", "Low Trust")
+        )
+        return levels.tolist()
+
+    def score(self, texts: Sequence[str], vectors: Any = None) -> List[Dict[str, Any]]:
+        """
+        Calculate trust scores for a batch of texts.
+
+        Args:
+            texts: The article texts
+            vectors: Their TF-IDF vectors, if already computed
+
+        Returns:
+            List[Dict]: One trust score result per text, in the /trust-score response format
+        """
+        if not texts:
+            return []
+
+        labels, confidences = self.predict(texts, vectors)
+        features = self.extract_features(texts)
+        factors = self.compute_factors(features, confidences)
+
+        # Weighted average of the unclamped factors, then clamp everything
+        scores = np.clip(np.rint(factors @ self.config.weights), *self.config.score_range).astype(np.int64)
+        factors = np.clip(factors, *self.config.factor_range).astype(np.int64)
+        levels = self.trust_levels(scores)
+
+        results = []
+        for i in range(len(texts)):
+            results.append({
+                "score": int(scores[i]),
+                "trust_level": levels[i],
+                "prediction": "REAL" if labels[i] == 1 else "FAKE",
+                "confidence": float(confidences[i]),
+                "factors": {name: int(factors[i, j]) for j, name in enumerate(FACTOR_NAMES)},
+                "details": {
+                    "word_count": int(features["word_count"][i]),
+                    "has_citations": int(features["has_citations"][i]),
+                    "sensationalism_level": int(features["sensationalism"][i]),
+                    "readability_score": round(float(features["readability"][i]), 1),
+                    "sentiment_polarity": round(float(features["polarity"][i]), 2),
+                    "prediction_confidence": round(float(confidences[i]), 2),
+                    "fact_checks": [
+                        {key: match[key] for key in ("claim", "verdict", "source", "url", "sentence", "match")}
+                        for match in features["fact_checks"][i]
+                    ]
+                }
+            })
+        return results
@@ -0,0 +1,553 @@
+"""
+Scrape cache for the Fake News Detector.
+
+Extracted articles are cached in two tiers: an LRU dictionary in each worker
+process, bounded in bytes, in front of an SQLite file shared by all workers,
+also bounded in bytes. Entries expire after a TTL. A background thread
+deletes expired entries from the disk tier and, when it is over its budget,
+the least recently used ones, so the cache does not grow without bound.
+
+Entries are stored with the ETag and Last-Modified validators of the page.
+Expired entries that have them are kept for a grace period, so the page can
+be revalidated with a conditional request and, if it has not changed, the
+entry refreshed without extracting the article again.
+
+Aliases map the key of a page to the key of its canonical address, once
+that address was found to serve the same article.
+
+URLs whose extraction failed are remembered with the reason for a short
+time in the disk tier, so repeated requests for a broken or paywalled page
+fail at once instead of downloading and parsing it again.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("scrape-cache")
+
+# Directory of the scrape cache (a Docker volume in the API image)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# SQLite file of the disk tier
+SCRAPE_CACHE_PATH = os.environ.get("SCRAPE_CACHE_PATH", os.path.join(CACHE_DIR, "articles.db"))
+
+# How long (in seconds) a cached article is used
+SCRAPE_CACHE_TTL = float(os.environ.get("SCRAPE_CACHE_TTL", str(24 * 3600)))
+
+# Byte budgets of the memory tier (per worker process) and of the disk tier
+SCRAPE_CACHE_MEMORY_BYTES = int(os.environ.get("SCRAPE_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+SCRAPE_CACHE_DISK_BYTES = int(os.environ.get("SCRAPE_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+
+# How long (in seconds) an expired entry with validators is kept for revalidation
+SCRAPE_CACHE_STALE_GRACE = float(os.environ.get("SCRAPE_CACHE_STALE_GRACE", str(7 * 24 * 3600)))
+
+# How long (in seconds) a failed extraction is remembered
+SCRAPE_FAILURE_TTL = float(os.environ.get("SCRAPE_FAILURE_TTL", "300"))
+
+# Seconds between background cleanups of the disk tier (0 disables them)
+SCRAPE_CACHE_CLEANUP_INTERVAL = float(os.environ.get("SCRAPE_CACHE_CLEANUP_INTERVAL", "300"))
+
+# A cleanup of the disk tier over its budget evicts down to this share of the budget
+EVICTION_TARGET = 0.9
+
+# The last access time of a disk tier entry (which decides evictions) is
+# updated at most this often, in seconds, so most hits do not write
+ACCESS_UPDATE_INTERVAL = 60
+
+# Disk tier entries evicted per batch
+EVICTION_BATCH = 500
+
+# Files of the previous cache: one JSON file per MD5 hash of the URL
+LEGACY_FILE_PATTERN = re.compile(r"^[0-9a-f]{32}\.json$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrape_cache (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS scrape_cache_expires ON scrape_cache (expires_at);
+CREATE INDEX IF NOT EXISTS scrape_cache_accessed ON scrape_cache (accessed_at);
+CREATE TABLE IF NOT EXISTS scrape_failures (
+    key TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    status INTEGER,
+    elapsed REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scrape_failures_expires ON scrape_failures (expires_at);
+CREATE TABLE IF NOT EXISTS scrape_aliases (
+    key TEXT PRIMARY KEY,
+    target TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scrape_aliases_expires ON scrape_aliases (expires_at);
+"""
+
+
+class ScrapeCache:
+    """
+    Two-tier cache of JSON-serializable dictionaries, keyed by URL.
+
+    Thread-safe. Values are returned as shallow copies, so callers may add
+    keys to them without changing the cached value.
+    """
+
+    def __init__(
+        self,
+        path: str = SCRAPE_CACHE_PATH,
+        ttl: float = SCRAPE_CACHE_TTL,
+        memory_bytes: int = SCRAPE_CACHE_MEMORY_BYTES,
+        disk_bytes: int = SCRAPE_CACHE_DISK_BYTES,
+        failure_ttl: float = SCRAPE_FAILURE_TTL,
+        stale_grace: float = SCRAPE_CACHE_STALE_GRACE
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: The path of the SQLite file of the disk tier
+            ttl: How long (in seconds) an entry is used
+            memory_bytes: The byte budget of the memory tier
+            disk_bytes: The byte budget of the disk tier
+            failure_ttl: How long (in seconds) a failure is remembered
+            stale_grace: How long (in seconds) an expired entry with validators is kept
+        """
+        self.path = path
+        self.ttl = ttl
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.failure_ttl = failure_ttl
+        self.stale_grace = stale_grace
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # key -> (expires_at, size, value), least recently used first
+        self._memory: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._memory_used = 0
+        self._counts = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0,
+            "memory_evictions": 0, "disk_evictions": 0, "expired": 0,
+            "failure_hits": 0, "failure_writes": 0, "revalidations": 0, "not_modified": 0,
+            "alias_hits": 0,
+        }
+        # Seconds the failed attempts took, summed over the requests that reused their failure
+        self._seconds_saved = 0.0
+        # Size of the disk tier as of the last cleanup plus the writes since,
+        # so a cleanup is started early when the budget is exceeded
+        self._disk_used = 0
+        self._cleanup_due = threading.Event()
+        self._cleaner: Optional[threading.Thread] = None
+
+        with self._connect() as conn:
+            # Caches created before revalidation lack the validators
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(scrape_cache)")}
+            if columns and "etag" not in columns:
+                conn.execute("ALTER TABLE scrape_cache ADD COLUMN etag TEXT")
+                conn.execute("ALTER TABLE scrape_cache ADD COLUMN last_modified TEXT")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def _remember(self, key: str, expires_at: float, size: int, value: Dict[str, Any]) -> None:
+        """Put an entry in the memory tier, evicting the least recently used ones beyond its budget."""
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_used -= old[1]
+            self._memory[key] = (expires_at, size, value)
+            self._memory_used += size
+            while self._memory_used > self.memory_bytes:
+                _, (_, evicted_size, _) = self._memory.popitem(last=False)
+                self._memory_used -= evicted_size
+                self._counts["memory_evictions"] += 1
+
+    def _forget(self, key: str) -> None:
+        """Drop an entry from the memory tier."""
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_used -= old[1]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached value, from memory if possible.
+
+        Args:
+            key: The key (URL)
+
+        Returns:
+            Dict: A copy of the value, or None if it is not cached or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                return dict(entry[2])
+
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT data, expires_at, accessed_at FROM scrape_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            if entry is not None:
+                self._forget(key)
+            self._count("misses")
+            return None
+        if now - row[2] > ACCESS_UPDATE_INTERVAL:
+            with conn:
+                conn.execute("UPDATE scrape_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        raw = zlib.decompress(row[0])
+        value = json.loads(raw)
+        self._remember(key, row[1], len(raw), value)
+        self._count("disk_hits")
+        return dict(value)
+
+    def get_stale(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, str]]]:
+        """
+        Get an entry that can be revalidated, expired or not.
+
+        Args:
+            key: The key (URL)
+
+        Returns:
+            Tuple[Dict, Dict]: A copy of the value and its validators
+                ("ETag" and/or "Last-Modified"), or None if the key is not
+                cached or was stored without validators
+        """
+        row = self._connect().execute(
+            "SELECT data, etag, last_modified FROM scrape_cache "
+            "WHERE key = ? AND (etag IS NOT NULL OR last_modified IS NOT NULL)",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        validators = {name: value for name, value in (("ETag", row[1]), ("Last-Modified", row[2])) if value}
+        self._count("revalidations")
+        return json.loads(zlib.decompress(row[0])), validators
+
+    def refresh(
+        self, key: str, ttl: Optional[float] = None, validators: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Use an entry for another TTL, after the page was found not to have changed.
+
+        Args:
+            key: The key (URL)
+            ttl: How long (in seconds) the value is used (default: the cache's TTL)
+            validators: New validators of the page, replacing the stored ones
+
+        Returns:
+            Dict: A copy of the value, or None if the key is no longer cached
+        """
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        validators = validators or {}
+        conn = self._connect()
+        with conn:
+            row = conn.execute("SELECT data FROM scrape_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE scrape_cache SET expires_at = ?, accessed_at = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (expires_at, now, validators.get("ETag"), validators.get("Last-Modified"), key)
+            )
+        raw = zlib.decompress(row[0])
+        value = json.loads(raw)
+        self._remember(key, expires_at, len(raw), value)
+        self._count("not_modified")
+        return dict(value)
+
+    def put(
+        self, key: str, value: Dict[str, Any], ttl: Optional[float] = None, validators: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Cache a value in both tiers.
+
+        Args:
+            key: The key (URL)
+            value: The JSON-serializable value
+            ttl: How long (in seconds) the value is used (default: the cache's TTL)
+            validators: The "ETag" and "Last-Modified" validators of the page, if any
+        """
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        data = zlib.compress(raw)
+        # Values take their JSON size in memory (roughly) and their compressed size on disk
+        size = len(data) + len(key)
+        validators = validators or {}
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (key, data, size, expires_at, accessed_at, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, data, size, expires_at, now, validators.get("ETag"), validators.get("Last-Modified"))
+            )
+        self._remember(key, expires_at, len(raw), dict(value))
+        with self._lock:
+            self._counts["writes"] += 1
+            self._disk_used += size
+            if self._disk_used > self.disk_bytes:
+                self._cleanup_due.set()
+
+    def delete(self, key: str) -> None:
+        """Drop a cached value from both tiers."""
+        self._forget(key)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scrape_cache WHERE key = ?", (key,))
+
+    def get_failure(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the remembered failure of a key.
+
+        Args:
+            key: The key (URL)
+
+        Returns:
+            Dict: The reason, the HTTP status (or None) and the seconds the
+                failed attempt took, or None if no unexpired failure is remembered
+        """
+        row = self._connect().execute(
+            "SELECT reason, status, elapsed FROM scrape_failures WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self._counts["failure_hits"] += 1
+            self._seconds_saved += row[2]
+        return {"reason": row[0], "status": row[1], "elapsed": row[2]}
+
+    def put_failure(
+        self, key: str, reason: str, status: Optional[int] = None, elapsed: float = 0.0, ttl: Optional[float] = None
+    ) -> None:
+        """
+        Remember that a key failed.
+
+        Args:
+            key: The key (URL)
+            reason: Why it failed (such as "http_status", "timeout" or "too_short")
+            status: The HTTP status of the response, if any
+            elapsed: The seconds the failed attempt took
+            ttl: How long (in seconds) the failure is remembered (default: the cache's failure TTL)
+        """
+        expires_at = time.time() + (self.failure_ttl if ttl is None else ttl)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scrape_failures (key, reason, status, elapsed, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, reason, status, elapsed, expires_at)
+            )
+        self._count("failure_writes")
+
+    def get_alias(self, key: str) -> Optional[str]:
+        """
+        Get the key an alias stands for.
+
+        Args:
+            key: The alias
+
+        Returns:
+            str: The key the value is cached under, or None if the key is not an alias
+        """
+        row = self._connect().execute(
+            "SELECT target FROM scrape_aliases WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        self._count("alias_hits")
+        return row[0]
+
+    def put_alias(self, key: str, target: str) -> None:
+        """
+        Make a key an alias of another, for as long as an entry can be kept (TTL and grace period).
+
+        Args:
+            key: The alias
+            target: The key the value is cached under
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scrape_aliases (key, target, expires_at) VALUES (?, ?, ?)",
+                (key, target, time.time() + self.ttl + self.stale_grace)
+            )
+
+    def disk_usage(self) -> Tuple[int, int]:
+        """
+        Get the size of the disk tier.
+
+        Returns:
+            Tuple[int, int]: The number of entries and their total size in bytes
+        """
+        row = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()
+        return row[0], row[1]
+
+    def cleanup(self) -> Tuple[int, int]:
+        """
+        Delete the expired entries (past the grace period if they have validators), failures and aliases,
+        then the least recently used entries of the disk tier while it is over budget.
+
+        Returns:
+            Tuple[int, int]: The number of expired and of evicted entries deleted
+        """
+        now = time.time()
+        with self._lock:
+            for key in [key for key, (expires_at, _, _) in self._memory.items() if expires_at <= now]:
+                self._memory_used -= self._memory.pop(key)[1]
+
+        conn = self._connect()
+        with conn:
+            # Entries with validators are kept for revalidation until the grace period ends
+            expired = conn.execute(
+                "DELETE FROM scrape_cache WHERE expires_at <= ? "
+                "AND (expires_at <= ? OR (etag IS NULL AND last_modified IS NULL))",
+                (now, now - self.stale_grace)
+            ).rowcount
+            expired += conn.execute("DELETE FROM scrape_failures WHERE expires_at <= ?", (now,)).rowcount
+            expired += conn.execute("DELETE FROM scrape_aliases WHERE expires_at <= ?", (now,)).rowcount
+
+        evicted = 0
+        _, used = self.disk_usage()
+        if used > self.disk_bytes:
+            target = int(self.disk_bytes * EVICTION_TARGET)
+            while used > target:
+                rows = conn.execute(
+                    "SELECT key, size FROM scrape_cache ORDER BY accessed_at LIMIT ?", (EVICTION_BATCH,)
+                ).fetchall()
+                if not rows:
+                    break
+                keys = []
+                for key, size in rows:
+                    if used <= target:
+                        break
+                    keys.append((key,))
+                    used -= size
+                with conn:
+                    conn.executemany("DELETE FROM scrape_cache WHERE key = ?", keys)
+                evicted += len(keys)
+
+        with self._lock:
+            self._counts["expired"] += expired
+            self._counts["disk_evictions"] += evicted
+            self._disk_used = used
+        if expired or evicted:
+            logger.info(f"Scrape cache cleanup: {expired} expired and {evicted} evicted entries deleted")
+        return expired, evicted
+
+    def remove_legacy_files(self) -> int:
+        """
+        Delete the JSON files of the previous cache (one per URL hash) from the cache directory.
+
+        Returns:
+            int: The number of files deleted
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        removed = 0
+        for name in os.listdir(directory):
+            if LEGACY_FILE_PATTERN.match(name):
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except OSError:
+                    pass
+        if removed:
+            logger.info(f"Deleted {removed} files of the previous scrape cache from {directory}")
+        return removed
+
+    def start_cleanup(self, interval: float = SCRAPE_CACHE_CLEANUP_INTERVAL) -> None:
+        """
+        Start the background cleanup thread, unless it is running or disabled.
+
+        Args:
+            interval: Seconds between cleanups (0 disables them)
+        """
+        if interval <= 0 or self._cleaner is not None:
+            return
+
+        def run():
+            self.remove_legacy_files()
+            while True:
+                try:
+                    self.cleanup()
+                except sqlite3.Error as e:
+                    logger.error(f"Scrape cache cleanup failed: {e}")
+                self._cleanup_due.wait(interval)
+                self._cleanup_due.clear()
+
+        self._cleaner = threading.Thread(target=run, name="scrape-cache-cleanup", daemon=True)
+        self._cleaner.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache statistics.
+
+        Returns:
+            Dict: hits per tier, misses, writes, evictions per tier, expired
+                entries deleted, conditional requests sent for expired entries
+                and the entries they refreshed, lookups resolved through an
+                alias, the size of each tier, and the remembered
+                failures with the requests that failed at once and the
+                seconds of downloading and parsing this saved
+        """
+        entries, used = self.disk_usage()
+        failures = self._connect().execute("SELECT COUNT(*) FROM scrape_failures").fetchone()[0]
+        aliases = self._connect().execute("SELECT COUNT(*) FROM scrape_aliases").fetchone()[0]
+        with self._lock:
+            lookups = self._counts["memory_hits"] + self._counts["disk_hits"] + self._counts["misses"]
+            return {
+                **self._counts,
+                "hit_ratio": round((lookups - self._counts["misses"]) / lookups, 3) if lookups else 0.0,
+                "memory": {"entries": len(self._memory), "bytes": self._memory_used, "budget": self.memory_bytes},
+                "disk": {"entries": entries, "bytes": used, "budget": self.disk_bytes},
+                "aliases": aliases,
+                "failures": {"entries": failures, "seconds_saved": round(self._seconds_saved, 1)},
+            }
+
+
+_cache: Optional[ScrapeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_scrape_cache() -> ScrapeCache:
+    """
+    Get the shared scrape cache, opening it and starting its cleanup on first use.
+
+    Returns:
+        ScrapeCache: The shared cache
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ScrapeCache()
+                _cache.start_cleanup()
+    return _cache
@@ -0,0 +1,389 @@
+"""
+Asyncio scraping engine for the Fake News Detector.
+
+Pages are downloaded on the event loop with the asyncio HTTP client, so a
+download in flight holds a coroutine rather than a thread, and the HTML is
+handed to a small thread pool for decoding and extraction (newspaper,
+trafilatura, readability and extruct are synchronous and CPU-bound). Hundreds
+of downloads can be in flight per worker while the number of pages parsed at
+once stays bounded by the pool.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from http_client import AsyncHttpClient
+from single_flight import AsyncSingleFlight
+from url_scraper import (
+    FETCH_USER_AGENT, SCRAPER_COALESCE_TIMEOUT, SCRAPER_FETCH_DEADLINE, FetchError, Page, add_cache_alias,
+    cache_failure, cache_key, check_download, check_response_headers, complete_article, conditional_headers,
+    decode_html, extract_article_from_html, find_canonical_alias, get_cached_article, get_cached_failure,
+    get_stale_article, is_valid_url, refresh_cached_article, resolve_cache_alias, response_validators
+)
+
+logger = logging.getLogger("scrape-engine")
+
+# Maximum number of downloads in flight per worker; more requests wait for a slot
+SCRAPER_MAX_FETCHES = int(os.environ.get("SCRAPER_MAX_FETCHES", "500"))
+
+# Number of pages whose articles are extracted at once
+SCRAPER_PARSE_WORKERS = int(os.environ.get("SCRAPER_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+class ScrapeEngine:
+    """
+    Downloads pages concurrently on the event loop and extracts their articles in a thread pool.
+
+    The engine belongs to the event loop it is first used on (see get_scrape_engine()).
+    """
+
+    def __init__(
+        self,
+        max_fetches: int = SCRAPER_MAX_FETCHES,
+        parse_workers: int = SCRAPER_PARSE_WORKERS,
+        client: Optional[AsyncHttpClient] = None,
+        coalesce_timeout: float = SCRAPER_COALESCE_TIMEOUT
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            max_fetches: The maximum number of downloads in flight
+            parse_workers: The number of threads extracting articles
+            client: The HTTP client (default: a new AsyncHttpClient)
+            coalesce_timeout: Seconds a request waits for a concurrent extraction of the same article
+        """
+        self.max_fetches = max_fetches
+        self.parse_workers = parse_workers
+        self.client = client or AsyncHttpClient()
+        self._flights = AsyncSingleFlight(coalesce_timeout)
+        self._executor = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix="scrape-parse")
+        # Created on first use, so it belongs to the running event loop
+        self._fetch_slots: Optional[asyncio.Semaphore] = None
+        # Checks of canonical addresses in progress (see _confirm_alias())
+        self._confirmations: Set[asyncio.Task] = set()
+
+        # Counters, only updated on the event loop
+        self._waiting = 0
+        self._fetching = 0
+        self._parsing = 0
+        self._fetched = 0
+        self._failed = 0
+        self._parsed = 0
+        self._aliases_confirmed = 0
+        self._aliases_rejected = 0
+
+    async def fetch(self, url: str) -> Optional[Page]:
+        """
+        Download a page, waiting for a download slot if all are in use.
+
+        Args:
+            url: The URL of the page
+
+        Returns:
+            Page: The page, or None if the download failed
+        """
+        try:
+            return await self.fetch_page(url)
+        except FetchError as e:
+            logger.error(f"Error downloading {url}: {e}")
+            return None
+
+    async def fetch_page(self, url: str, validators: Optional[Dict[str, str]] = None) -> Page:
+        """
+        Download a page, waiting for a download slot if all are in use.
+
+        Args:
+            url: The URL of the page
+            validators: The validators of a cached copy; the page is then only
+                downloaded if it changed
+
+        Returns:
+            Page: The page
+
+        Raises:
+            FetchError: If the download failed, the server answered with an
+                error status, or the page was rejected
+        """
+        if self._fetch_slots is None:
+            self._fetch_slots = asyncio.Semaphore(self.max_fetches)
+
+        self._waiting += 1
+        try:
+            await self._fetch_slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._fetching += 1
+        try:
+            page = await asyncio.wait_for(self._download(url, validators), SCRAPER_FETCH_DEADLINE)
+        except asyncio.TimeoutError as e:
+            self._failed += 1
+            raise FetchError(f"Download took over {SCRAPER_FETCH_DEADLINE:g} s", "timeout") from e
+        except FetchError:
+            self._failed += 1
+            raise
+        except httpx.HTTPStatusError as e:
+            self._failed += 1
+            raise FetchError(str(e), "http_status", e.response.status_code) from e
+        except httpx.TimeoutException as e:
+            self._failed += 1
+            raise FetchError(str(e), "timeout") from e
+        except httpx.HTTPError as e:
+            self._failed += 1
+            raise FetchError(str(e), "connection") from e
+        finally:
+            self._fetching -= 1
+            self._fetch_slots.release()
+
+        self._fetched += 1
+        return page
+
+    async def _download(self, url: str, validators: Optional[Dict[str, str]]) -> Page:
+        """
+        Download a page, streaming its body so that one that is not HTML or is too large is abandoned early.
+
+        Raises:
+            FetchError: If the page was rejected
+            httpx.HTTPError: If the download failed or the server answered with an error status
+        """
+        start = time.monotonic()
+        response = await self.client.get(
+            url, headers={"User-Agent": FETCH_USER_AGENT, **conditional_headers(validators)}, stream=True,
+            deadline=start + SCRAPER_FETCH_DEADLINE
+        )
+        try:
+            # httpx counts 304 Not Modified as an error status
+            if response.status_code != 304:
+                response.raise_for_status()
+            check_response_headers(response.headers)
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                check_download(size, start)
+                chunks.append(chunk)
+        finally:
+            await response.aclose()
+        return Page(
+            b"".join(chunks), response.headers.get("Content-Type", ""), response_validators(response.headers),
+            not_modified=response.status_code == 304
+        )
+
+    def _parse(self, url: str, page: Page, key: str) -> Tuple[Optional[Dict[str, Any]], str, Optional[str]]:
+        """
+        Decode a page and extract its article (runs in the parse pool).
+
+        Returns the article and the method used, then the canonical address
+        that could become an alias of the key, if any.
+        """
+        html = decode_html(page.content, page.content_type)
+        article, method = extract_article_from_html(url, html, page.validators, key)
+        return article, method, find_canonical_alias(url, html, key) if article else None
+
+    async def _confirm_alias(self, key: str, canonical: str, article: Dict[str, Any]) -> None:
+        """
+        Make a page's key an alias of its canonical address's key, if that address serves the same article.
+
+        The canonical address is extracted like any URL (or found in the
+        cache), so its article is cached under its own key, and the alias is
+        recorded if that article has the same content.
+        """
+        canonical_key = cache_key(canonical)
+        try:
+            canonical_article, _ = await self._flights.do(
+                canonical_key, self.extract_article, canonical, canonical_key
+            )
+        except Exception as e:
+            logger.error(f"Error extracting the canonical address {canonical} of {key}: {e}")
+            return
+        if not canonical_article or canonical_article.get("content") != article.get("content"):
+            self._aliases_rejected += 1
+            logger.info(f"Not serving {key} from {canonical}: it does not serve the same article")
+            return
+        self._aliases_confirmed += 1
+        await asyncio.get_running_loop().run_in_executor(None, add_cache_alias, key, canonical_key)
+
+    def _start_confirmation(self, key: str, canonical: str, article: Dict[str, Any]) -> None:
+        """Confirm a canonical address in the background, so the request does not wait for it."""
+        task = asyncio.ensure_future(self._confirm_alias(key, canonical, article))
+        self._confirmations.add(task)
+        task.add_done_callback(self._confirmations.discard)
+
+    @staticmethod
+    def _lookup(url: str, key: Optional[str] = None) -> Tuple[
+            str, Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[Tuple]]:
+        """
+        Look a URL up in the article cache (runs in a thread).
+
+        Returns its cache key, then its article (or that of the canonical
+        address its key is an alias of), recent failure or expired article,
+        if any. Expired articles and failures are only looked up under the
+        URL's own key, since only a download of the URL can renew them.
+        """
+        key = key or cache_key(url)
+        cached_article = get_cached_article(key)
+        if not cached_article:
+            target = resolve_cache_alias(key)
+            if target != key:
+                cached_article = get_cached_article(target)
+        if cached_article:
+            return key, cached_article, None, None
+        failure = get_cached_failure(key)
+        if failure:
+            return key, None, failure, None
+        return key, None, None, get_stale_article(key)
+
+    async def extract_article(self, url: str, key: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Extract article content from a URL.
+
+        An expired cached article is revalidated with a conditional request,
+        and a failure is remembered for SCRAPE_FAILURE_TTL seconds.
+
+        Args:
+            url: The URL of the article
+            key: The cache key of the URL (default: cache_key(url))
+
+        Returns:
+            Tuple[Dict, str]: The extracted article data and the method used, or (None, "") if extraction failed
+        """
+        if not is_valid_url(url):
+            logger.error(f"Invalid URL: {url}")
+            return None, ""
+
+        loop = asyncio.get_running_loop()
+        key, cached_article, failure, stale = await loop.run_in_executor(None, self._lookup, url, key)
+        if cached_article:
+            logger.info(f"Using cached article for {url}")
+            return cached_article, cached_article.get('extraction_method', 'cache')
+
+        if failure:
+            logger.info(f"Not extracting content from {url}: it recently failed ({failure['reason']})")
+            return None, ""
+
+        start = time.monotonic()
+        try:
+            page = await self.fetch_page(url, stale[1] if stale else None)
+        except FetchError as e:
+            logger.error(f"Failed to extract content from {url}: the page could not be downloaded: {e}")
+            await loop.run_in_executor(None, cache_failure, key, e.reason, e.status, time.monotonic() - start)
+            return None, ""
+
+        if page.not_modified and stale:
+            article = await loop.run_in_executor(None, refresh_cached_article, key, page.validators) or stale[0]
+            logger.info(f"Using cached article for {url}: the page has not changed")
+            return article, article.get('extraction_method', 'cache')
+
+        self._parsing += 1
+        try:
+            article, method, canonical = await loop.run_in_executor(self._executor, self._parse, url, page, key)
+        finally:
+            self._parsing -= 1
+            self._parsed += 1
+        if canonical:
+            self._start_confirmation(key, canonical, article)
+        if article is None:
+            await loop.run_in_executor(None, cache_failure, key, "too_short", None, time.monotonic() - start)
+        return article, method
+
+    async def get_article(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get article content from a URL.
+
+        Requests for the same article (by cache key) made while it is being
+        extracted wait for that extraction instead of starting their own. A
+        URL whose key is an alias of a canonical address also waits for an
+        extraction of that address in progress; the reverse is never done, so
+        a page cannot hand its article to requests for its canonical address.
+
+        Args:
+            url: The URL of the article
+
+        Returns:
+            Dict: The article data, or None if extraction failed
+        """
+        key = cache_key(url)
+        result = None
+        target = await asyncio.get_running_loop().run_in_executor(None, resolve_cache_alias, key)
+        if target != key:
+            result = await self._flights.join(target)
+        if not result or not result[0]:
+            result = await self._flights.do(key, self.extract_article, url, key)
+        article, method = result
+        if not article:
+            return None
+        # Coalesced requests share the extracted article; each completes its own copy
+        return complete_article(url, dict(article), method)
+
+    async def get_articles(self, urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Get the articles of several URLs concurrently.
+
+        Args:
+            urls: The URLs of the articles
+
+        Returns:
+            List[Dict]: The article data of each URL, or None where extraction failed
+        """
+        return list(await asyncio.gather(*(self.get_article(url) for url in urls)))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the engine statistics.
+
+        Returns:
+            Dict: downloads waiting for a slot and in flight, pages being
+                parsed (including those queued for a thread), totals of
+                downloads and parsed pages, canonical addresses confirmed as
+                aliases or rejected, and the coalescing of concurrent requests
+                for the same article
+        """
+        return {
+            "max_fetches": self.max_fetches,
+            "parse_workers": self.parse_workers,
+            "waiting": self._waiting,
+            "fetching": self._fetching,
+            "parsing": self._parsing,
+            "fetched": self._fetched,
+            "failed": self._failed,
+            "parsed": self._parsed,
+            "aliases": {"confirmed": self._aliases_confirmed, "rejected": self._aliases_rejected},
+            "coalescing": self._flights.stats(),
+        }
+
+    async def close(self) -> None:
+        """Stop the alias confirmations, close the HTTP client's connections and stop the parse threads."""
+        for task in list(self._confirmations):
+            task.cancel()
+        await asyncio.gather(*self._confirmations, return_exceptions=True)
+        await self.client.close()
+        self._executor.shutdown(wait=False)
+
+
+# One engine per event loop, since its connections and download slots belong to the loop
+_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ScrapeEngine]" = weakref.WeakKeyDictionary()
+
+
+def get_scrape_engine() -> ScrapeEngine:
+    """
+    Get the scraping engine of the running event loop, creating it on first use.
+
+    Returns:
+        ScrapeEngine: The shared engine
+
+    Raises:
+        RuntimeError: If called outside of a running event loop
+    """
+    loop = asyncio.get_running_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        engine = _engines[loop] = ScrapeEngine()
+    return engine
@@ -0,0 +1,200 @@
+"""
+Full-text search index over analyses for the Fake News Detector API.
+
+Analysis titles and content are indexed in an SQLite FTS5 table, ranked with
+BM25. The table is contentless (the text itself is not stored again). Every
+word is indexed prefixed with its owner ("<owner>_<word>"), so each posting
+list only covers one user's analyses: the cost of a search depends on the
+size of that user's history, not on the size of the whole index, and prefix
+queries only scan that user's terms.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    rowid INTEGER PRIMARY KEY,
+    analysis_id TEXT NOT NULL UNIQUE
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_terms USING fts5(
+    title, content, content='', tokenize="porter unicode61 remove_diacritics 2 tokenchars '_'"
+);
+"""
+
+# BM25 weights of the title and content columns
+RANK = "bm25(search_terms, 2.0, 1.0)"
+
+# Maximum number of terms used from a query
+MAX_QUERY_TERMS = 32
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+TERM_PATTERN = re.compile(r"(\w+)(\*?)", re.UNICODE)
+
+# A document to index: (analysis_id, user_id, title, content)
+Document = Tuple[str, str, Optional[str], Optional[str]]
+
+
+def owner_prefix(user_id: str) -> str:
+    """Get the prefix of the indexed words of a user's analyses."""
+    return re.sub(r"[\W_]", "", user_id).lower() + "_"
+
+
+def owned_text(owner: str, text: Optional[str]) -> str:
+    """Prefix every word of a text with its owner prefix."""
+    return " ".join(owner + word for word in WORD_PATTERN.findall(text or ""))
+
+
+def build_query(user_id: str, text: str) -> Optional[str]:
+    """
+    Turn user input into an FTS5 query matching a user's documents with all terms.
+
+    Terms are quoted, so FTS5 operators in the input are matched literally;
+    a term ending in * matches as a prefix.
+
+    Args:
+        user_id: The ID of the user
+        text: The search text
+
+    Returns:
+        str: The FTS5 query, or None if the text has no terms
+    """
+    owner = owner_prefix(user_id)
+    terms = [f'"{owner}{term}"' + prefix for term, prefix in TERM_PATTERN.findall(text)[:MAX_QUERY_TERMS]]
+    return " AND ".join(terms) if terms else None
+
+
+class SearchIndex:
+    """
+    Full-text index of analyses in an SQLite database.
+
+    The index may live in its own file (JSON backend) or in the SQLite
+    backend's database. Each thread gets its own connection.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the index, creating its tables if needed.
+
+        Args:
+            path: The path of the SQLite database file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM search_docs").fetchone()[0]
+
+    def _indexed(self, analysis_ids: List[str]) -> set:
+        rows = self._connect().execute(
+            f"SELECT analysis_id FROM search_docs WHERE analysis_id IN ({', '.join('?' for _ in analysis_ids)})",
+            analysis_ids
+        )
+        return {row[0] for row in rows}
+
+    def add(self, documents: Iterable[Document]) -> int:
+        """
+        Index analyses in one transaction; already indexed analyses are skipped.
+
+        Args:
+            documents: (analysis_id, user_id, title, content) tuples
+
+        Returns:
+            int: The number of analyses indexed
+        """
+        added = 0
+        with self._connect() as conn:
+            for analysis_id, user_id, title, content in documents:
+                cursor = conn.execute("INSERT OR IGNORE INTO search_docs (analysis_id) VALUES (?)", (analysis_id,))
+                if cursor.rowcount:
+                    owner = owner_prefix(user_id)
+                    conn.execute(
+                        "INSERT INTO search_terms (rowid, title, content) VALUES (?, ?, ?)",
+                        (cursor.lastrowid, owned_text(owner, title), owned_text(owner, content))
+                    )
+                    added += 1
+        return added
+
+    def add_missing(self, analyses: Iterable[Dict[str, Any]], get_content: Callable[[str], Optional[str]],
+                    batch_size: int = 500) -> int:
+        """
+        Index the analyses that are not indexed yet.
+
+        Used to build the index for existing analyses and to catch up after a
+        crash between storing an analysis and indexing it.
+
+        Args:
+            analyses: The stored analyses (with their IDs)
+            get_content: Function loading content by hash
+            batch_size: The number of analyses indexed per transaction
+
+        Returns:
+            int: The number of analyses indexed
+        """
+        def index(batch):
+            indexed = self._indexed([analysis["id"] for analysis in batch])
+            return self.add(
+                (analysis["id"], analysis["user_id"], analysis.get("title"),
+                 analysis.get("content") or get_content(analysis.get("content_hash") or ""))
+                for analysis in batch if analysis["id"] not in indexed
+            )
+
+        added = 0
+        batch = []
+        for analysis in analyses:
+            batch.append(analysis)
+            if len(batch) == batch_size:
+                added += index(batch)
+                batch = []
+        if batch:
+            added += index(batch)
+        return added
+
+    def search(self, user_id: str, text: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[str, float]]]:
+        """
+        Search a user's analyses.
+
+        Args:
+            user_id: The ID of the user
+            text: The search text; all terms must match
+            limit: The maximum number of results
+            offset: The number of results to skip
+
+        Returns:
+            Tuple: The total number of matches and the (analysis_id, score)
+                pairs of the requested page, best first
+        """
+        match = build_query(user_id, text)
+        if match is None:
+            return 0, []
+        conn = self._connect()
+        # Rank and count the matches in one pass over the postings
+        rows = conn.execute(
+            "SELECT d.analysis_id, m.rank, m.total FROM ("
+            "    SELECT rowid, rank, COUNT(*) OVER () AS total FROM ("
+            f"        SELECT rowid, {RANK} AS rank FROM search_terms WHERE search_terms MATCH ?"
+            "    ) ORDER BY rank LIMIT ? OFFSET ?"
+            ") m JOIN search_docs d ON d.rowid = m.rowid ORDER BY m.rank",
+            (match, limit, offset)
+        ).fetchall()
+        if not rows:
+            total = conn.execute("SELECT COUNT(*) FROM search_terms WHERE search_terms MATCH ?", (match,)).fetchone()[0]
+            return total, []
+        # bm25() is lower for better matches
+        return rows[0][2], [(analysis_id, -rank) for analysis_id, rank, _ in rows]
@@ -0,0 +1,345 @@
+"""
+Similar-article index for the Fake News Detector API.
+
+Every distinct text a user analyzed is stored as its TF-IDF vector, computed
+with the production vectorizer, so that near-copies of articles that were already
+scored can be found by cosine similarity. Vectors are pruned to their
+SIMILARITY_MAX_TERMS heaviest terms and L2-normalized, persisted in an SQLite
+file shared by all worker processes, and searched in memory through a sparse
+matrix stored by column (an inverted index from term to documents), so a
+query only touches the documents that share a term with it.
+
+Each worker holds the vectors of the last SIMILARITY_MAX_TEXTS indexed texts
+in memory (up to an eighth more between merges); older ones stay in the
+file but are not searched. A vector takes at most 8 bytes per term (an int32 term index and a float32
+weight), so about 2 KB per text with its bookkeeping at the default 200
+terms: 100,000 texts take about 200 MB per worker.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from content_store import content_hash
+from file_lock import FileLock
+
+# Number of heaviest terms kept per stored vector
+SIMILARITY_MAX_TERMS = int(os.environ.get("SIMILARITY_MAX_TERMS", "200"))
+
+# Number of texts (the last indexed) each worker keeps in memory and searches
+SIMILARITY_MAX_TEXTS = int(os.environ.get("SIMILARITY_MAX_TEXTS", "100000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS similarity_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS similarity_user_vectors (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    analysis_id TEXT NOT NULL,
+    indices BLOB NOT NULL,
+    data BLOB NOT NULL,
+    UNIQUE (content_hash, user_id)
+);
+"""
+
+# Table of the first version, with one vector per text whichever user analyzed it
+LEGACY_TABLE = "similarity_vectors"
+
+# A match: (analysis_id, user_id, similarity)
+Match = Tuple[str, str, float]
+
+
+def vectorizer_fingerprint(vectorizer: Any) -> str:
+    """
+    Identify a fitted vectorizer, so vectors of another model are not mixed in.
+
+    Args:
+        vectorizer: The fitted TF-IDF vectorizer
+
+    Returns:
+        str: A hex digest of the vocabulary and IDF weights
+    """
+    digest = hashlib.sha256()
+    for term, index in sorted(vectorizer.vocabulary_.items()):
+        digest.update(f"{term}\t{index}\n".encode("utf-8"))
+    idf = getattr(vectorizer, "idf_", None)
+    if idf is not None:
+        digest.update(np.asarray(idf, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _normalize(row: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the indices and L2-normalized float32 weights of a 1-row matrix."""
+    data = row.data.astype(np.float32)
+    norm = np.linalg.norm(data)
+    if norm > 0:
+        data /= norm
+    return row.indices.astype(np.int32), data
+
+
+def _prune(indices: np.ndarray, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the SIMILARITY_MAX_TERMS heaviest terms, renormalized and sorted by term."""
+    if len(data) > SIMILARITY_MAX_TERMS:
+        keep = np.sort(np.argpartition(-data, SIMILARITY_MAX_TERMS)[:SIMILARITY_MAX_TERMS])
+        indices, data = indices[keep], data[keep]
+        data = data / np.linalg.norm(data)
+    return indices, data
+
+
+class SimilarityIndex:
+    """
+    Cosine-similarity index over the TF-IDF vectors of analyzed texts.
+
+    One vector is kept per distinct text and user, pointing at the user's
+    latest analysis of that text, so users analyzing the same article each
+    keep theirs. Each process keeps the vectors of the last max_texts indexed
+    texts in memory: a column-compressed matrix of the bulk plus a
+    small row-compressed matrix of recent additions, merged when the latter
+    grows (the oldest texts are dropped from memory then). Vectors added by
+    other processes are picked up before each query.
+    """
+
+    def __init__(self, path: str, vectorizer: Any, max_texts: int = SIMILARITY_MAX_TEXTS):
+        """
+        Initialize the index, clearing it if it was built with another vectorizer.
+
+        Args:
+            path: The path of the SQLite database file
+            vectorizer: The fitted TF-IDF vectorizer
+            max_texts: The number of texts (the last indexed) kept in memory
+        """
+        self.path = path
+        self.vectorizer = vectorizer
+        self.max_texts = max_texts
+        self.features = len(vectorizer.vocabulary_)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._positions: Dict[Tuple[str, str], int] = {}
+        self._owners: List[Tuple[str, str]] = []
+        self._matrix: Optional[sparse.csc_matrix] = None
+        self._recent: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._recent_matrix: Optional[sparse.csr_matrix] = None
+        self._seq = 0
+
+        fingerprint = vectorizer_fingerprint(vectorizer)
+        with self._connect() as conn:
+            created = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'similarity_user_vectors'"
+            ).fetchone() is None
+            conn.executescript(SCHEMA)
+            if created:
+                # Rebuilt from the stored analyses, with a vector per user
+                conn.execute(f"DROP TABLE IF EXISTS {LEGACY_TABLE}")
+                conn.execute("INSERT OR REPLACE INTO similarity_meta (key, value) VALUES ('complete', '0')")
+            row = conn.execute("SELECT value FROM similarity_meta WHERE key = 'vectorizer'").fetchone()
+            if row is None or row[0] != fingerprint:
+                # Vectors of another vocabulary are meaningless: start over
+                conn.execute("DELETE FROM similarity_user_vectors")
+                conn.execute("INSERT OR REPLACE INTO similarity_meta (key, value) VALUES ('vectorizer', ?)", (fingerprint,))
+                conn.execute("INSERT OR REPLACE INTO similarity_meta (key, value) VALUES ('complete', '0')")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._owners)
+
+    @property
+    def complete(self) -> bool:
+        """Whether the analyses stored before the index existed were added."""
+        row = self._connect().execute("SELECT value FROM similarity_meta WHERE key = 'complete'").fetchone()
+        return row is not None and row[0] == "1"
+
+    def vectorize(self, texts: List[str]) -> sparse.csr_matrix:
+        """Get the TF-IDF vectors of texts."""
+        return self.vectorizer.transform(texts)
+
+    def add(self, analysis_id: str, user_id: str, text: str, vector: Optional[sparse.csr_matrix] = None) -> None:
+        """
+        Add an analyzed text, or point a text the user already analyzed at the newer analysis.
+
+        Args:
+            analysis_id: The ID of the analysis
+            user_id: The ID of its owner
+            text: The analyzed text
+            vector: Its TF-IDF vector, if already computed
+        """
+        self.add_many([(analysis_id, user_id, text)], vector)
+
+    def add_many(self, analyses: List[Tuple[str, str, str]], vectors: Optional[sparse.csr_matrix] = None) -> None:
+        """
+        Add several analyzed texts in one transaction.
+
+        Args:
+            analyses: (analysis_id, user_id, text) tuples
+            vectors: Their TF-IDF vectors, if already computed (one row each)
+        """
+        if not analyses:
+            return
+        if vectors is None:
+            vectors = self.vectorize([text for _, _, text in analyses])
+        vectors = sparse.csr_matrix(vectors)
+        with self._connect() as conn:
+            for i, (analysis_id, user_id, text) in enumerate(analyses):
+                indices, data = _prune(*_normalize(vectors[i]))
+                conn.execute(
+                    "INSERT OR REPLACE INTO similarity_user_vectors (content_hash, user_id, analysis_id, indices, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (content_hash(text), user_id, analysis_id, indices.tobytes(), data.tobytes())
+                )
+
+    def add_missing(self, analyses: Iterable[Dict[str, Any]], batch_size: int = 256) -> int:
+        """
+        Add the stored analyses whose text is not indexed yet for their user, then mark the index complete.
+
+        Runs once per vectorizer; concurrent calls from several processes are
+        serialized and the later ones find nothing left to do.
+
+        Args:
+            analyses: The stored analyses (with their IDs and content)
+            batch_size: The number of analyses vectorized at once
+
+        Returns:
+            int: The number of texts added
+        """
+        added = 0
+        with FileLock(self.path + ".lock").acquire():
+            if self.complete:
+                return 0
+
+            def add_batch(batch):
+                keys = [(content_hash(analysis["content"]), analysis["user_id"]) for analysis in batch]
+                hashes = sorted({digest for digest, _ in keys})
+                indexed = set(self._connect().execute(
+                    f"SELECT content_hash, user_id FROM similarity_user_vectors "
+                    f"WHERE content_hash IN ({', '.join('?' for _ in hashes)})",
+                    hashes
+                ))
+                missing, seen = [], set()
+                for key, analysis in zip(keys, batch):
+                    if key not in indexed and key not in seen:
+                        seen.add(key)
+                        missing.append((analysis["id"], analysis["user_id"], analysis["content"]))
+                self.add_many(missing)
+                return len(missing)
+
+            batch = []
+            for analysis in analyses:
+                if analysis.get("content"):
+                    batch.append(analysis)
+                if len(batch) == batch_size:
+                    added += add_batch(batch)
+                    batch = []
+            if batch:
+                added += add_batch(batch)
+            with self._connect() as conn:
+                conn.execute("UPDATE similarity_meta SET value = '1' WHERE key = 'complete'")
+        return added
+
+    def _refresh(self) -> None:
+        """Load vectors added since the last refresh (by any process). Call with the lock held."""
+        # Only the last max_texts rows are of interest
+        rows = self._connect().execute(
+            "SELECT seq, content_hash, analysis_id, user_id, indices, data FROM similarity_user_vectors WHERE seq > ? "
+            "ORDER BY seq DESC LIMIT ?",
+            (self._seq, self.max_texts)
+        ).fetchall()
+        for seq, digest, analysis_id, user_id, indices, data in reversed(rows):
+            self._seq = seq
+            position = self._positions.get((digest, user_id))
+            if position is not None:
+                self._owners[position] = (analysis_id, user_id)
+                continue
+            self._positions[(digest, user_id)] = len(self._owners)
+            self._owners.append((analysis_id, user_id))
+            self._recent.append((np.frombuffer(indices, dtype=np.int32), np.frombuffer(data, dtype=np.float32)))
+            self._recent_matrix = None
+
+        # Merge recent vectors into the column matrix once they are a sizable share
+        bulk = self._matrix.shape[0] if self._matrix is not None else 0
+        if len(self._recent) > max(1024, bulk // 8):
+            recent = self._recent_rows()
+            self._matrix = recent.tocsc() if self._matrix is None else sparse.vstack([self._matrix, recent], format="csc")
+            self._recent = []
+            self._recent_matrix = None
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the oldest texts from memory beyond max_texts. Call with the lock held, after a merge."""
+        drop = len(self._owners) - self.max_texts
+        if drop <= 0:
+            return
+        self._matrix = self._matrix[drop:]
+        self._owners = self._owners[drop:]
+        self._positions = {key: position - drop for key, position in self._positions.items() if position >= drop}
+
+    def _recent_rows(self) -> sparse.csr_matrix:
+        """Get the recent vectors as a row matrix. Call with the lock held."""
+        if self._recent_matrix is None:
+            indptr = np.zeros(len(self._recent) + 1, dtype=np.int64)
+            indptr[1:] = np.cumsum([len(indices) for indices, _ in self._recent])
+            indices = np.concatenate([indices for indices, _ in self._recent]) if self._recent else np.zeros(0, np.int32)
+            data = np.concatenate([data for _, data in self._recent]) if self._recent else np.zeros(0, np.float32)
+            self._recent_matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(self._recent), self.features))
+        return self._recent_matrix
+
+    def nearest(self, vector: sparse.csr_matrix, k: int = 5, min_similarity: float = 0.0,
+                user_id: Optional[str] = None) -> List[Match]:
+        """
+        Find the indexed texts most similar to a vector.
+
+        Args:
+            vector: The TF-IDF vector of the text (one row)
+            k: The maximum number of matches
+            min_similarity: The minimum cosine similarity of a match
+            user_id: Only match the texts of this user (the owners of the
+                texts above min_similarity are checked one by one, so use a
+                high min_similarity)
+
+        Returns:
+            List: (analysis_id, user_id, similarity) tuples, most similar first
+        """
+        # Pruned like the stored vectors, so near-copies score close to 1
+        indices, data = _prune(*_normalize(sparse.csr_matrix(vector)[0]))
+        with self._lock:
+            self._refresh()
+            # The matrices are replaced, never modified, so they are searched without the lock
+            owners, matrix = self._owners, self._matrix
+            recent = self._recent_rows() if self._recent else None
+        if not owners or not len(indices):
+            return []
+        bulk = matrix.shape[0] if matrix is not None else 0
+        scores = np.zeros(bulk + (recent.shape[0] if recent is not None else 0), dtype=np.float32)
+        if matrix is not None:
+            # Only the columns of the query's terms are read
+            scores[:bulk] = matrix[:, indices] @ data
+        if recent is not None:
+            scores[bulk:] = recent[:, indices] @ data
+
+        candidates = np.flatnonzero((scores > 0) & (scores >= min_similarity))
+        if user_id is not None:
+            candidates = candidates[[owners[position][1] == user_id for position in candidates]]
+        if not len(candidates):
+            return []
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(*owners[position], float(min(scores[position], 1.0))) for position in top]
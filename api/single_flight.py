@@ -0,0 +1,111 @@
+"""
+Request coalescing for the Fake News Detector.
+
+When several requests need the same result at once (a URL that is being
+shared widely), only the first one computes it; the others wait for its
+result instead of repeating the work. AsyncSingleFlight does this for
+coroutines on one event loop.
+
+A caller that waits longer than the timeout stops waiting and does the
+work itself, so a stuck call cannot hold up the others indefinitely. If
+the call raises (or its task is cancelled), the waiting callers do not
+share the error: one of them makes the call again.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Result of a call that raised
+_FAILED = object()
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent calls with the same key on one event loop."""
+
+    def __init__(self, timeout: float):
+        """
+        Initialize the group.
+
+        Args:
+            timeout: Seconds a caller waits for a concurrent call before making its own
+        """
+        self.timeout = timeout
+        self._calls: Dict[str, asyncio.Future] = {}
+        # Counters, only updated on the event loop
+        self._counts = {"calls": 0, "coalesced": 0, "timeouts": 0, "leader_failures": 0}
+
+    def _count(self, name: str) -> None:
+        self._counts[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters.
+
+        Returns:
+            Dict: calls made, callers served the result of a concurrent call,
+                callers that stopped waiting and made the call themselves, and
+                calls that raised (their waiting callers then call again)
+        """
+        return dict(self._counts)
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Await fn(*args), unless a call with the same key is in progress, whose result is then returned.
+
+        Args:
+            key: The key of the call
+            fn: The coroutine function
+            *args: Its arguments
+
+        Returns:
+            Any: The result of fn (the same object for all coalesced callers)
+        """
+        call: Optional[asyncio.Future] = self._calls.get(key)
+        while call is not None:
+            try:
+                # The shield keeps a caller that gives up from cancelling the call
+                result = await asyncio.wait_for(asyncio.shield(call), self.timeout)
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                self._count("calls")
+                return await fn(*args)
+            if result is not _FAILED:
+                self._count("coalesced")
+                return result
+            call = self._calls.get(key)
+
+        call = self._calls[key] = asyncio.get_running_loop().create_future()
+        self._count("calls")
+        result = _FAILED
+        try:
+            result = await fn(*args)
+            return result
+        except BaseException:
+            self._count("leader_failures")
+            raise
+        finally:
+            del self._calls[key]
+            call.set_result(result)
+
+    async def join(self, key: str) -> Any:
+        """
+        Wait for the call with a key in progress, if any, without making one.
+
+        Args:
+            key: The key of the call
+
+        Returns:
+            Any: Its result, or None if no call is in progress, it raised, or the wait timed out
+        """
+        call: Optional[asyncio.Future] = self._calls.get(key)
+        if call is None:
+            return None
+        try:
+            result = await asyncio.wait_for(asyncio.shield(call), self.timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            return None
+        if result is _FAILED:
+            return None
+        self._count("coalesced")
+        return result
@@ -0,0 +1,514 @@
+"""
+SQLite storage backend for the Fake News Detector API.
+
+This module stores users, analyses, analysis content and password reset
+tokens in a single SQLite database in WAL mode, so reads never block writes and several worker
+processes can share it safely. It implements the same interface as
+json_store.JsonStore.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from content_store import compress_content, content_hash, decompress_content
+from search_index import SearchIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    username TEXT,
+    hashed_password TEXT,
+    full_name TEXT,
+    is_google_user INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    last_login TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    is_admin INTEGER NOT NULL DEFAULT 0,
+    revision INTEGER NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    content TEXT,
+    content_hash TEXT,
+    title TEXT,
+    url TEXT,
+    prediction TEXT,
+    confidence REAL,
+    trust_score REAL,
+    trust_level TEXT,
+    factors TEXT,
+    details TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_user_created ON analyses (user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    analysis_count INTEGER NOT NULL,
+    trust_score_sum REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS contents (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS reset_tokens (
+    token TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    expires_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reset_tokens_expires ON reset_tokens (expires_at);
+"""
+
+USER_COLUMNS = [
+    "email", "username", "hashed_password", "full_name", "is_google_user",
+    "created_at", "last_login", "is_active", "is_admin"
+]
+BOOLEAN_USER_COLUMNS = {"is_google_user", "is_active", "is_admin"}
+
+ANALYSIS_COLUMNS = [
+    "user_id", "content_type", "content", "content_hash", "title", "url", "prediction", "confidence",
+    "trust_score", "trust_level", "factors", "details", "created_at"
+]
+JSON_ANALYSIS_COLUMNS = {"factors", "details"}
+
+# Number of most recent analyses returned with the profile stats
+PROFILE_RECENT_SIZE = 5
+
+
+class SqliteStore:
+    """
+    Storage backend that keeps all collections in one SQLite database.
+
+    Each thread gets its own connection. Lookups go through the indexes on
+    users.email, analyses(user_id, created_at) and reset_tokens.expires_at.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the SQLite store, creating the schema if needed.
+
+        Args:
+            path: The path of the SQLite database file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            # Databases created before content deduplication lack content_hash
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(analyses)")}
+            if columns and "content_hash" not in columns:
+                conn.execute("ALTER TABLE analyses ADD COLUMN content_hash TEXT")
+            # Databases created before profile stats need them computed once
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_stats'"
+            ).fetchone() is not None
+            conn.executescript(SCHEMA)
+        if columns and not has_stats:
+            self.check_profile_stats(repair=True)
+        # The full-text search index lives in the same database
+        self.search = SearchIndex(path)
+        self._index_missing()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Close the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Row conversion
+
+    @staticmethod
+    def _user_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        user = {}
+        for column in USER_COLUMNS:
+            value = row[column]
+            if column in BOOLEAN_USER_COLUMNS:
+                value = bool(value)
+            elif value is None and column in ("username", "full_name"):
+                # Older records may lack these fields entirely
+                continue
+            user[column] = value
+        return user
+
+    @staticmethod
+    def _user_values(user: Dict[str, Any]) -> List[Any]:
+        defaults = {"is_google_user": False, "is_active": True, "is_admin": False}
+        values = []
+        for column in USER_COLUMNS:
+            value = user.get(column, defaults.get(column))
+            values.append(int(value) if column in BOOLEAN_USER_COLUMNS else value)
+        return values
+
+    @staticmethod
+    def _analysis_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        analysis = {}
+        for column in ANALYSIS_COLUMNS:
+            value = row[column]
+            if column in JSON_ANALYSIS_COLUMNS:
+                value = json.loads(value) if value else {}
+            elif value is None and column == "content_hash":
+                # Older records store their content inline
+                continue
+            analysis[column] = value
+        return analysis
+
+    @staticmethod
+    def _analysis_values(analysis: Dict[str, Any]) -> List[Any]:
+        values = []
+        for column in ANALYSIS_COLUMNS:
+            value = analysis.get(column)
+            if column in JSON_ANALYSIS_COLUMNS:
+                value = json.dumps(value or {})
+            values.append(value)
+        return values
+
+    # Users
+
+    def get_users(self) -> Dict[str, Dict[str, Any]]:
+        """Get all users, keyed by ID."""
+        rows = self._connect().execute("SELECT * FROM users")
+        return {row["id"]: self._user_from_row(row) for row in rows}
+
+    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Get a user (with its ID) by email, or None."""
+        row = self._connect().execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        if row is None:
+            return None
+        user = self._user_from_row(row)
+        user["id"] = row["id"]
+        return user
+
+    def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user (with its ID) by ID, or None."""
+        row = self._connect().execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        user = self._user_from_row(row)
+        user["id"] = user_id
+        return user
+
+    def get_user_revision(self, user_id: str) -> Optional[int]:
+        """Get the revision of a user record, or None if the user does not exist."""
+        row = self._connect().execute("SELECT revision FROM users WHERE id = ?", (user_id,)).fetchone()
+        return row["revision"] if row else None
+
+    def insert_user(self, user_id: str, user: Dict[str, Any]) -> None:
+        """Insert a user, raising ValueError if the email is already registered."""
+        placeholders = ", ".join("?" for _ in range(len(USER_COLUMNS) + 1))
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    f"INSERT INTO users (id, {', '.join(USER_COLUMNS)}) VALUES ({placeholders})",
+                    [user_id] + self._user_values(user)
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError("Email already registered")
+
+    def update_user(self, user_id: str, fields: Dict[str, Any]) -> bool:
+        """Update fields of a user, returning False if the user does not exist."""
+        columns = [column for column in fields if column in USER_COLUMNS]
+        if not columns:
+            return self.get_user_revision(user_id) is not None
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        values = [int(fields[c]) if c in BOOLEAN_USER_COLUMNS else fields[c] for c in columns]
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE users SET {assignments}, revision = revision + 1 WHERE id = ?",
+                values + [user_id]
+            )
+        return cursor.rowcount > 0
+
+    def set_last_logins(self, last_logins: Dict[str, str]) -> None:
+        """Set last_login for several users at once."""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE users SET last_login = ? WHERE id = ?",
+                [(last_login, user_id) for user_id, last_login in last_logins.items()]
+            )
+
+    # Analyses
+
+    def get_analyses(self) -> Dict[str, Dict[str, Any]]:
+        """Get all analyses, keyed by ID."""
+        rows = self._connect().execute("SELECT * FROM analyses")
+        return {row["id"]: self._analysis_from_row(row) for row in rows}
+
+    def iter_analyses(self, user_id: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                      prediction: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over analyses (with their IDs) without loading them all at once.
+
+        Rows are read in batches by rowid, each with the connection of the
+        calling thread, so the iteration may be resumed from another thread.
+
+        Args:
+            user_id: Only the analyses of this user
+            start: Only analyses created at or after this ISO time
+            end: Only analyses created before this ISO time
+            prediction: Only analyses with this prediction
+            batch_size: The number of rows read per query
+        """
+        conditions, params = ["rowid > ?"], []
+        for condition, value in (("user_id = ?", user_id), ("created_at >= ?", start),
+                                 ("created_at < ?", end), ("prediction = ?", prediction)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        query = f"SELECT rowid, * FROM analyses WHERE {' AND '.join(conditions)} ORDER BY rowid LIMIT ?"
+        last = 0
+        while True:
+            rows = self._connect().execute(query, [last] + params + [batch_size]).fetchall()
+            for row in rows:
+                analysis = self._analysis_from_row(row)
+                analysis["id"] = row["id"]
+                yield analysis
+            if len(rows) < batch_size:
+                return
+            last = rows[-1]["rowid"]
+
+    def get_analysis(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Get an analysis (with its ID) by ID, or None."""
+        row = self._connect().execute("SELECT * FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        if row is None:
+            return None
+        analysis = self._analysis_from_row(row)
+        analysis["id"] = analysis_id
+        return analysis
+
+    def get_analyses_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get a user's analyses (with their IDs), newest first."""
+        rows = self._connect().execute(
+            "SELECT * FROM analyses WHERE user_id = ? ORDER BY created_at DESC",
+            (user_id,)
+        )
+        analyses = []
+        for row in rows:
+            analysis = self._analysis_from_row(row)
+            analysis["id"] = row["id"]
+            analyses.append(analysis)
+        return analyses
+
+    def insert_analysis(self, analysis_id: str, analysis: Dict[str, Any]) -> None:
+        """Insert an analysis."""
+        self.insert_analyses([(analysis_id, analysis)])
+
+    def insert_analyses(self, analyses: Iterable) -> None:
+        """
+        Insert many analyses in one transaction, updating the profile stats.
+
+        Analyses are immutable: inserting an existing ID again is a no-op.
+
+        Args:
+            analyses: (analysis_id, analysis) pairs
+        """
+        placeholders = ", ".join("?" for _ in range(len(ANALYSIS_COLUMNS) + 1))
+        with self._connect() as conn:
+            for analysis_id, analysis in analyses:
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO analyses (id, {', '.join(ANALYSIS_COLUMNS)}) VALUES ({placeholders})",
+                    [analysis_id] + self._analysis_values(analysis)
+                )
+                if cursor.rowcount:
+                    conn.execute(
+                        "INSERT INTO user_stats (user_id, analysis_count, trust_score_sum) VALUES (?, 1, ?) "
+                        "ON CONFLICT (user_id) DO UPDATE SET analysis_count = analysis_count + 1, "
+                        "trust_score_sum = trust_score_sum + excluded.trust_score_sum",
+                        (analysis["user_id"], analysis.get("trust_score") or 0)
+                    )
+
+    def index_analyses(self, documents: Iterable[Tuple[str, str, Optional[str], Optional[str]]]) -> None:
+        """Add (analysis_id, user_id, title, content) tuples to the search index."""
+        self.search.add(documents)
+
+    def search_analyses(self, user_id: str, text: str, limit: int, offset: int) -> Tuple[int, List[Tuple[str, float]]]:
+        """Search a user's analyses, returning the total matches and a page of (analysis_id, score) pairs."""
+        return self.search.search(user_id, text, limit, offset)
+
+    def _index_missing(self) -> None:
+        """Index analyses stored before the search index existed or not indexed because of a crash."""
+        count = self._connect().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        if len(self.search) < count:
+            rows = self._connect().execute("SELECT id, user_id, title, content, content_hash FROM analyses")
+            self.search.add_missing((dict(row) for row in rows), self.get_content)
+
+    def get_profile_stats(self, user_id: str) -> Dict[str, Any]:
+        """Get a user's analysis_count, trust_score_sum and recent_analyses (newest first)."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT analysis_count, trust_score_sum FROM user_stats WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        # The (user_id, created_at) index makes this a short range scan
+        rows = conn.execute(
+            "SELECT * FROM analyses WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+            (user_id, PROFILE_RECENT_SIZE)
+        )
+        recent = []
+        for recent_row in rows:
+            analysis = self._analysis_from_row(recent_row)
+            analysis["id"] = recent_row["id"]
+            recent.append(analysis)
+        return {
+            "analysis_count": row["analysis_count"] if row else 0,
+            "trust_score_sum": row["trust_score_sum"] if row else 0.0,
+            "recent_analyses": recent
+        }
+
+    def check_profile_stats(self, repair: bool = False) -> List[str]:
+        """Get the IDs of users whose maintained profile stats are wrong, optionally rebuilding them."""
+        conn = self._connect()
+        rows = conn.execute("""
+            SELECT actual.user_id FROM (
+                SELECT user_id, COUNT(*) AS analysis_count, TOTAL(trust_score) AS trust_score_sum
+                FROM analyses GROUP BY user_id
+            ) actual
+            LEFT JOIN user_stats stats ON stats.user_id = actual.user_id
+            WHERE stats.user_id IS NULL OR stats.analysis_count != actual.analysis_count
+                OR ABS(stats.trust_score_sum - actual.trust_score_sum) > 1e-6
+            UNION ALL
+            SELECT user_id FROM user_stats
+            WHERE NOT EXISTS (SELECT 1 FROM analyses WHERE analyses.user_id = user_stats.user_id)
+        """)
+        mismatched = [row["user_id"] for row in rows]
+        if mismatched and repair:
+            with conn:
+                conn.execute("DELETE FROM user_stats")
+                conn.execute(
+                    "INSERT INTO user_stats (user_id, analysis_count, trust_score_sum) "
+                    "SELECT user_id, COUNT(*), TOTAL(trust_score) FROM analyses GROUP BY user_id"
+                )
+        return mismatched
+
+    # Analysis content
+
+    def put_content(self, content: str) -> str:
+        """Store analysis content once, returning its hash."""
+        digest = content_hash(content)
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM contents WHERE hash = ?", (digest,)).fetchone() is None:
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO contents (hash, data) VALUES (?, ?)",
+                    (digest, compress_content(content))
+                )
+        return digest
+
+    def get_content(self, content_hash: str) -> Optional[str]:
+        """Get analysis content by hash, or None."""
+        row = self._connect().execute("SELECT data FROM contents WHERE hash = ?", (content_hash,)).fetchone()
+        return decompress_content(row["data"]) if row else None
+
+    # Password reset tokens
+
+    def insert_reset_token(self, token: str, data: Dict[str, Any]) -> None:
+        """Insert a password reset token, purging expired ones."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM reset_tokens WHERE expires_at < ?", (datetime.now().isoformat(),))
+            conn.execute(
+                "INSERT OR REPLACE INTO reset_tokens (token, user_id, email, expires_at) VALUES (?, ?, ?, ?)",
+                (token, data["user_id"], data["email"], data["expires_at"])
+            )
+
+    def get_reset_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Get the data of a password reset token, or None."""
+        row = self._connect().execute(
+            "SELECT user_id, email, expires_at FROM reset_tokens WHERE token = ?", (token,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def delete_reset_token(self, token: str) -> None:
+        """Delete a password reset token."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM reset_tokens WHERE token = ?", (token,))
+
+    # Migration
+
+    def migrate_from_json(self, db_dir: str) -> Dict[str, int]:
+        """
+        Import users, analyses and reset tokens from the JSON files.
+
+        Records that already exist are left untouched, so the migration can
+        be re-run safely. Inline analysis content is moved to the
+        deduplicated content table and the profile stats are recomputed.
+
+        Args:
+            db_dir: The directory containing users.json, reset_tokens.json and
+                the analyses (analyses.json or the analysis log directory)
+
+        Returns:
+            Dict[str, int]: The number of records read from each file
+        """
+        def load(name):
+            path = os.path.join(db_dir, name)
+            if not os.path.exists(path):
+                return {}
+            with open(path, "r") as f:
+                return json.load(f)
+
+        users = load("users.json")
+        analyses = load("analyses.json")
+        tokens = load("reset_tokens.json")
+
+        # Analyses written by the JSON backend live in its append-only log
+        log_dir = os.path.join(db_dir, "analyses")
+        if os.path.isdir(log_dir):
+            from analysis_log import AnalysisLog
+            for analysis in AnalysisLog(log_dir):
+                analyses[analysis.pop("id")] = analysis
+
+        # Content written by the JSON backend lives in its blob store
+        blob_dir = os.path.join(db_dir, "contents")
+        blobs = None
+        if os.path.isdir(blob_dir):
+            from content_store import BlobStore
+            blobs = BlobStore(blob_dir)
+        for analysis in analyses.values():
+            if analysis.get("content_hash") and blobs is not None:
+                content = blobs.get(analysis["content_hash"])
+                if content is not None:
+                    self.put_content(content)
+            elif analysis.get("content") is not None:
+                analysis["content_hash"] = self.put_content(analysis.pop("content"))
+
+        user_placeholders = ", ".join("?" for _ in range(len(USER_COLUMNS) + 1))
+        analysis_placeholders = ", ".join("?" for _ in range(len(ANALYSIS_COLUMNS) + 1))
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO users (id, {', '.join(USER_COLUMNS)}) VALUES ({user_placeholders})",
+                ([user_id] + self._user_values(user) for user_id, user in users.items())
+            )
+            conn.executemany(
+                f"INSERT OR IGNORE INTO analyses (id, {', '.join(ANALYSIS_COLUMNS)}) VALUES ({analysis_placeholders})",
+                ([analysis_id] + self._analysis_values(analysis) for analysis_id, analysis in analyses.items())
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO reset_tokens (token, user_id, email, expires_at) VALUES (?, ?, ?, ?)",
+                ((token, data["user_id"], data["email"], data["expires_at"]) for token, data in tokens.items())
+            )
+        self.check_profile_stats(repair=True)
+        self._index_missing()
+
+        return {"users": len(users), "analyses": len(analyses), "reset_tokens": len(tokens)}
@@ -0,0 +1,64 @@
+"""
+Regression tests for the stance of fact-check matches.
+
+An article debunking a false claim matches the claim as closely as one
+repeating it; only the latter may lower the fact verification factor.
+
+Run with: python -m pytest test_fact_check.py
+"""
+
+import csv
+
+import pytest
+
+from fact_check import FactCheckIndex
+from scoring import ScoringConfig, TrustScoringEngine
+
+FACT_CHECKS = [
+    ("The MMR vaccine causes autism", "false"),
+    ("5G mobile networks spread the coronavirus", "false"),
+]
+
+DEBUNKING = [
+    "A large study of 650,000 children confirms that vaccines do not cause autism, researchers said.",
+    "Scientists say there is no evidence 5G networks spread the coronavirus.",
+]
+
+REPEATING = [
+    "Doctors now admit that the MMR vaccine causes autism in children, the report says.",
+    "Experts warn that 5G mobile networks spread the coronavirus across the country.",
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "fact_checks.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["claim", "verdict", "source", "url"])
+        for claim, verdict in FACT_CHECKS:
+            writer.writerow([claim, verdict, "", ""])
+    return FactCheckIndex(str(path))
+
+
+@pytest.mark.parametrize("text", DEBUNKING)
+def test_debunking_article_disputes_claim(index, text):
+    matches = index.check(text)
+    assert [match["stance"] for match in matches] == ["disputes"]
+    assert index.evidence(matches) == []
+
+
+@pytest.mark.parametrize("text", REPEATING)
+def test_repeating_article_repeats_claim(index, text):
+    matches = index.check(text)
+    assert [match["stance"] for match in matches] == ["repeats"]
+    assert index.evidence(matches) == matches
+
+
+def test_disputed_claims_are_reported_but_not_scored(index):
+    engine = TrustScoringEngine(None, None, ScoringConfig(noise=False), fact_checker=index)
+    features = engine.extract_features(DEBUNKING + REPEATING)
+    assert all(len(checks) == 1 for checks in features["fact_checks"])
+    assert list(features["fact_weight"][:2]) == [0.0, 0.0]
+    assert all(features["fact_weight"][2:] == 1.0)
+    assert all(features["fact_rating"][2:] == 0.0)
@@ -0,0 +1,80 @@
+"""
+Tests for the similar-article index when several users analyze the same text.
+
+Each user keeps a vector of their own analysis of a text, so one user's
+analysis does not replace another's.
+
+Run with: python -m pytest test_similarity_index.py
+"""
+
+import os
+import sqlite3
+import warnings
+
+import joblib
+import pytest
+
+from similarity_index import SimilarityIndex
+
+VECTORIZER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model", "tfidf_vectorizer.pkl")
+
+TEXT = (
+    "The city council approved the new budget for road repairs and parks after a long debate on Tuesday evening, "
+    "officials said, adding that construction would start in the spring."
+)
+OTHER_TEXT = "Scientists reported a new species of frog discovered in the rainforest during a survey last year."
+
+
+@pytest.fixture(scope="module")
+def vectorizer():
+    with warnings.catch_warnings():
+        # The pickled vectorizer may come from another scikit-learn version
+        warnings.simplefilter("ignore")
+        return joblib.load(VECTORIZER_PATH)
+
+
+@pytest.fixture
+def index(tmp_path, vectorizer):
+    return SimilarityIndex(str(tmp_path / "similarity.db"), vectorizer)
+
+
+def test_users_analyzing_the_same_text_keep_their_own_vectors(index):
+    index.add("analysis-a", "user-a", TEXT)
+    index.add("analysis-b", "user-b", TEXT)
+    vector = index.vectorize([TEXT])
+
+    assert index.nearest(vector, k=1, min_similarity=0.98, user_id="user-a")[0][:2] == ("analysis-a", "user-a")
+    assert index.nearest(vector, k=1, min_similarity=0.98, user_id="user-b")[0][:2] == ("analysis-b", "user-b")
+    assert {match[0] for match in index.nearest(vector, k=5)} == {"analysis-a", "analysis-b"}
+
+
+def test_own_analysis_is_found_among_many_copies(index):
+    index.add_many([(f"analysis-{i}", f"user-{i}", TEXT) for i in range(20)])
+    index.add("analysis-other", "user-0", OTHER_TEXT)
+
+    matches = index.nearest(index.vectorize([TEXT]), k=1, min_similarity=0.98, user_id="user-7")
+    assert [match[:2] for match in matches] == [("analysis-7", "user-7")]
+    assert index.nearest(index.vectorize([TEXT]), k=1, min_similarity=0.98, user_id="user-unknown") == []
+
+
+def test_reanalysis_replaces_only_the_users_own_vector(index):
+    index.add("analysis-a1", "user-a", TEXT)
+    index.add("analysis-b", "user-b", TEXT)
+    index.add("analysis-a2", "user-a", TEXT)
+
+    assert len(index) == 2
+    assert {match[0] for match in index.nearest(index.vectorize([TEXT]), k=5)} == {"analysis-a2", "analysis-b"}
+
+
+def test_index_of_the_first_version_is_rebuilt(tmp_path, vectorizer):
+    path = str(tmp_path / "similarity.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE similarity_vectors (seq INTEGER PRIMARY KEY, content_hash TEXT UNIQUE)")
+
+    index = SimilarityIndex(path, vectorizer)
+    assert not index.complete
+    assert index.add_missing([
+        {"id": "analysis-a", "user_id": "user-a", "content": TEXT},
+        {"id": "analysis-b", "user_id": "user-b", "content": TEXT},
+    ]) == 2
+    assert index.complete and len(index) == 2
@@ -0,0 +1,138 @@
+"""
+URL canonicalization for the Fake News Detector.
+
+The same article is often reached through several addresses: with
+tracking parameters, a fragment, http instead of https, www or not, its
+AMP version or a trailing slash. canonicalize_url() maps them to one
+address, which keys the scrape cache, and find_canonical_url() reads the
+address a page declares for itself (<link rel="canonical">), so aliases the
+rules cannot see are learned after the first download.
+"""
+
+import html as html_lib
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Query parameters that track the visit and never change the page
+TRACKING_PARAMETERS = frozenset({
+    "fbclid", "gclid", "gclsrc", "dclid", "msclkid", "yclid", "twclid", "ttclid", "li_fat_id", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok", "ref_src", "ref_url",
+    "cmpid", "ocid", "ncid", "smid", "smtyp", "at_medium", "at_campaign",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "itm_")
+
+# Query parameters that request the AMP version of a page
+AMP_PARAMETERS = {"amp": None, "outputtype": "amp", "usqp": None, "amp_js_v": None}
+
+# Host prefixes of the same site
+HOST_PREFIXES = ("www.", "amp.")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Only the head of a page is searched for its canonical link
+CANONICAL_SEARCH_CHARS = 65536
+LINK_TAG = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+CANONICAL_REL = re.compile(r"""\brel\s*=\s*["']?[^"'>]*\bcanonical\b""", re.IGNORECASE)
+HREF = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+
+def _is_tracking(name: str, value: str) -> bool:
+    """Check if a query parameter only tracks the visit or requests the AMP version."""
+    name = name.lower()
+    if name in TRACKING_PARAMETERS or name.startswith(TRACKING_PREFIXES):
+        return True
+    if name in AMP_PARAMETERS:
+        return AMP_PARAMETERS[name] is None or value.lower() == AMP_PARAMETERS[name]
+    return False
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL, so that the addresses of one page map to one cache key.
+
+    The scheme becomes https, the host is lowercased without "www.", "amp."
+    or a default port, tracking and AMP query parameters are dropped and
+    the others sorted, AMP path segments ("/amp", ".amp") and a trailing
+    slash are removed, and so is the fragment. The result is a key: it is
+    not necessarily an address that can be downloaded.
+
+    Args:
+        url: The URL (http or https)
+
+    Returns:
+        str: The canonical form of the URL, or the URL itself if it cannot be parsed
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix) and "." in host[len(prefix):]:
+            host = host[len(prefix):]
+            break
+    if ":" in host:
+        host = f"[{host}]"
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if segments and segments[-1].lower() == "amp":
+        segments.pop()
+    elif segments and segments[0].lower() == "amp":
+        segments.pop(0)
+    if segments and segments[-1].lower().endswith(".amp"):
+        segments[-1] = segments[-1][:-4]
+    elif segments and segments[-1].lower().endswith(".amp.html"):
+        segments[-1] = segments[-1][:-9] + ".html"
+    path = "/" + "/".join(segments)
+
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(name, value)
+    )
+    return urlunsplit(("https" if scheme in DEFAULT_PORTS else scheme, host, path, urlencode(query), ""))
+
+
+def find_canonical_url(url: str, html: str) -> Optional[str]:
+    """
+    Find the canonical address a page declares for itself.
+
+    Args:
+        url: The URL the page was downloaded from (relative links are resolved against it)
+        html: The HTML of the page
+
+    Returns:
+        str: The absolute canonical URL, or None if the page declares no http(s) one
+    """
+    for tag in LINK_TAG.finditer(html, 0, CANONICAL_SEARCH_CHARS):
+        if not CANONICAL_REL.search(tag.group()):
+            continue
+        href = HREF.search(tag.group())
+        if not href:
+            continue
+        value = next(group for group in href.groups() if group is not None)
+        canonical = urljoin(url, html_lib.unescape(value).strip())
+        if urlsplit(canonical).scheme in DEFAULT_PORTS:
+            return canonical
+    return None
+
+
+def same_site(url: str, other: str) -> bool:
+    """
+    Check if two URLs are on the same host once canonicalized.
+
+    Only a page's own site may declare where its article is cached, so a
+    page cannot place its content under another site's addresses.
+
+    Args:
+        url: A URL
+        other: Another URL
+
+    Returns:
+        bool: True if both canonicalize to the same host
+    """
+    return urlsplit(canonicalize_url(url)).netloc == urlsplit(canonicalize_url(other)).netloc
@@ -6,17 +6,18 @@ This module provides functions for extracting content from URLs.
 
 import logging
 import re
-import json
 import os
+import sqlite3
 import time
-import hashlib
-from typing import Dict, Any, Optional, Tuple, List
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, NamedTuple, Optional, Tuple, List
 from urllib.parse import urlparse
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import requests
 import validators
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, UnicodeDammit
 from readability import Document
 import trafilatura
 from newspaper import Article
@@ -25,6 +26,10 @@ import extruct
 from dateutil import parser as date_parser
 from w3lib.html import get_base_url
 
+from domain_reputation import get_reputation_index, normalize_host
+from scrape_cache import get_scrape_cache
+from url_canonical import canonicalize_url, find_canonical_url, same_site
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,128 +37,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger("url-scraper")
 
-# List of known news domains and their credibility scores (0-100)
-NEWS_DOMAINS = {
-    # Tier 1: High-quality international news sources (80-95)
-    "bbc.com": 90,
-    "bbc.co.uk": 90,
-    "reuters.com": 95,
-    "apnews.com": 95,
-    "nytimes.com": 85,
-    "washingtonpost.com": 85,
-    "theguardian.com": 85,
-    "wsj.com": 85,
-    "economist.com": 90,
-    "bloomberg.com": 85,
-    "ft.com": 90,
-    "aljazeera.com": 80,
-    "france24.com": 85,
-    "dw.com": 85,  # Deutsche Welle
-
-    # Tier 2: Reputable national news sources (75-85)
-    "npr.org": 85,
-    "pbs.org": 85,
-    "time.com": 80,
-    "theatlantic.com": 80,
-    "newyorker.com": 80,
-    "politico.com": 80,
-    "axios.com": 80,
-    "latimes.com": 80,
-    "chicagotribune.com": 80,
-    "bostonglobe.com": 80,
-    "usatoday.com": 75,
-    "cnn.com": 75,
-    "nbcnews.com": 80,
-    "abcnews.go.com": 80,
-    "cbsnews.com": 80,
-
-    # Tier 3: Mainstream news with varying quality (65-75)
-    "foxnews.com": 70,
-    "newsweek.com": 70,
-    "thehill.com": 75,
-    "vox.com": 75,
-    "slate.com": 70,
-    "thedailybeast.com": 65,
-    "huffpost.com": 65,
-    "buzzfeednews.com": 70,
-    "vice.com": 65,
-
-    # Tier 4: Tabloids and less reliable sources (50-65)
-    "nypost.com": 60,
-    "dailymail.co.uk": 55,
-    "thesun.co.uk": 50,
-    "mirror.co.uk": 55,
-    "express.co.uk": 55,
-
-    # Tier 5: Highly partisan or questionable sources (30-50)
-    "breitbart.com": 45,
-    "dailycaller.com": 45,
-    "theblaze.com": 45,
-    "oann.com": 40,
-    "newsmax.com": 40,
-
-    # Tier 6: Known for misinformation (below 30)
-    "infowars.com": 20,
-    "naturalnews.com": 15,
-    "zerohedge.com": 25,
-
-    # Science and technology sources
-    "scientificamerican.com": 90,
-    "nature.com": 95,
-    "science.org": 95,
-    "newscientist.com": 85,
-    "wired.com": 80,
-    "techcrunch.com": 75,
-    "arstechnica.com": 85,
-    "technologyreview.com": 85,
-
-    # Business news
-    "cnbc.com": 80,
-    "forbes.com": 75,
-    "businessinsider.com": 70,
-    "marketwatch.com": 75,
-
-    # International sources
-    "cbc.ca": 85,  # Canadian Broadcasting Corporation
-    "abc.net.au": 85,  # Australian Broadcasting Corporation
-    "smh.com.au": 80,  # Sydney Morning Herald
-    "irishtimes.com": 80,
-    "independent.co.uk": 75,
-    "telegraph.co.uk": 75,
-    "thelocal.fr": 75,
-    "thelocal.de": 75,
-    "spiegel.de": 85,
-    "scmp.com": 75,  # South China Morning Post
-}
-
-# List of known fake news domains
-FAKE_NEWS_DOMAINS = [
-    "infowars.com",
-    "naturalnews.com",
-    "worldnewsdailyreport.com",
-    "empirenews.net",
-    "nationalreport.net",
-    "worldtruth.tv",
-    "beforeitsnews.com",
-    "endingthefed.com",
-    "dcclothesline.com",
-    "redflagnews.com",
-    "disclose.tv",
-    "yournewswire.com",
-    "newspunch.com",
-    "americannews.com",
-    "thelastlineofdefense.org",
-    "libertywriters.com",
-    "civictribune.com",
-    "amplifyingglass.com",
-    "abcnews.com.co",
-    "usatoday.com.co",
-    "washingtonpost.com.co",
-    "nbc.com.co",
-    "cnn.com.co",
-    "foxnews.com.co",
-]
-
 
 def is_valid_url(url: str) -> bool:
     """
@@ -200,7 +83,7 @@ def get_domain(url: str) -> str:
         str: The domain name
     """
     parsed_url = urlparse(url)
-    domain = parsed_url.netloc
+    domain = normalize_host(parsed_url.netloc)
 
     # Remove 'www.' prefix if present
     if domain.startswith('www.'):
@@ -219,33 +102,153 @@ def get_source_credibility(url: str) -> int:
     Returns:
         int: The credibility score (0-100)
     """
-    domain = get_domain(url)
+    # Subdomains such as edition.cnn.com resolve to their listed parent domain;
+    # unknown domains get the default score
+    return get_reputation_index().credibility(get_domain(url))
+
+
+# User agent sent with page downloads
+FETCH_USER_AGENT = os.environ.get(
+    "SCRAPER_USER_AGENT",
+    "Mozilla/5.0 (compatible; TrustVerify/1.0)"
+)
+
+
+# Largest page downloaded, in bytes (decompressed); larger ones are abandoned
+SCRAPER_MAX_PAGE_BYTES = int(os.environ.get("SCRAPER_MAX_PAGE_BYTES", str(5 * 1024 * 1024)))
+
+# Seconds a page download may take in all, retries included
+SCRAPER_FETCH_DEADLINE = float(os.environ.get("SCRAPER_FETCH_DEADLINE", "20"))
+
+# Content types of the pages the extractors read (a response without one is read too)
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class FetchError(Exception):
+    """
+    A page that could not be downloaded, with the reason: "http_status",
+    "timeout", "connection", "content_type" (not HTML) or "too_large".
+    """
+
+    def __init__(self, message: str, reason: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.status = status
+
+
+class Page(NamedTuple):
+    """A downloaded page."""
+
+    content: bytes
+    content_type: str
+    # The ETag and Last-Modified headers of the response, if any
+    validators: Dict[str, str]
+    # True if the page was requested with validators and has not changed (empty content)
+    not_modified: bool = False
+
+
+def conditional_headers(validators: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Build the headers of a conditional request for a page.
+
+    Args:
+        validators: The "ETag" and "Last-Modified" headers of an earlier response
+
+    Returns:
+        Dict: The If-None-Match and If-Modified-Since headers they call for
+    """
+    headers = {}
+    if validators and validators.get("ETag"):
+        headers["If-None-Match"] = validators["ETag"]
+    if validators and validators.get("Last-Modified"):
+        headers["If-Modified-Since"] = validators["Last-Modified"]
+    return headers
+
+
+def response_validators(headers) -> Dict[str, str]:
+    """
+    Get the validators of a response, which a later conditional request can send.
+
+    Args:
+        headers: The (case-insensitive) headers of the response
+
+    Returns:
+        Dict: Its "ETag" and "Last-Modified" headers, if any
+    """
+    return {name: headers[name] for name in ("ETag", "Last-Modified") if headers.get(name)}
+
+
+def check_response_headers(headers) -> None:
+    """
+    Reject a response before its body is read, if it is not a page or is too large.
+
+    Args:
+        headers: The (case-insensitive) headers of the response
+
+    Raises:
+        FetchError: If its Content-Type is not HTML or its Content-Length exceeds SCRAPER_MAX_PAGE_BYTES
+    """
+    content_type = headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+    if content_type and content_type not in HTML_CONTENT_TYPES:
+        raise FetchError(f"Not an HTML page: {content_type}", "content_type")
+    length = headers.get("Content-Length", "")
+    if length.isdigit() and int(length) > SCRAPER_MAX_PAGE_BYTES:
+        raise FetchError(f"Page of {length} bytes exceeds {SCRAPER_MAX_PAGE_BYTES} bytes", "too_large")
+
+
+def check_download(size: int, start: float) -> None:
+    """
+    Check a download in progress against the size limit and the deadline.
+
+    Args:
+        size: The bytes read so far
+        start: When the download started (time.monotonic())
+
+    Raises:
+        FetchError: If the page exceeds SCRAPER_MAX_PAGE_BYTES or the download SCRAPER_FETCH_DEADLINE
+    """
+    if size > SCRAPER_MAX_PAGE_BYTES:
+        raise FetchError(f"Page exceeds {SCRAPER_MAX_PAGE_BYTES} bytes", "too_large")
+    if time.monotonic() - start > SCRAPER_FETCH_DEADLINE:
+        raise FetchError(f"Download took over {SCRAPER_FETCH_DEADLINE:g} s", "timeout")
 
-    # Check if the domain is in the list of known fake news domains
-    if domain in FAKE_NEWS_DOMAINS:
-        return 0
 
-    # Check if the domain is in the list of known news domains
-    if domain in NEWS_DOMAINS:
-        return NEWS_DOMAINS[domain]
+def decode_html(content: bytes, content_type: str) -> str:
+    """
+    Decode a downloaded page.
+
+    Args:
+        content: The body of the response
+        content_type: The Content-Type header of the response
 
-    # Default credibility score for unknown domains
-    return 50
+    Returns:
+        str: The page, decoded with the charset of the Content-Type if it
+            declares a known one, otherwise with the charset declared in the
+            page or detected from its bytes
+    """
+    encoding = requests.utils.get_encoding_from_headers({"content-type": content_type})
+    if encoding and "charset=" in content_type.lower():
+        try:
+            return content.decode(encoding, errors="replace")
+        except LookupError:
+            pass
+    return UnicodeDammit(content, is_html=True).unicode_markup
 
 
-def extract_with_newspaper(url: str) -> Optional[Dict[str, Any]]:
+def extract_with_newspaper(url: str, html: str) -> Optional[Dict[str, Any]]:
     """
     Extract article content using the newspaper library.
 
     Args:
         url: The URL of the article
+        html: The HTML of the article
 
     Returns:
         Dict: The extracted article data, or None if extraction failed
     """
     try:
         article = Article(url)
-        article.download()
+        article.set_html(html)
         article.parse()
 
         # Check if we got meaningful content
@@ -267,21 +270,19 @@ def extract_with_newspaper(url: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def extract_with_readability(url: str) -> Optional[Dict[str, Any]]:
+def extract_with_readability(url: str, html: str) -> Optional[Dict[str, Any]]:
     """
     Extract article content using the readability library.
 
     Args:
         url: The URL of the article
+        html: The HTML of the article
 
     Returns:
         Dict: The extracted article data, or None if extraction failed
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-
-        doc = Document(response.text)
+        doc = Document(html)
         title = doc.title()
         content = doc.summary()
 
@@ -305,29 +306,25 @@ def extract_with_readability(url: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-def extract_with_trafilatura(url: str) -> Optional[Dict[str, Any]]:
+def extract_with_trafilatura(url: str, html: str) -> Optional[Dict[str, Any]]:
     """
     Extract article content using the trafilatura library.
 
     Args:
         url: The URL of the article
+        html: The HTML of the article
 
     Returns:
         Dict: The extracted article data, or None if extraction failed
     """
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if not downloaded:
-            logger.warning(f"Failed to download content from {url}")
-            return None
-
-        result = trafilatura.extract(downloaded, include_comments=False, include_tables=False)
+        result = trafilatura.extract(html, url=url, include_comments=False, include_tables=False)
         if not result or len(result) < 100:
             logger.warning(f"Trafilatura extraction yielded insufficient content for {url}")
             return None
 
         # Try to extract metadata
-        metadata = trafilatura.extract_metadata(downloaded)
+        metadata = trafilatura.extract_metadata(html, default_url=url)
         title = metadata.title if metadata and metadata.title else ""
 
         return {
@@ -341,75 +338,330 @@ def extract_with_trafilatura(url: str) -> Optional[Dict[str, Any]]:
         return None
 
 
-# Create cache directory if it doesn't exist
-CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
-os.makedirs(CACHE_DIR, exist_ok=True)
+# Extraction methods: the function and whether the page metadata completes its result.
+# In order of preference: on equal quality scores the first one wins
+EXTRACTION_METHODS = {
+    "newspaper": (extract_with_newspaper, False),
+    "trafilatura": (extract_with_trafilatura, True),
+    "readability": (extract_with_readability, True),
+}
+
+# Extraction methods run on every page (comma-separated names)
+SCRAPER_EXTRACTORS = [
+    name.strip() for name in os.environ.get("SCRAPER_EXTRACTORS", ",".join(EXTRACTION_METHODS)).split(",")
+    if name.strip()
+]
+for _name in SCRAPER_EXTRACTORS:
+    if _name not in EXTRACTION_METHODS:
+        logger.warning(f"Ignoring unknown extraction method in SCRAPER_EXTRACTORS: {_name}")
+SCRAPER_EXTRACTORS = [name for name in SCRAPER_EXTRACTORS if name in EXTRACTION_METHODS] or list(EXTRACTION_METHODS)
+
+# How long (in seconds) to wait for all extraction methods before choosing
+# among those that finished; if none succeeded by then, the first success is used
+SCRAPER_EXTRACTION_BUDGET = float(os.environ.get("SCRAPER_EXTRACTION_BUDGET", "2"))
+
+# How long (in seconds) to wait at most for a first usable result, after
+# which the page is given up (extractors still running finish in the background)
+SCRAPER_EXTRACTION_TIMEOUT = float(
+    os.environ.get("SCRAPER_EXTRACTION_TIMEOUT", str(5 * SCRAPER_EXTRACTION_BUDGET))
+)
+
+# Number of threads running extraction methods, shared by all requests
+SCRAPER_EXTRACTOR_THREADS = int(os.environ.get("SCRAPER_EXTRACTOR_THREADS", str(3 * min(4, os.cpu_count() or 1))))
+
+# Weights of the parts of the extraction quality score
+QUALITY_LENGTH_WEIGHT = 0.5
+QUALITY_CONTENT_WEIGHT = 0.3
+QUALITY_TITLE_WEIGHT = 0.2
 
-def get_cache_path(url: str) -> str:
+# Number of words at which the length part of the quality score is full
+QUALITY_FULL_LENGTH_WORDS = 600
+
+# Phrases of page furniture rather than article text
+BOILERPLATE_PATTERN = re.compile(
+    r"cookie|subscribe|sign up|sign in|log in|newsletter|advertisement|all rights reserved|copyright|©|"
+    r"privacy policy|terms of (use|service)|share (this|on)|follow us|read more|related articles|comments",
+    re.IGNORECASE
+)
+
+# Text is split into sentences and lines; a piece shorter than BOILERPLATE_MAX_WORDS
+# words without closing punctuation (menus, captions), or shorter than
+# BOILERPLATE_PHRASE_MAX_WORDS words with a boilerplate phrase, counts as boilerplate
+SEGMENT_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+BOILERPLATE_MAX_WORDS = 6
+BOILERPLATE_PHRASE_MAX_WORDS = 30
+
+
+def boilerplate_ratio(text: str) -> float:
     """
-    Get the cache file path for a URL.
+    Estimate the share of extracted text that is page furniture rather than article text.
 
     Args:
-        url: The URL to get the cache path for
+        text: The extracted text
 
     Returns:
-        str: The cache file path
+        float: The share (0-1) of characters in sentences or lines that look like boilerplate
+    """
+    total = boilerplate = 0
+    for segment in SEGMENT_BREAK.split(text):
+        segment = segment.strip()
+        if not segment:
+            continue
+        total += len(segment)
+        words = len(segment.split())
+        if (words < BOILERPLATE_MAX_WORDS and not segment.endswith((".", "!", "?", '"', "\u201d"))) or (
+                words < BOILERPLATE_PHRASE_MAX_WORDS and BOILERPLATE_PATTERN.search(segment)):
+            boilerplate += len(segment)
+    return boilerplate / total if total else 1.0
+
+
+def score_extraction(article: Dict[str, Any]) -> float:
     """
-    # Create a hash of the URL to use as the filename
-    url_hash = hashlib.md5(url.encode()).hexdigest()
-    return os.path.join(CACHE_DIR, f"{url_hash}.json")
+    Score the quality of an extraction result.
 
-def get_cached_article(url: str) -> Optional[Dict[str, Any]]:
+    Longer text scores higher up to QUALITY_FULL_LENGTH_WORDS words, text
+    with less boilerplate scores higher, and a title adds to the score.
+
+    Args:
+        article: The extracted article data
+
+    Returns:
+        float: The quality score (0-1)
     """
-    Get a cached article if it exists and is not expired.
+    content = article.get("content") or ""
+    length = min(1.0, len(content.split()) / QUALITY_FULL_LENGTH_WORDS)
+    return (
+        QUALITY_LENGTH_WEIGHT * length
+        + QUALITY_CONTENT_WEIGHT * (1 - boilerplate_ratio(content))
+        + QUALITY_TITLE_WEIGHT * bool((article.get("title") or "").strip())
+    )
+
+
+class ExtractorStats:
+    """Per-method counters of runs, usable results, wins and results that came too late."""
+
+    def __init__(self, names: List[str]):
+        self._lock = threading.Lock()
+        self._counts = {name: {"runs": 0, "results": 0, "wins": 0, "late": 0} for name in names}
+
+    def record(self, name: str, result: bool = False, win: bool = False, late: bool = False) -> None:
+        with self._lock:
+            counts = self._counts[name]
+            counts["runs"] += 1
+            counts["results"] += result
+            counts["wins"] += win
+            counts["late"] += late
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get the counters.
+
+        Returns:
+            Dict: For each method: pages it ran on, usable results, times its
+                result was chosen, and times it had not finished within the budget
+        """
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+
+extractor_stats = ExtractorStats(list(EXTRACTION_METHODS))
+
+# Seconds a request waits for a concurrent extraction of the same article
+# before extracting it itself
+SCRAPER_COALESCE_TIMEOUT = float(os.environ.get("SCRAPER_COALESCE_TIMEOUT", "30"))
+
+_extractor_pool: Optional[ThreadPoolExecutor] = None
+_extractor_pool_lock = threading.Lock()
+
+
+def get_extractor_pool() -> ThreadPoolExecutor:
+    """
+    Get the thread pool running extraction methods, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor: The shared pool
+    """
+    global _extractor_pool
+    if _extractor_pool is None:
+        with _extractor_pool_lock:
+            if _extractor_pool is None:
+                _extractor_pool = ThreadPoolExecutor(
+                    max_workers=SCRAPER_EXTRACTOR_THREADS, thread_name_prefix="extractor"
+                )
+    return _extractor_pool
+
+
+def cache_key(url: str) -> str:
+    """
+    Get the key the article of a URL is cached under.
+
+    Addresses of the same page share a key: the URL is canonicalized
+    (scheme, host, tracking parameters, AMP, trailing slash, fragment). An
+    article is only ever written under the key of the URL it was downloaded
+    from.
 
     Args:
         url: The URL of the article
 
+    Returns:
+        str: The cache key
+    """
+    return canonicalize_url(url)
+
+def resolve_cache_alias(key: str) -> str:
+    """
+    Get the key whose article a cache key can be served from.
+
+    If the page of the key declared a canonical address that was downloaded
+    and found to serve the same article, that address's key is used (see
+    find_canonical_alias()).
+
+    Args:
+        key: The cache key of a URL
+
+    Returns:
+        str: The key of its canonical address, or the key itself
+    """
+    try:
+        return get_scrape_cache().get_alias(key) or key
+    except sqlite3.Error as e:
+        logger.error(f"Error reading cache alias for {key}: {e}")
+        return key
+
+def get_cached_article(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a cached article if it exists and is not expired.
+
+    Args:
+        key: The cache key of the article (see cache_key())
+
     Returns:
         Dict: The cached article data, or None if not cached or expired
     """
-    cache_path = get_cache_path(url)
+    try:
+        return get_scrape_cache().get(key)
+    except sqlite3.Error as e:
+        logger.error(f"Error reading cache for {key}: {e}")
+        return None
+
+def get_stale_article(key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, str]]]:
+    """
+    Get an expired cached article that can be revalidated with a conditional request.
 
-    # Check if cache file exists
-    if not os.path.exists(cache_path):
+    Args:
+        key: The cache key of the article (see cache_key())
+
+    Returns:
+        Tuple[Dict, Dict]: The cached article data and the validators of its
+            page, or None if the article is not cached with validators
+    """
+    try:
+        return get_scrape_cache().get_stale(key)
+    except sqlite3.Error as e:
+        logger.error(f"Error reading cache for {key}: {e}")
         return None
 
+def refresh_cached_article(key: str, validators: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Use a cached article for another SCRAPE_CACHE_TTL, its page not having changed.
+
+    Args:
+        key: The cache key of the article (see cache_key())
+        validators: The validators of the Not Modified response, if any
+
+    Returns:
+        Dict: The cached article data, or None if it is no longer cached
+    """
     try:
-        # Read the cache file
-        with open(cache_path, 'r', encoding='utf-8') as f:
-            cached_data = json.load(f)
-
-        # Check if the cache is expired (24 hours)
-        cache_time = datetime.fromisoformat(cached_data.get('cache_time', '2000-01-01T00:00:00'))
-        if datetime.now() - cache_time > timedelta(hours=24):
-            # Cache is expired
-            return None
+        return get_scrape_cache().refresh(key, validators=validators)
+    except sqlite3.Error as e:
+        logger.error(f"Error refreshing cache for {key}: {e}")
+        return None
 
-        return cached_data
-    except Exception as e:
-        logger.error(f"Error reading cache for {url}: {e}")
+def get_cached_failure(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the recent failure of a URL, so it is not downloaded and parsed again.
+
+    Args:
+        key: The cache key of the article (see cache_key())
+
+    Returns:
+        Dict: The reason, HTTP status and duration of the failed attempt, or
+            None if the URL has not failed within SCRAPE_FAILURE_TTL seconds
+    """
+    try:
+        return get_scrape_cache().get_failure(key)
+    except sqlite3.Error as e:
+        logger.error(f"Error reading cached failure for {key}: {e}")
         return None
 
-def cache_article(url: str, article_data: Dict[str, Any]) -> None:
+def cache_failure(key: str, reason: str, status: Optional[int], elapsed: float) -> None:
     """
-    Cache an article.
+    Remember that the article of a URL could not be extracted.
 
     Args:
-        url: The URL of the article
-        article_data: The article data to cache
+        key: The cache key of the article (see cache_key())
+        reason: Why (a FetchError reason, or "too_short" if no extractor found enough text)
+        status: The HTTP status of the response, if any
+        elapsed: The seconds the attempt took
     """
-    cache_path = get_cache_path(url)
+    try:
+        get_scrape_cache().put_failure(key, reason, status, elapsed)
+    except sqlite3.Error as e:
+        logger.error(f"Error caching failure for {key}: {e}")
+
+def add_cache_alias(key: str, target: str) -> None:
+    """
+    Make a cache key an alias of another, so it is served the other's article while that one is cached.
 
+    Args:
+        key: The alias
+        target: The key the article is cached under
+    """
     try:
-        # Add cache metadata
-        article_data['cache_time'] = datetime.now().isoformat()
+        get_scrape_cache().put_alias(key, target)
+    except sqlite3.Error as e:
+        logger.error(f"Error caching alias for {key}: {e}")
 
-        # Write to cache file
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            json.dump(article_data, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        logger.error(f"Error caching article for {url}: {e}")
+def find_canonical_alias(url: str, html: str, key: str) -> Optional[str]:
+    """
+    Find the canonical address of a page whose article the page's key could be served from.
+
+    A page only declares its canonical address: the alias from the page's
+    key to the address's key is recorded once the address itself has been
+    downloaded and serves the same article. A page can thus only change
+    what its own addresses are served, never what another page's are.
+
+    Args:
+        url: The URL the page was downloaded from
+        html: The HTML of the page
+        key: The cache key of the URL
+
+    Returns:
+        str: The canonical URL, or None if the page declares none with
+            another key on its own site, or its key is an alias of it already
+    """
+    canonical = find_canonical_url(url, html)
+    if not canonical or not same_site(url, canonical):
+        return None
+    canonical_key = cache_key(canonical)
+    if canonical_key == key or resolve_cache_alias(key) == canonical_key:
+        return None
+    return canonical
+
+def cache_article(key: str, article_data: Dict[str, Any], validators: Optional[Dict[str, str]] = None) -> None:
+    """
+    Cache an article.
+
+    Args:
+        key: The cache key of the article (see cache_key())
+        article_data: The article data to cache
+        validators: The ETag and Last-Modified headers of the page, if any
+    """
+    try:
+        get_scrape_cache().put(key, article_data, validators=validators)
+    except sqlite3.Error as e:
+        logger.error(f"Error caching article for {key}: {e}")
 
 def extract_metadata(url: str, html: str) -> Dict[str, Any]:
     """
@@ -430,7 +682,7 @@ def extract_metadata(url: str, html: str) -> Dict[str, Any]:
         extracted = extruct.extract(
             html,
             base_url=base_url,
-            syntaxes=['json-ld', 'microdata', 'opengraph', 'microformat', 'dublin']
+            syntaxes=['json-ld', 'microdata', 'opengraph', 'microformat', 'dublincore']
         )
 
         # Process JSON-LD
@@ -463,8 +715,14 @@ def extract_metadata(url: str, html: str) -> Dict[str, Any]:
                 metadata['authors'] = og.get('article:author', '')
 
         # Process Dublin Core
-        if extracted.get('dublin'):
-            dc = extracted['dublin'][0] if extracted['dublin'] else {}
+        if extracted.get('dublincore'):
+            elements = extracted['dublincore'][0].get('elements', [])
+            # Elements are named "DC.title" and the like; key them by their term
+            dc = {
+                (element.get('URI') or element.get('name', '')).rsplit('/', 1)[-1].rsplit('.', 1)[-1].lower():
+                    element.get('content', '')
+                for element in elements
+            }
             if not metadata.get('title'):
                 metadata['title'] = dc.get('title', '')
             if not metadata.get('description'):
@@ -488,124 +746,118 @@ def extract_metadata(url: str, html: str) -> Dict[str, Any]:
         logger.error(f"Error extracting metadata from {url}: {e}")
         return {}
 
-def extract_article_from_url(url: str) -> Tuple[Optional[Dict[str, Any]], str]:
+def add_metadata(article: Dict[str, Any], metadata: Dict[str, Any]) -> None:
     """
-    Extract article content from a URL using multiple methods.
+    Complete extracted article data with page metadata.
+
+    Args:
+        article: The extracted article data, updated in place
+        metadata: The metadata returned by extract_metadata
+    """
+    if metadata.get('title') and not article.get('title'):
+        article['title'] = metadata['title']
+    if metadata.get('authors'):
+        article['authors'] = metadata['authors']
+    if metadata.get('published_date'):
+        article['publish_date'] = metadata['published_date']
+    if metadata.get('description'):
+        article['description'] = metadata['description']
+    if metadata.get('section'):
+        article['section'] = metadata['section']
+    if metadata.get('keywords'):
+        article['keywords'] = metadata['keywords']
+
+
+def extract_article_from_html(
+    url: str, html: str, validators: Optional[Dict[str, str]] = None, key: Optional[str] = None
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Extract article content from the downloaded HTML of a page, and cache it.
+
+    All extraction methods run concurrently on the same HTML. After
+    SCRAPER_EXTRACTION_BUDGET seconds (or once all finished) the result with
+    the best quality score is used; methods that have not finished are
+    abandoned (those not started yet are cancelled, running ones finish in
+    the background and their result is dropped). If none has succeeded by
+    then, the first success is used, unless none arrives within
+    SCRAPER_EXTRACTION_TIMEOUT seconds.
+
+    The article is cached under the key of the URL it was downloaded from,
+    never under the canonical address the page declares.
 
     Args:
         url: The URL of the article
+        html: The HTML of the page
+        validators: The ETag and Last-Modified headers of the page, cached with the article
+        key: The cache key of the URL (default: cache_key(url))
 
     Returns:
         Tuple[Dict, str]: The extracted article data and the method used, or (None, "") if extraction failed
     """
-    # Validate the URL
-    if not is_valid_url(url):
-        logger.error(f"Invalid URL: {url}")
+    pool = get_extractor_pool()
+    futures: Dict[Future, str] = {
+        pool.submit(EXTRACTION_METHODS[name][0], url, html): name for name in SCRAPER_EXTRACTORS
+    }
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def collect(done) -> None:
+        for future in done:
+            article = None if future.exception() else future.result()
+            if article and article["content"]:
+                results[futures[future]] = article
+
+    start = time.monotonic()
+    done, pending = wait(futures, timeout=SCRAPER_EXTRACTION_BUDGET)
+    collect(done)
+    # Methods that had not finished within the budget, even if their result is used below
+    late = set(pending)
+    # Past the budget without a usable result, take the first one to arrive
+    while not results and pending:
+        remaining = SCRAPER_EXTRACTION_TIMEOUT - (time.monotonic() - start)
+        if remaining <= 0:
+            logger.error(f"No extraction method succeeded with {url} within {SCRAPER_EXTRACTION_TIMEOUT:g} s")
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        collect(done)
+    for future in pending:
+        future.cancel()
+
+    best = None
+    if results:
+        # Highest score first, then the order of preference
+        best = max(results, key=lambda name: (score_extraction(results[name]), -SCRAPER_EXTRACTORS.index(name)))
+    for future, name in futures.items():
+        extractor_stats.record(name, result=name in results, win=name == best, late=future in late)
+
+    if best is None:
+        logger.error(f"Failed to extract content from {url} using all available methods")
         return None, ""
 
-    # Check cache first
-    cached_article = get_cached_article(url)
-    if cached_article:
-        logger.info(f"Using cached article for {url}")
-        return cached_article, cached_article.get('extraction_method', 'cache')
+    article = results[best]
+    article['extraction_method'] = best
 
-    # Try different extraction methods in order of preference
+    # The metadata completes the methods that do not extract it themselves
+    if EXTRACTION_METHODS[best][1]:
+        add_metadata(article, extract_metadata(url, html))
 
-    # 1. Try newspaper
-    article = extract_with_newspaper(url)
-    if article and article["content"]:
-        # Add extraction method
-        article['extraction_method'] = 'newspaper'
-
-        # Cache the article
-        cache_article(url, article)
-
-        return article, "newspaper"
-
-    # 2. Try trafilatura
-    article = extract_with_trafilatura(url)
-    if article and article["content"]:
-        # Add extraction method
-        article['extraction_method'] = 'trafilatura'
-
-        # Try to get additional metadata
-        try:
-            response = requests.get(url, timeout=10)
-            if response.ok:
-                metadata = extract_metadata(url, response.text)
-                # Update article with metadata
-                if metadata.get('title') and not article.get('title'):
-                    article['title'] = metadata['title']
-                if metadata.get('authors'):
-                    article['authors'] = metadata['authors']
-                if metadata.get('published_date'):
-                    article['publish_date'] = metadata['published_date']
-                if metadata.get('description'):
-                    article['description'] = metadata['description']
-                if metadata.get('section'):
-                    article['section'] = metadata['section']
-                if metadata.get('keywords'):
-                    article['keywords'] = metadata['keywords']
-        except Exception as e:
-            logger.warning(f"Error getting additional metadata for {url}: {e}")
+    cache_article(key or cache_key(url), article, validators)
 
-        # Cache the article
-        cache_article(url, article)
+    return article, best
 
-        return article, "trafilatura"
 
-    # 3. Try readability
-    article = extract_with_readability(url)
-    if article and article["content"]:
-        # Add extraction method
-        article['extraction_method'] = 'readability'
-
-        # Try to get additional metadata
-        try:
-            response = requests.get(url, timeout=10)
-            if response.ok:
-                metadata = extract_metadata(url, response.text)
-                # Update article with metadata
-                if metadata.get('title') and not article.get('title'):
-                    article['title'] = metadata['title']
-                if metadata.get('authors'):
-                    article['authors'] = metadata['authors']
-                if metadata.get('published_date'):
-                    article['publish_date'] = metadata['published_date']
-                if metadata.get('description'):
-                    article['description'] = metadata['description']
-                if metadata.get('section'):
-                    article['section'] = metadata['section']
-                if metadata.get('keywords'):
-                    article['keywords'] = metadata['keywords']
-        except Exception as e:
-            logger.warning(f"Error getting additional metadata for {url}: {e}")
-
-        # Cache the article
-        cache_article(url, article)
-
-        return article, "readability"
-
-    # All methods failed
-    logger.error(f"Failed to extract content from {url} using all available methods")
-    return None, ""
-
-
-def get_article_from_url(url: str) -> Optional[Dict[str, Any]]:
+def complete_article(url: str, article: Dict[str, Any], method: str) -> Dict[str, Any]:
     """
-    Get article content from a URL.
+    Add the source credibility, summary and reading time to extracted article data.
 
     Args:
         url: The URL of the article
+        article: The extracted article data, updated in place
+        method: The extraction method used
 
     Returns:
-        Dict: The article data, or None if extraction failed
+        Dict: The article data
     """
-    article, method = extract_article_from_url(url)
-
-    if not article:
-        return None
-
     # Add source credibility
     article["source_credibility"] = get_source_credibility(url)
 
@@ -619,8 +871,8 @@ def get_article_from_url(url: str) -> Optional[Dict[str, Any]]:
     # Add timestamp
     article["timestamp"] = datetime.now().isoformat()
 
-    # Check if the domain is in the fake news domains list
-    article["is_known_fake_news"] = article["domain"] in FAKE_NEWS_DOMAINS
+    # Check if the domain is a known fake news domain
+    article["is_known_fake_news"] = get_reputation_index().is_fake(article["domain"])
 
     # Add a summary if content is long
     if len(article["content"]) > 1000:
@@ -0,0 +1,158 @@
+"""
+HTTP client for the news collection pipeline.
+
+The collector's downloads (RSS feeds, NewsAPI, article pages) go through
+one requests session per process: connections are kept alive in a pool
+per host and reused, connection errors and transient statuses are retried
+with exponential backoff, and requests have default timeouts. It reads the
+same HTTP_* settings as the API's client, with only requests as a dependency.
+
+Unlike the API's client, it has no DNS cache: a run fetches a few dozen
+hosts one after the other, and the kept-alive connections already spare
+the lookups of repeated requests to the same host.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Number of hosts whose connection pools are kept, and idle connections kept per host
+HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "100"))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+
+# Default connect and read timeouts, in seconds
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+
+# Retries of failed connections and transient statuses, and the backoff
+# factor between them (0.5 s, 1 s, 2 s, ...)
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Longest wait (in seconds) before a retry; a longer Retry-After is cut to it
+HTTP_RETRY_AFTER_MAX = float(os.environ.get("HTTP_RETRY_AFTER_MAX", "10"))
+
+
+class _CappedRetry(Retry):
+    """Retry policy that waits at most HTTP_RETRY_AFTER_MAX seconds, whatever the Retry-After header asks."""
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, HTTP_RETRY_AFTER_MAX)
+
+
+class HttpClient:
+    """
+    HTTP client with per-host connection pools and retries.
+
+    Thread-safe: one client is shared by all threads of a process (see
+    get_http_client()).
+    """
+
+    def __init__(
+        self,
+        pool_hosts: int = HTTP_POOL_HOSTS,
+        pool_size: int = HTTP_POOL_SIZE,
+        timeout: Tuple[float, float] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            pool_hosts: The number of hosts whose connection pools are kept
+            pool_size: The number of idle connections kept per host
+            timeout: The default (connect, read) timeouts, in seconds
+            retries: The number of retries of failed connections and transient statuses
+            backoff: The backoff factor between retries, in seconds
+        """
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._requests = 0
+
+        retry = _CappedRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, with the default timeouts unless others are given.
+
+        Args:
+            method: The HTTP method
+            url: The URL
+            **kwargs: Arguments of requests.Session.request
+
+        Returns:
+            requests.Response: The response (after retries)
+
+        Raises:
+            requests.RequestException: If the request failed after retries
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self._requests += 1
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request (see request())."""
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the connection reuse statistics.
+
+        Returns:
+            Dict: requests sent, connections opened by the pools currently
+                kept, and the share of requests served on a reused connection
+        """
+        pools = self._adapter.poolmanager.pools
+        connections = sum(pool.num_connections for pool in map(pools.get, pools.keys()) if pool is not None)
+        requests_sent = self._requests
+        return {
+            "requests": requests_sent,
+            "connections": connections,
+            "reuse_ratio": round(max(0.0, 1 - connections / requests_sent), 3) if requests_sent else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """
+    Get the shared HTTP client, creating it on first use.
+
+    Returns:
+        HttpClient: The shared client
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
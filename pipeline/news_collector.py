@@ -17,6 +17,9 @@ from newspaper import Article
 from typing import List, Dict, Any, Optional
 from urllib.parse import urlparse
 
+# Pooled keep-alive connections, retries and timeouts
+from http_client import get_http_client
+
 # Configure logging
 os.makedirs("logs", exist_ok=True)
 logging.basicConfig(
@@ -70,7 +73,11 @@ def fetch_from_rss_feeds() -> List[Dict[str, Any]]:
     for feed_url in RSS_FEEDS:
         try:
             logger.info(f"Fetching from RSS feed: {feed_url}")
-            feed = feedparser.parse(feed_url)
+            response = get_http_client().get(feed_url)
+            response.raise_for_status()
+            feed = feedparser.parse(response.content, response_headers={
+                key.lower(): value for key, value in response.headers.items()
+            })
 
             for entry in feed.entries[:10]:  # Limit to 10 articles per feed
                 try:
@@ -105,11 +112,9 @@ def fetch_from_newsapi() -> List[Dict[str, Any]]:
 
     articles = []
     try:
-        import requests
-
         logger.info("Fetching from NewsAPI")
         url = f"https://newsapi.org/v2/top-headlines?language=en&apiKey={NEWSAPI_KEY}"
-        response = requests.get(url)
+        response = get_http_client().get(url)
 
         if response.status_code == 200:
             data = response.json()
@@ -144,8 +149,11 @@ def enrich_article_data(article_data: Dict[str, Any]) -> Dict[str, Any]:
         url = article_data["url"]
         logger.info(f"Enriching article: {url}")
 
+        response = get_http_client().get(url)
+        response.raise_for_status()
+
         article = Article(url)
-        article.download()
+        article.set_html(response.content)
         article.parse()
 
         # Try to extract additional information
@@ -214,6 +222,7 @@ def main():
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     save_articles_to_file(enriched_articles, f"articles_{timestamp}.json")
 
+    logger.info(f"HTTP client: {get_http_client().stats()}")
     logger.info("News collection completed")
 
 if __name__ == "__main__":